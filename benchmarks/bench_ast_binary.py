@@ -0,0 +1,66 @@
+"""
+Benchmark de la carga del AST desde el formato binario.
+
+Guarda el AST de un programa grande con models.ast_binary y compara el
+tiempo de obtenerlo de nuevo analizando el código (léxico + sintáctico) con
+el de cargarlo del archivo mapeado en memoria, completo o con los bloques
+perezosos (solo se decodifica el nivel superior hasta que se usan).
+
+Uso:
+    python -m benchmarks.bench_ast_binary [fragmentos]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from models import ast_binary
+from models.error import ErrorCollection
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from benchmarks.common import generate_program, quiet
+from benchmarks.bench_hash_cons import count_nodes
+
+
+def timed(func):
+    """
+    Ejecuta una función una vez y mide su duración.
+    
+    Returns:
+        tuple: (resultado, segundos)
+    """
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(chunks=20500):
+    code = generate_program(chunks)
+    error_collection = ErrorCollection()
+    lexer = LexerController(error_collection)
+    parser = ParserController(error_collection)
+    
+    with quiet():
+        ast, parse_time = timed(lambda: parser.parse(code, lexer.tokenize(code)))
+    
+    fd, path = tempfile.mkstemp(suffix='.astb')
+    os.close(fd)
+    try:
+        _, dump_time = timed(lambda: ast_binary.dump(ast, path))
+        size = os.path.getsize(path)
+        _, load_time = timed(lambda: ast_binary.load(path))
+        with ast_binary.ASTReader(path) as reader:
+            _, lazy_time = timed(reader.load)
+    finally:
+        os.unlink(path)
+    
+    print(f"{count_nodes(ast)[0]} nodos, {len(code) / 1024:.0f} KiB de código, {size / 1024:.0f} KiB en binario")
+    print(f"  Análisis léxico + sintáctico:  {parse_time:7.3f} s")
+    print(f"  Escritura (dump):              {dump_time:7.3f} s")
+    print(f"  Carga completa (load):         {load_time:7.3f} s  ({parse_time / load_time:.1f}x)")
+    print(f"  Carga con bloques perezosos:   {lazy_time:7.3f} s  ({parse_time / lazy_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20500)
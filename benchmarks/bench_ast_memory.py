@@ -0,0 +1,67 @@
+"""
+Benchmark de la memoria ocupada por el AST.
+
+Analiza un programa de alrededor de un millón de nodos y mide con tracemalloc
+la memoria que sigue asignada después del análisis (el AST con sus listas y
+los árboles 'sentencia' de Lark), dividida entre el número de nodos. También
+muestra el tamaño de cada clase de nodo con sys.getsizeof.
+
+Uso:
+    python -m benchmarks.bench_ast_memory [fragmentos]
+"""
+
+import gc
+import sys
+import tracemalloc
+from collections import Counter
+
+from models.error import ErrorCollection
+from models.ast_nodes import ASTNode
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from benchmarks.common import generate_program, quiet
+
+
+def count_nodes():
+    """
+    Cuenta los nodos del AST vivos, por clase.
+    
+    Returns:
+        Counter: Clase de nodo -> número de instancias
+    """
+    return Counter(type(obj) for obj in gc.get_objects() if isinstance(obj, ASTNode))
+
+
+def main(chunks=20500):
+    code = generate_program(chunks)
+    error_collection = ErrorCollection()
+    tokens = LexerController(error_collection).tokenize(code)
+    parser = ParserController(error_collection)
+    
+    with quiet():
+        parser.parse('', [])  # Carga las tablas antes de medir
+        tracemalloc.start()
+        try:
+            ast = parser.parse(code, tokens)
+            retained = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+    
+    counts = count_nodes()
+    total = sum(counts.values())
+    print(f"Parser: {'autónomo' if parser.standalone is not None else 'Lark'}")
+    print(f"{total} nodos, {retained / 2 ** 20:.1f} MiB: {retained / total:.1f} bytes por nodo")
+    print("Tamaño de cada nodo (sys.getsizeof, con __dict__ y children si los tiene):")
+    for cls, count in counts.most_common():
+        node = next(obj for obj in gc.get_objects() if type(obj) is cls)
+        size = sys.getsizeof(node)
+        if hasattr(node, '__dict__'):
+            size += sys.getsizeof(node.__dict__)
+        if isinstance(node.children, list):
+            size += sys.getsizeof(node.children)
+        print(f"  {cls.__name__:20} {count:8} nodos  {size:4} bytes")
+    assert ast is not None
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20500)
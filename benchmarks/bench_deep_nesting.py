@@ -0,0 +1,68 @@
+"""
+Benchmark de los recorridos del AST sobre programas muy anidados.
+
+Genera programas con N bloques 'si' anidados y con una cadena de N sumas, y
+mide el análisis semántico (SemanticVisitor) y la exportación a DOT
+(format_ast_as_dot). Ambos recorren el AST con una pila explícita, así que
+la profundidad no está limitada por el límite de recursión de Python.
+
+Uso:
+    python -m benchmarks.bench_deep_nesting [profundidad]
+"""
+
+import sys
+import time
+
+from models.error import ErrorCollection
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from controllers.semantic_controller import SemanticController
+from utils.helpers import format_ast_as_dot
+from benchmarks.common import quiet
+
+
+def nested_ifs(depth):
+    """
+    Genera un programa con `depth` bloques 'si' anidados.
+    """
+    return "ent x;\nx = 1;\n" + "si (x > 0) {\n" * depth + "x = 2;\n" + "}\n" * depth
+
+
+def operator_chain(depth):
+    """
+    Genera un programa con una expresión de `depth` sumas encadenadas.
+    """
+    return "ent x;\nx = 1" + " + 1" * depth + ";\n"
+
+
+def timed(func):
+    """
+    Ejecuta una función una vez y mide su duración.
+    
+    Returns:
+        float: Segundos
+    """
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(depth=100000):
+    print(f"Límite de recursión de Python: {sys.getrecursionlimit()}")
+    for name, build in (("si anidados", nested_ifs), ("cadena de sumas", operator_chain)):
+        code = build(depth)
+        error_collection = ErrorCollection()
+        with quiet():
+            tokens = LexerController(error_collection).tokenize(code)
+            ast = ParserController(error_collection).parse(code, tokens)
+            assert ast is not None
+            semantic = timed(lambda: SemanticController(error_collection).analyze(ast))
+            dot = timed(lambda: format_ast_as_dot(ast))
+        
+        print(f"{name}, profundidad {depth}:")
+        print(f"  Análisis semántico: {semantic:.3f} s")
+        print(f"  Exportación a DOT:  {dot:.3f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
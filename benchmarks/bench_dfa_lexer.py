@@ -0,0 +1,72 @@
+"""
+Benchmark del lexer DFA frente al lexer básico de Lark.
+
+Mide tokens por segundo de ambos lexers, generando tokens de Lark y a través
+de LexerController.tokenize, y comprueba que los tokens coinciden. También
+mide tokenize(recover=True) sobre el mismo código con un carácter no
+reconocido en cada sentencia, donde el análisis se reanuda tras cada error.
+
+Uso:
+    python -m benchmarks.bench_dfa_lexer [fragmentos]
+"""
+
+import sys
+
+from controllers.lexer_controller import LexerController
+from benchmarks.common import generate_program, best_of
+
+
+def tokens_of(lexer, code):
+    """
+    Tokeniza el código recuperándose de los errores.
+    
+    Returns:
+        tuple: (tokens como (tipo, valor, línea, columna), número de errores)
+    """
+    tokens = lexer.tokenize(code, recover=True)
+    return [(t.type, t.value, t.line, t.column) for t in tokens], len(lexer.error_collection.lexical_errors)
+
+
+def main(chunks=2000):
+    code = generate_program(chunks)
+    lark_lexer = LexerController(backend='lark')
+    dfa_lexer = LexerController(backend='dfa')
+    registry = lark_lexer.registry
+    dfa = registry.get_dfa_lexer()
+    
+    lark_tokens = list(registry.lex(code))
+    dfa_tokens = list(dfa.lex(code))
+    assert [(t.type, t.value, t.line, t.column) for t in lark_tokens] == \
+           [(t.type, t.value, t.line, t.column) for t in dfa_tokens], "Los lexers difieren"
+    count = len(lark_tokens)
+    
+    results = [
+        ("Lark basic (tokens de Lark)", best_of(lambda: list(registry.lex(code)))),
+        ("DFA (tokens de Lark)", best_of(lambda: list(dfa.lex(code)))),
+        ("tokenize, backend 'lark'", best_of(lambda: lark_lexer.tokenize(code))),
+        ("tokenize, backend 'dfa'", best_of(lambda: dfa_lexer.tokenize(code))),
+    ]
+    
+    print(f"Fuente: {len(code)} caracteres, {count} tokens")
+    for name, elapsed in results:
+        print(f"{name:<28} {elapsed:.3f} s  {count / elapsed:>10,.0f} tokens/s")
+    
+    # Código con muchos errores: un carácter no reconocido tras cada ';'
+    bad_code = code.replace(';', '; @')
+    lark_result = tokens_of(lark_lexer, bad_code)
+    dfa_result = tokens_of(dfa_lexer, bad_code)
+    assert lark_result == dfa_result, "Los lexers difieren con errores"
+    bad_count, errors = len(dfa_result[0]), dfa_result[1]
+    
+    results = [
+        ("recover, backend 'lark'", best_of(lambda: lark_lexer.tokenize(bad_code, recover=True))),
+        ("recover, backend 'dfa'", best_of(lambda: dfa_lexer.tokenize(bad_code, recover=True))),
+    ]
+    
+    print(f"\nCon errores: {len(bad_code)} caracteres, {bad_count} tokens, {errors} errores")
+    for name, elapsed in results:
+        print(f"{name:<28} {elapsed:.3f} s  {bad_count / elapsed:>10,.0f} tokens/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,85 @@
+"""
+Benchmark de expresiones muy largas.
+
+Analiza una asignación cuya expresión tiene N términos con todos los
+operadores binarios mezclados y comprueba que el tiempo crece de forma
+lineal y que el árbol resultante (profundo por la izquierda) se construye
+sin recursión.
+
+Uso:
+    python -m benchmarks.bench_expressions [términos]
+"""
+
+import sys
+
+from models.error import ErrorCollection
+from models.ast_nodes import BinaryOpNode
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from controllers.expression_parser import PRECEDENCE
+from benchmarks.common import quiet, best_of
+
+
+def generate_expression(terms):
+    """
+    Genera una asignación con una expresión de `terms` operandos.
+    
+    Args:
+        terms (int): Número de operandos
+    
+    Returns:
+        str: Código fuente
+    """
+    operators = list(PRECEDENCE)
+    parts = ["x = a0"]
+    for i in range(1, terms):
+        operand = f"a{i}" if i % 2 else str(i)
+        parts.append(f" {operators[i % len(operators)]} {operand}")
+    parts.append(";\n")
+    return "".join(parts)
+
+
+def tree_depth(node):
+    """
+    Calcula la profundidad del árbol de operaciones sin recursión.
+    """
+    depth = 0
+    stack = [(node, 1)]
+    while stack:
+        node, level = stack.pop()
+        if isinstance(node, BinaryOpNode):
+            depth = max(depth, level)
+            stack.append((node.left, level + 1))
+            stack.append((node.right, level + 1))
+    return depth
+
+
+def main(terms=100000):
+    error_collection = ErrorCollection()
+    lexer = LexerController(error_collection)
+    parser = ParserController(error_collection)
+    
+    results = []
+    for size in (terms // 10, terms):
+        code = generate_expression(size)
+        tokens = lexer.tokenize(code)
+        
+        with quiet():
+            elapsed = best_of(lambda: parser.parse(code, tokens))
+        
+        ast = parser.get_ast()
+        if ast is None:
+            print(error_collection.get_all_errors()[-1])
+            return
+        results.append((size, elapsed))
+        
+        expression = ast.children[0].children[0].expression
+        print(f"{size} términos: {elapsed:.3f} s "
+              f"({elapsed / size * 1e6:.2f} µs/término, profundidad {tree_depth(expression)})")
+    
+    (small, small_time), (large, large_time) = results
+    print(f"Crecimiento: x{large_time / small_time:.1f} para x{large // small} términos")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
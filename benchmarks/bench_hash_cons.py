@@ -0,0 +1,120 @@
+"""
+Benchmark del modo de hash-consing del parser.
+
+Compara parse() con parse(hash_cons=True) sobre el mismo programa: nodos
+distintos del AST (las expresiones repetidas comparten sus nodos), memoria
+asignada durante el análisis (tracemalloc) y tiempo. El segundo análisis con
+el mismo controlador reutiliza los nodos del primero.
+
+Comprueba también que el análisis semántico con las posiciones de
+ParserController.positions sitúa los errores igual que sin hash-consing.
+
+Uso:
+    python -m benchmarks.bench_hash_cons [fragmentos]
+"""
+
+import sys
+
+from models.error import ErrorCollection
+from models.ast_nodes import ASTNode, iter_children
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from controllers.semantic_controller import SemanticController
+from benchmarks.common import generate_program, quiet, best_of
+from benchmarks.bench_validate import peak_memory
+
+# Errores semánticos en expresiones repetidas (los nodos de 'y' y
+# 'y + "a"', entre otros, se comparten entre apariciones)
+ERRORS_CHUNK = """ent x{i};
+x{i} = y;
+x{i} = 1;
+si (x{i} + 1) {{ x{i} = 2; }}
+x{i} = x{i} * 2 + "a";
+x{i} = y + "a";
+sout(y);
+"""
+
+# Programas analizados uno tras otro con el mismo controlador: los nodos
+# compartidos no deben conservar el tipo ni el valor del análisis anterior
+SEQUENTIAL_PROGRAMS = (
+    "ent z;\nz = 2;\nsout(z + z);\n",
+    "ent z;\nsi (z + z) { }\n",
+    "ent w;\nw = 1;\nsout(w > 0);\n",
+    "si (w > 0) { }\nsout(w + w);\n",
+)
+
+
+def count_nodes(ast):
+    """
+    Cuenta los nodos del AST, en total y distintos.
+    
+    Args:
+        ast (ASTNode): Raíz del AST
+    
+    Returns:
+        tuple: (apariciones de nodos, objetos distintos)
+    """
+    total = 0
+    seen = set()
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ASTNode):
+            total += 1
+            seen.add(id(node))
+        stack.extend(iter_children(node))
+    return total, len(seen)
+
+
+def semantic_errors(parser, code, tokens, hash_cons):
+    """
+    Analiza un programa y obtiene sus errores semánticos.
+    
+    Returns:
+        list: (clase, mensaje, línea, columna) de cada error
+    """
+    error_collection = ErrorCollection()
+    ast = parser.parse(code, tokens, hash_cons=hash_cons)
+    SemanticController(error_collection).analyze(ast, positions=parser.positions)
+    return [(type(e).__name__, e.message, e.line, e.column) for e in error_collection.semantic_errors]
+
+
+def check_error_positions(chunks):
+    """
+    Comprueba que los errores semánticos son los mismos y se sitúan igual
+    con y sin hash-consing, también con nodos compartidos de un análisis
+    anterior.
+    """
+    parser = ParserController()
+    programs = ["".join(ERRORS_CHUNK.format(i=i) for i in range(count)) for count in (chunks, 1)]
+    for code in programs + list(SEQUENTIAL_PROGRAMS):
+        tokens = LexerController(ErrorCollection()).tokenize(code)
+        expected = semantic_errors(ParserController(), code, tokens, False)
+        if semantic_errors(parser, code, tokens, True) != expected:
+            raise AssertionError("los errores con hash_cons=True no coinciden con parse()")
+
+
+def main(chunks=500):
+    code = generate_program(chunks)
+    tokens = LexerController(ErrorCollection()).tokenize(code)
+    
+    with quiet():
+        results = {}
+        for hash_cons in (False, True):
+            # Un controlador nuevo por medición de memoria, para que la tabla
+            # de nodos compartidos empiece vacía
+            memory = peak_memory(lambda: ParserController().parse(code, tokens, hash_cons=hash_cons))
+            parser = ParserController()
+            ast = parser.parse(code, tokens, hash_cons=hash_cons)
+            elapsed = best_of(lambda: parser.parse(code, tokens, hash_cons=hash_cons))
+            results[hash_cons] = count_nodes(ast), memory, elapsed
+        check_error_positions(chunks)
+    
+    print(f"{len(tokens)} tokens")
+    for hash_cons, ((total, distinct), memory, elapsed) in results.items():
+        print(f"  {'hash_cons=True: ' if hash_cons else 'hash_cons=False:'} {distinct:7} nodos distintos"
+              f" de {total}, pico {memory / 1024:8.1f} KiB, {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
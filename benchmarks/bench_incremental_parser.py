@@ -0,0 +1,52 @@
+"""
+Benchmark del análisis sintáctico incremental.
+
+Edita una sentencia dentro de un bloque de un programa grande y compara
+el análisis completo (parse) con el incremental (reparse), que solo vuelve
+a analizar la sentencia modificada.
+
+Uso:
+    python -m benchmarks.bench_incremental_parser [fragmentos]
+"""
+
+import sys
+
+from models.error import ErrorCollection
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from benchmarks.common import generate_program, quiet, best_of
+
+
+def main(chunks=500):
+    code = generate_program(chunks)
+    error_collection = ErrorCollection()
+    lexer = LexerController(error_collection)
+    parser = ParserController(error_collection)
+    
+    # Dos versiones que solo difieren en una sentencia del bucle central
+    middle = chunks // 2
+    target = f"    x{middle} = x{middle} - 1;"
+    versions = [code, code.replace(target, f"    x{middle} = x{middle} - 2 * y{middle};")]
+    tokens = [lexer.tokenize(version) for version in versions]
+    
+    with quiet():
+        parser.reparse(versions[0], tokens[0])
+        full = best_of(lambda: parser.parse(versions[1], tokens[1]))
+        
+        state = {'current': 0}
+        
+        def incremental():
+            state['current'] ^= 1
+            parser.reparse(versions[state['current']], tokens[state['current']])
+        
+        incremental()
+        partial = best_of(incremental, repeat=5)
+    
+    print(f"Fuente: {len(code)} caracteres, {len(tokens[0])} tokens")
+    print(f"parse (completo):      {full:.3f} s")
+    print(f"reparse (incremental): {partial:.3f} s")
+    print(f"Aceleración: x{full / partial:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
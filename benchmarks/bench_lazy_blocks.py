@@ -0,0 +1,101 @@
+"""
+Benchmark de la construcción perezosa de los bloques.
+
+Analiza un programa con pocas sentencias de nivel superior cuyos bloques
+contienen casi todo el código, y compara ParserController.parse con
+lazy_blocks=False y con lazy_blocks=True: solo el nivel superior, abriendo
+un único bloque (el caso de una herramienta que solo mira una parte del
+programa) y recorriendo el AST completo.
+
+Uso:
+    python -m benchmarks.bench_lazy_blocks [fragmentos] [bloques]
+"""
+
+import sys
+
+from models.error import ErrorCollection
+from models.ast_nodes import ASTNode, RepeatNode, iter_children
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from benchmarks.common import PROGRAM_CHUNK, quiet, best_of
+
+DECLARATIONS = ('ent ', 'dec ', 'cadena ')
+
+
+def walk(node):
+    """
+    Recorre un AST completo, construyendo los bloques pendientes.
+    
+    Args:
+        node: Nodo del AST o árbol de Lark
+    
+    Returns:
+        int: Número de nodos visitados
+    """
+    return isinstance(node, ASTNode) + sum(walk(child) for child in iter_children(node))
+
+
+def first_block(ast):
+    """
+    Devuelve las instrucciones del primer bloque del programa.
+    """
+    loop = next(sentence.children[0] for sentence in ast.children
+                if isinstance(sentence.children[0], RepeatNode))
+    return loop.body.statements
+
+
+def build_program(chunks, blocks):
+    """
+    Genera un programa cuyo código está repartido en bloques repetir.
+    
+    Las declaraciones no pueden ir dentro de un bloque, así que se dejan en
+    el nivel superior y el resto de cada fragmento de PROGRAM_CHUNK va en
+    los bloques.
+    
+    Args:
+        chunks (int): Número de fragmentos del programa
+        blocks (int): Número de bloques de nivel superior
+    
+    Returns:
+        str: Código fuente generado
+    """
+    per_block = max(chunks // blocks, 1)
+    declarations = []
+    bodies = []
+    for block in range(blocks):
+        body = []
+        for i in range(block * per_block, (block + 1) * per_block):
+            for line in PROGRAM_CHUNK.format(i=i).splitlines(keepends=True):
+                (declarations if line.startswith(DECLARATIONS) else body).append(line)
+        bodies.append(f"repetir(1) {{\n{''.join(body)}}}\n")
+    return "".join(declarations) + "".join(bodies)
+
+
+def main(chunks=200, blocks=10):
+    code = build_program(chunks, blocks)
+    error_collection = ErrorCollection()
+    tokens = LexerController(error_collection).tokenize(code)
+    parser = ParserController(error_collection)
+    
+    with quiet():
+        assert parser.parse(code, tokens) is not None
+        assert walk(parser.parse(code, tokens)) == walk(parser.parse(code, tokens, lazy_blocks=True))
+        
+        eager = best_of(lambda: parser.parse(code, tokens))
+        eager_walk = best_of(lambda: walk(parser.parse(code, tokens)))
+        lazy = best_of(lambda: parser.parse(code, tokens, lazy_blocks=True))
+        lazy_block = best_of(lambda: first_block(parser.parse(code, tokens, lazy_blocks=True)))
+        lazy_walk = best_of(lambda: walk(parser.parse(code, tokens, lazy_blocks=True)))
+    
+    print(f"Parser: {'autónomo' if parser.standalone is not None else 'Lark'}")
+    print(f"Fuente: {len(tokens)} tokens, {blocks} bloques de nivel superior")
+    print(f"  parse():                          {eager:.3f} s")
+    print(f"  parse(lazy_blocks=True):          {lazy:.3f} s  ({eager / lazy:.1f}x más rápido)")
+    print(f"  lazy + abrir un bloque:           {lazy_block:.3f} s")
+    print(f"  parse() + recorrido completo:     {eager_walk:.3f} s")
+    print(f"  lazy + recorrido completo:        {lazy_walk:.3f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 10)
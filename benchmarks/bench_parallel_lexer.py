@@ -0,0 +1,40 @@
+"""
+Benchmark del análisis léxico en paralelo.
+
+Compara LexerController.tokenize con tokenize_parallel para distintos
+números de procesos sobre un programa de varios megabytes.
+
+Uso:
+    python -m benchmarks.bench_parallel_lexer [fragmentos]
+"""
+
+import os
+import sys
+
+from controllers.lexer_controller import LexerController
+from benchmarks.common import generate_program, best_of
+
+
+def main(chunks=15000):
+    code = generate_program(chunks)
+    lexer = LexerController(backend='dfa')
+    
+    sequential = best_of(lambda: lexer.tokenize(code))
+    print(f"Fuente: {len(code) / 1e6:.1f} MB, {len(lexer.tokens)} tokens")
+    print(f"Secuencial:           {sequential:.3f} s")
+    
+    cpus = os.cpu_count() or 1
+    workers = 2
+    while workers <= max(cpus, 2):
+        # La primera llamada crea el pool; no se mide
+        lexer.tokenize_parallel(code, workers)
+        elapsed = best_of(lambda: lexer.tokenize_parallel(code, workers))
+        print(f"Paralelo, {workers:>2} procesos: {elapsed:.3f} s  (x{sequential / elapsed:.2f})")
+        workers *= 2
+    
+    lexer.close()
+    print(f"CPUs disponibles: {cpus}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 15000)
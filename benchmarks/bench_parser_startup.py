@@ -0,0 +1,117 @@
+"""
+Benchmark del arranque en frío del parser.
+
+Cada medición se hace en un proceso nuevo de Python y cubre la importación
+del parser, su construcción y el primer análisis de un programa corto (el
+caso de una invocación breve desde la línea de comandos). Se comparan el
+parser de Lark (construyendo las tablas LALR o cargándolas de la caché), el
+ParserController con el parser autónomo y el parser autónomo usado sin
+importar Lark.
+
+Si el parser autónomo no está generado o está desactualizado, se genera
+antes de medir (python -m grammar.generate_parser).
+
+Uso:
+    python -m benchmarks.bench_parser_startup [fragmentos] [repeticiones]
+"""
+
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+from models.error import ErrorCollection
+from controllers.lexer_controller import LexerController
+from grammar.registry import get_registry, ROOT_DIR
+from grammar.generate_parser import generate
+from benchmarks.common import generate_program
+
+# Código que se ejecuta en cada proceso; {setup} construye el parser y
+# {parse} analiza los tokens
+CHILD = """
+import pickle, sys, time
+from models.token import Token
+with open({path!r}, 'rb') as f:
+    tokens = [Token(*row) for row in pickle.load(f)]
+start = time.perf_counter()
+{setup}
+ast = {parse}
+elapsed = time.perf_counter() - start
+assert type(ast).__name__ == 'ProgramNode'
+print(elapsed, 'lark' in sys.modules)
+"""
+
+CASES = [
+    ("Lark, tablas construidas",
+     "from grammar.registry import GrammarRegistry\n"
+     "from controllers.parser_controller import ASTBuilder\n"
+     "parser = GrammarRegistry(cache_dir=None).get_parser(ASTBuilder())",
+     "parser.parse(tokens)"),
+    ("Lark, tablas en caché",
+     "from grammar.registry import get_registry\n"
+     "from controllers.parser_controller import ASTBuilder\n"
+     "parser = get_registry().get_parser(ASTBuilder())",
+     "parser.parse(tokens)"),
+    ("ParserController, parser autónomo",
+     "from controllers.parser_controller import ParserController\n"
+     "parser = ParserController()\n"
+     "assert parser.standalone is not None",
+     "parser.parse('', tokens)"),
+    ("Parser autónomo sin Lark",
+     "from grammar.standalone_parser import Parser\n"
+     "parser = Parser()",
+     "parser.parse(tokens)"),
+]
+
+
+def run_child(script):
+    """
+    Ejecuta un script en un proceso nuevo de Python.
+    
+    Args:
+        script (str): Código a ejecutar
+    
+    Returns:
+        tuple: (segundos medidos en el proceso, True si importó Lark)
+    """
+    # Con los .pyc escritos, como en una invocación habitual
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    elapsed, imported_lark = output.split()
+    return float(elapsed), imported_lark == 'True'
+
+
+def main(chunks=1, repeat=10):
+    registry = get_registry()
+    if registry.get_standalone_parser() is None:
+        print(f"Generando el parser autónomo en {generate()}")
+    registry.get_parser()  # Deja las tablas en la caché en disco
+    
+    code = generate_program(chunks)
+    tokens = LexerController(ErrorCollection()).tokenize(code)
+    rows = [(t.type, t.value, t.line, t.column, t.start_pos, t.end_pos) for t in tokens]
+    
+    with tempfile.NamedTemporaryFile(suffix='.pickle', delete=False) as f:
+        pickle.dump(rows, f)
+        path = f.name
+    
+    try:
+        print(f"Fuente: {len(code)} caracteres, {len(rows)} tokens; mejor de {repeat} procesos")
+        print("Importación + construcción + primer análisis:")
+        for name, setup, parse in CASES:
+            script = CHILD.format(path=path, setup=setup, parse=parse)
+            results = [run_child(script) for _ in range(repeat)]
+            best = min(elapsed for elapsed, _ in results)
+            imported_lark = results[0][1]
+            print(f"  {name + ':':36} {best * 1000:7.1f} ms"
+                  f"  ({'importa Lark' if imported_lark else 'sin Lark'})")
+    finally:
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 10)
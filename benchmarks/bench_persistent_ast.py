@@ -0,0 +1,111 @@
+"""
+Benchmark de las revisiones del AST persistente.
+
+Guarda un historial de revisiones de un programa, cada una con la expresión
+de una asignación distinta cambiada y analizada, de dos formas: revisiones
+de models.persistent_ast (copian solo el camino editado y guardan los
+atributos semánticos en tablas aparte) y copias completas con
+copy.deepcopy. Mide la memoria que retiene el historial, incluido el AST de
+partida (tracemalloc), y el tiempo de crear y analizar cada revisión.
+
+Uso:
+    python -m benchmarks.bench_persistent_ast [fragmentos] [revisiones]
+"""
+
+import copy
+import sys
+import time
+import tracemalloc
+
+from models.error import ErrorCollection
+from models.ast_nodes import ASTNode, NumberNode
+from models.persistent_ast import ASTRevision
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from controllers.semantic_controller import SemanticController
+from benchmarks.common import generate_program, quiet
+
+# Posición de la primera asignación de cada fragmento y sentencias por fragmento
+FIRST_ASSIGNMENT = 3
+STATEMENTS_PER_CHUNK = 10
+
+
+def assignment(root, i):
+    """
+    Obtiene la primera asignación del fragmento i (sin el Tree 'sentencia').
+    """
+    statement = root.children[FIRST_ASSIGNMENT + STATEMENTS_PER_CHUNK * i]
+    return statement if isinstance(statement, ASTNode) else statement.children[0]
+
+
+def persistent_history(ast, revisions, semantic):
+    """
+    Crea el historial con revisiones persistentes.
+    """
+    revision = ASTRevision(ast)
+    semantic.analyze_revision(revision)
+    history = [revision]
+    for i in range(revisions):
+        path = revision.path_to(assignment(revision.root, i).expression)
+        revision = revision.replace(path, NumberNode(i))
+        semantic.analyze_revision(revision)
+        history.append(revision)
+    return history
+
+
+def copied_history(ast, revisions, semantic):
+    """
+    Crea el historial con una copia completa del AST por revisión.
+    """
+    semantic.analyze(ast)
+    history = [ast]
+    for i in range(revisions):
+        ast = copy.deepcopy(ast)
+        assignment(ast, i).expression = NumberNode(i)
+        semantic.analyze(ast)
+        history.append(ast)
+    return history
+
+
+def measure(build):
+    """
+    Construye un historial dos veces: una para medir el tiempo y otra, con
+    tracemalloc, para medir la memoria que retiene.
+    
+    Returns:
+        tuple: (bytes retenidos, segundos)
+    """
+    start = time.perf_counter()
+    build()
+    elapsed = time.perf_counter() - start
+    
+    tracemalloc.start()
+    try:
+        history = build()
+        retained = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del history
+    return retained, elapsed
+
+
+def main(chunks=100, revisions=50):
+    code = generate_program(max(chunks, revisions))
+    error_collection = ErrorCollection()
+    tokens = LexerController(error_collection).tokenize(code)
+    
+    results = {}
+    with quiet():
+        for name, build in (("AST persistente", persistent_history), ("deepcopy", copied_history)):
+            # Cada medición parte de un AST recién construido
+            parser = ParserController(error_collection)
+            semantic = SemanticController(ErrorCollection())
+            results[name] = measure(lambda: build(parser.parse(code, tokens), revisions, semantic))
+    
+    print(f"{len(tokens)} tokens, {revisions} revisiones")
+    for name, (retained, elapsed) in results.items():
+        print(f"  {name:16} {retained / 1024:10.1f} KiB retenidos, {elapsed / (revisions + 1) * 1000:7.2f} ms por revisión")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
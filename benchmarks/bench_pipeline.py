@@ -0,0 +1,45 @@
+"""
+Benchmark del pipeline léxico + sintáctico.
+
+Compara el flujo anterior (el parser vuelve a tokenizar el código) con el
+flujo de una sola pasada, en el que el parser consume los tokens del
+LexerController.
+
+Uso:
+    python -m benchmarks.bench_pipeline [fragmentos]
+"""
+
+import sys
+
+from models.error import ErrorCollection
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from benchmarks.common import generate_program, quiet, best_of
+
+
+def main(chunks=2000):
+    code = generate_program(chunks)
+    error_collection = ErrorCollection()
+    lexer = LexerController(error_collection)
+    parser = ParserController(error_collection)
+    
+    def double_lex():
+        tokens = lexer.tokenize(code)
+        parser.parse(code)
+    
+    def single_pass():
+        tokens = lexer.tokenize(code)
+        parser.parse(code, tokens)
+    
+    with quiet():
+        before = best_of(double_lex)
+        after = best_of(single_pass)
+    
+    print(f"Fuente: {len(code)} caracteres, {len(lexer.tokens)} tokens")
+    print(f"Léxico + parse(code):         {before:.3f} s")
+    print(f"Léxico + parse(code, tokens): {after:.3f} s")
+    print(f"Ahorro: {(1 - after / before) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,85 @@
+"""
+Benchmark de las conversiones de posición con SourceIndex.
+
+Sobre un programa grande compara, para posiciones al azar:
+
+- desplazamiento -> (línea, columna): SourceIndex.position() frente a
+  contar los saltos de línea anteriores en el texto;
+- resaltar una línea (utils.helpers.highlight_line) con un índice ya
+  construido frente a dividir todo el texto en líneas en cada llamada,
+  como hacía antes.
+
+Uso:
+    python -m benchmarks.bench_source_index [fragmentos] [consultas]
+"""
+
+import random
+import sys
+import time
+
+from models.source_index import SourceIndex
+from utils.helpers import highlight_line
+from benchmarks.common import generate_program
+
+
+def count_position(text, offset):
+    """
+    Convierte un desplazamiento en (línea, columna) recorriendo el texto.
+    """
+    line = text.count('\n', 0, offset) + 1
+    return line, offset - text.rfind('\n', 0, offset)
+
+
+def split_highlight_line(text, line_number, line_color='#ffff00'):
+    """
+    Resalta una línea dividiendo todo el texto (implementación anterior).
+    """
+    lines = text.split('\n')
+    if line_number <= 0 or line_number > len(lines):
+        return text
+    lines[line_number - 1] = f'<span style="background-color: {line_color};">{lines[line_number - 1]}</span>'
+    return '\n'.join(lines)
+
+
+def timed(func, items):
+    """
+    Aplica una función a cada elemento y mide el tiempo total.
+    
+    Returns:
+        tuple: (resultados, segundos)
+    """
+    start = time.perf_counter()
+    results = [func(item) for item in items]
+    return results, time.perf_counter() - start
+
+
+def main(chunks=2000, queries=200):
+    code = generate_program(chunks)
+    rng = random.Random(0)
+    
+    start = time.perf_counter()
+    index = SourceIndex(code)
+    build_time = time.perf_counter() - start
+    
+    offsets = [rng.randrange(len(code) + 1) for _ in range(queries)]
+    indexed, index_time = timed(index.position, offsets)
+    counted, count_time = timed(lambda offset: count_position(code, offset), offsets)
+    if indexed != counted:
+        raise AssertionError("position() no coincide con el recuento")
+    
+    lines = [rng.randrange(len(index)) + 1 for _ in range(queries)]
+    highlighted, highlight_time = timed(lambda line: highlight_line(code, line, source_index=index), lines)
+    split, split_time = timed(lambda line: split_highlight_line(code, line), lines)
+    if highlighted != split:
+        raise AssertionError("highlight_line() no coincide con la versión anterior")
+    
+    print(f"{len(index)} líneas, {len(code) / 1024:.0f} KiB de código, {queries} consultas")
+    print(f"  Construcción del índice:        {build_time * 1000:9.1f} ms")
+    print(f"  position() con el índice:       {index_time / queries * 1e6:9.1f} µs por consulta")
+    print(f"  Recuento de saltos de línea:    {count_time / queries * 1e6:9.1f} µs por consulta  ({count_time / index_time:.0f}x)")
+    print(f"  highlight_line() con el índice: {highlight_time / queries * 1e6:9.1f} µs por consulta")
+    print(f"  Dividir el texto en líneas:     {split_time / queries * 1e6:9.1f} µs por consulta  ({split_time / highlight_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,81 @@
+"""
+Benchmark de las consultas de posición con el índice de tramos.
+
+Busca el nodo más interno en posiciones al azar de un programa grande de
+dos formas: con SpanIndex.node_at() (árbol de intervalos) y recorriendo
+el AST con walk() y comparando el tramo de cada nodo. Mide también lo
+que cuesta construir el índice.
+
+Uso:
+    python -m benchmarks.bench_span_index [fragmentos] [consultas]
+"""
+
+import random
+import sys
+import time
+
+from models.ast_nodes import ASTNode, SKIP, walk
+from models.error import ErrorCollection
+from models.span_index import SpanIndex
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from benchmarks.common import generate_program, quiet
+
+
+def linear_node_at(ast, line, column):
+    """
+    Busca el nodo más interno que contiene una posición recorriendo el AST
+    (sin entrar en los nodos que no la contienen).
+    """
+    position = (line, column)
+    best = [None]
+    
+    def enter(node, data, field, index):
+        if isinstance(node, ASTNode) and node.end_line is not None:
+            if not (node.line, node.column) <= position < (node.end_line, node.end_column):
+                return SKIP
+            # Los nodos contenidos en otro aparecen después en preorden
+            best[0] = node
+    
+    walk(ast, enter)
+    return best[0]
+
+
+def main(chunks=2000, queries=200):
+    code = generate_program(chunks)
+    error_collection = ErrorCollection()
+    with quiet():
+        tokens = LexerController(error_collection).tokenize(code)
+        ast = ParserController(error_collection).parse(code, tokens)
+    
+    lines = code.split('\n')
+    rng = random.Random(0)
+    positions = []
+    while len(positions) < queries:
+        line = rng.randrange(len(lines)) + 1
+        if lines[line - 1]:
+            positions.append((line, rng.randrange(len(lines[line - 1])) + 1))
+    
+    start = time.perf_counter()
+    index = SpanIndex(ast)
+    build_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    indexed = [index.node_at(line, column) for line, column in positions]
+    index_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    linear = [linear_node_at(ast, line, column) for line, column in positions]
+    linear_time = time.perf_counter() - start
+    
+    if any(a is not b for a, b in zip(indexed, linear)):
+        raise AssertionError("node_at() no coincide con el recorrido lineal")
+    
+    print(f"{len(index)} tramos, {len(lines)} líneas, {queries} consultas")
+    print(f"  Construcción del índice:  {build_time * 1000:9.1f} ms")
+    print(f"  SpanIndex.node_at():      {index_time / queries * 1e6:9.1f} µs por consulta")
+    print(f"  Recorrido lineal:         {linear_time / queries * 1e6:9.1f} µs por consulta  ({linear_time / index_time:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,64 @@
+"""
+Benchmark de memoria del TokenBuffer.
+
+Compara la memoria que ocupa una lista de objetos Token (representación
+anterior) con la del TokenBuffer que devuelve el LexerController.
+
+Uso:
+    python -m benchmarks.bench_token_buffer [fragmentos]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from models.token import Token
+from controllers.lexer_controller import LexerController
+from benchmarks.common import generate_program
+
+
+def measure(func):
+    """
+    Mide la memoria retenida por el resultado de una función.
+    
+    Args:
+        func (callable): Función que construye la estructura a medir
+        
+    Returns:
+        tuple: (resultado, bytes retenidos)
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main(chunks=2000):
+    code = generate_program(chunks)
+    lexer = LexerController()
+    
+    def token_list():
+        return [Token(t.type, t.value, t.line, t.column, t.start_pos, t.end_pos,
+                      t.end_line, t.end_column)
+                for t in lexer.registry.lex(code)]
+    
+    tokens, list_bytes = measure(token_list)
+    buffer, buffer_bytes = measure(lambda: lexer.tokenize(code))
+    
+    print(f"Tokens: {len(buffer)}")
+    print(f"Lista de Token: {list_bytes / len(tokens):.1f} bytes/token")
+    print(f"TokenBuffer:    {buffer_bytes / len(buffer):.1f} bytes/token")
+    print(f"Proporción:     {buffer_bytes / list_bytes * 100:.1f}%")
+    
+    # Recorrido por tipo sin crear objetos por token
+    start = time.perf_counter()
+    identifier = buffer.kind_ids.get('IDENTIFICADOR')
+    count = sum(1 for kind in buffer.kinds if kind == identifier)
+    elapsed = time.perf_counter() - start
+    print(f"Conteo de identificadores sobre buffer.kinds: {count} en {elapsed:.3f} s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,67 @@
+"""
+Benchmark del coste de las trazas de depuración.
+
+Mide el análisis completo (léxico, sintáctico y semántico) con las trazas
+desactivadas y con todas activadas, y estima cuánto cuestan las llamadas a
+los trazadores cuando están desactivados.
+
+Uso:
+    python -m benchmarks.bench_tracing [fragmentos]
+"""
+
+import io
+import sys
+import timeit
+
+from models.error import ErrorCollection
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from controllers.semantic_controller import SemanticController
+from utils.tracing import get_tracer, set_trace_level, DEBUG, OFF
+from benchmarks.common import generate_program, quiet, best_of
+
+
+def main(chunks=200):
+    code = generate_program(chunks)
+    
+    def analyze():
+        error_collection = ErrorCollection()
+        tokens = LexerController(error_collection).tokenize(code)
+        ast = ParserController(error_collection).parse(code, tokens)
+        SemanticController(error_collection).analyze(ast)
+    
+    with quiet():
+        # Con todas las trazas activas (equivalente a los antiguos print)
+        set_trace_level('all', DEBUG)
+        analyze()  # Carga la gramática antes de medir
+        enabled = best_of(analyze)
+        
+        # Número de llamadas a los trazadores durante un análisis
+        output = io.StringIO()
+        tracers = [get_tracer(name) for name in ('parser', 'semantic', 'symbols')]
+        for tracer in tracers:
+            tracer.stream = output
+        analyze()
+        calls = output.getvalue().count('\n')
+        for tracer in tracers:
+            tracer.stream = None
+        
+        set_trace_level('all', OFF)
+        disabled = best_of(analyze, repeat=5)
+    
+    # Coste de una llamada con el trazador desactivado
+    tracer = get_tracer('semantic')
+    number = 1000000
+    per_call = min(timeit.repeat('tracer.debug("Visitando %s", 1)', globals={'tracer': tracer},
+                                 number=number, repeat=3)) / number
+    overhead = calls * per_call
+    
+    print(f"Fuente: {len(code)} caracteres, {calls} trazas por análisis")
+    print(f"Trazas desactivadas: {disabled:.3f} s")
+    print(f"Trazas activadas:    {enabled:.3f} s")
+    print(f"Coste por llamada desactivada: {per_call * 1e9:.0f} ns")
+    print(f"Sobrecoste estimado: {overhead * 1000:.2f} ms ({overhead / disabled * 100:.2f}%)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,68 @@
+"""
+Benchmark de la validación sintáctica frente al análisis completo.
+
+Compara ParserController.validate (solo recorre el autómata LALR) con
+ParserController.parse (construye el AST) sobre los mismos tokens, en tiempo
+y en memoria: el pico de memoria asignada durante cada llamada se mide con
+tracemalloc para dos tamaños de programa, de modo que se vea cuánto crece
+con el número de tokens.
+
+Uso:
+    python -m benchmarks.bench_validate [fragmentos]
+"""
+
+import sys
+import tracemalloc
+
+from models.error import ErrorCollection
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from benchmarks.common import generate_program, quiet, best_of
+
+
+def peak_memory(func):
+    """
+    Mide el pico de memoria asignada durante una llamada.
+    
+    Args:
+        func (callable): Función a medir
+    
+    Returns:
+        int: Bytes
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main(chunks=500):
+    error_collection = ErrorCollection()
+    lexer = LexerController(error_collection)
+    parser = ParserController(error_collection)
+    
+    with quiet():
+        results = {}
+        for size in (chunks // 10, chunks):
+            code = generate_program(size)
+            tokens = lexer.tokenize(code)
+            # Carga las tablas antes de medir
+            assert not parser.validate(code, tokens) and parser.parse(code, tokens) is not None
+            results[size] = (len(tokens),
+                             best_of(lambda: parser.parse(code, tokens)),
+                             best_of(lambda: parser.validate(code, tokens)),
+                             peak_memory(lambda: parser.parse(code, tokens)),
+                             peak_memory(lambda: parser.validate(code, tokens)))
+    
+    print(f"Parser: {'autónomo' if parser.standalone is not None else 'Lark'}")
+    for size, (count, parse_time, validate_time, parse_peak, validate_peak) in results.items():
+        print(f"{count} tokens:")
+        print(f"  parse():    {parse_time:.3f} s, pico {parse_peak / 1024:9.1f} KiB")
+        print(f"  validate(): {validate_time:.3f} s, pico {validate_peak / 1024:9.1f} KiB"
+              f"  ({parse_time / validate_time:.1f}x más rápido)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,86 @@
+"""
+Benchmark del despacho de los visitors del AST.
+
+Mide el análisis semántico completo de un programa y, por separado, el
+coste de despachar cada nodo: ASTVisitor.visit (tabla de despacho por clase
+de nodo) frente al despacho anterior (comprobación hasattr + accept, que
+componía el nombre del método y lo buscaba con getattr en cada visita).
+
+Uso:
+    python -m benchmarks.bench_visitor_dispatch [fragmentos]
+"""
+
+import sys
+
+from models.error import ErrorCollection
+from models.ast_nodes import ASTNode, iter_children
+from controllers.lexer_controller import LexerController
+from controllers.parser_controller import ParserController
+from controllers.semantic_controller import SemanticController, ASTVisitor
+from benchmarks.common import generate_program, quiet, best_of
+
+
+class NullVisitor(ASTVisitor):
+    """
+    Visitor cuyas visitas no hacen nada, para medir solo el despacho.
+    """
+    def generic_visit(self, node):
+        return None
+    
+    def visit_BinaryOpNode(self, node):
+        return None
+    
+    def visit_VariableNode(self, node):
+        return None
+
+
+def collect_nodes(ast):
+    """
+    Reúne todos los nodos del AST en una lista.
+    """
+    nodes = []
+    stack = [ast]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ASTNode):
+            nodes.append(node)
+        stack.extend(iter_children(node))
+    return nodes
+
+
+def main(chunks=500):
+    code = generate_program(chunks)
+    error_collection = ErrorCollection()
+    tokens = LexerController(error_collection).tokenize(code)
+    with quiet():
+        ast = ParserController(error_collection).parse(code, tokens)
+    
+    semantic = SemanticController(ErrorCollection())
+    visitor = NullVisitor()
+    nodes = collect_nodes(ast)
+    
+    def dispatch_table():
+        visit = visitor.visit
+        for node in nodes:
+            visit(node)
+    
+    def dispatch_getattr():
+        for node in nodes:
+            if hasattr(node, 'accept'):
+                method = getattr(visitor, f'visit_{type(node).__name__}', visitor.generic_visit)
+                method(node)
+    
+    with quiet():
+        analyze = best_of(lambda: semantic.analyze(ast))
+        table = best_of(dispatch_table)
+        legacy = best_of(dispatch_getattr)
+    
+    print(f"{len(nodes)} nodos")
+    print(f"  Análisis semántico:           {analyze:.3f} s")
+    print(f"  Despacho con tabla:           {table * 1e9 / len(nodes):6.1f} ns/nodo")
+    print(f"  Despacho con hasattr+getattr: {legacy * 1e9 / len(nodes):6.1f} ns/nodo"
+          f"  ({legacy / table:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,75 @@
+"""
+Utilidades compartidas por los benchmarks del analizador.
+"""
+
+import contextlib
+import io
+import time
+
+# Fragmento de programa representativo del lenguaje
+PROGRAM_CHUNK = """// Bloque {i}
+ent x{i}, y{i};
+dec z{i};
+cadena mensaje{i};
+
+x{i} = 10;
+y{i} = 5;
+z{i} = 3.14;
+mensaje{i} = "Hola, mundo!";
+
+si (x{i} > y{i}) {{
+    sout("x es mayor que y");
+}} oNo {{
+    sout("x no es mayor que y");
+}}
+
+mientras (x{i} > 0) {{
+    x{i} = x{i} - 1;
+    sout(x{i});
+}}
+
+repetir(3) {{
+    sout("Iteración");
+}}
+"""
+
+
+def generate_program(chunks):
+    """
+    Genera un programa grande repitiendo el fragmento de ejemplo.
+    
+    Args:
+        chunks (int): Número de fragmentos a concatenar
+        
+    Returns:
+        str: Código fuente generado
+    """
+    return "".join(PROGRAM_CHUNK.format(i=i) for i in range(chunks))
+
+
+@contextlib.contextmanager
+def quiet():
+    """
+    Descarta la salida estándar (mensajes de depuración) durante la medición.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def best_of(func, repeat=3):
+    """
+    Ejecuta una función varias veces y devuelve el mejor tiempo.
+    
+    Args:
+        func (callable): Función a medir
+        repeat (int, optional): Número de repeticiones
+        
+    Returns:
+        float: Mejor tiempo en segundos
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
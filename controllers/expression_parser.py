@@ -0,0 +1,110 @@
+from models.ast_nodes import BinaryOpNode
+
+# Precedencia de los operadores binarios (mayor número, más fuerte)
+PRECEDENCE = {
+    '||': 1,
+    '&&': 2,
+    '==': 3, '!=': 3,
+    '<': 4, '>': 4, '<=': 4, '>=': 4,
+    '+': 5, '-': 5,
+    '*': 6, '/': 6,
+}
+
+# Operadores asociativos por la derecha (ninguno por ahora)
+RIGHT_ASSOCIATIVE = frozenset()
+
+# Operadores cuyo resultado es booleano
+RELATIONAL_OPERATORS = frozenset(('==', '!=', '<', '>', '<=', '>='))
+
+
+class ExpressionParser:
+    """
+    Construye el AST de una expresión aplicando precedencia y asociatividad.
+    
+    La gramática solo reconoce la secuencia plana `operando (operador
+    operando)*`; este analizador de precedencia (precedence climbing en su
+    forma iterativa, con una pila de operandos y otra de operadores) la
+    convierte en nodos BinaryOpNode en tiempo lineal y sin recursión, así que
+    una cadena de miles de términos produce un árbol profundo por la
+    izquierda sin agotar la pila de Python.
+    """
+    def __init__(self, precedence=PRECEDENCE, right_associative=RIGHT_ASSOCIATIVE,
+                 node_factory=BinaryOpNode):
+        """
+        Inicializa el analizador.
+        
+        Args:
+            precedence (dict, optional): Operador -> nivel de precedencia
+            right_associative (set, optional): Operadores asociativos por la
+                derecha
+            node_factory (callable, optional): Crea el nodo de una operación
+                a partir de (operador, izquierdo, derecho); por ejemplo,
+                NodeCache.binary_op para compartir los subárboles iguales
+        """
+        self.precedence = precedence
+        self.right_associative = right_associative
+        self.node_factory = node_factory
+    
+    def build(self, first, rest):
+        """
+        Construye el árbol de una expresión.
+        
+        Args:
+            first (ASTNode): Primer operando
+            rest (sequence): Operadores y operandos alternados:
+                [operador, operando, operador, operando, ...]; los operadores
+                pueden ser tokens o cadenas
+        
+        Returns:
+            ASTNode: Raíz de la expresión
+        
+        Raises:
+            ValueError: Si un operador no tiene precedencia definida
+        """
+        if not rest:
+            return first
+        
+        precedence = self.precedence
+        right_associative = self.right_associative
+        operands = [first]
+        operators = []  # Pila de (precedencia, operador)
+        
+        for i in range(0, len(rest) - 1, 2):
+            operator = getattr(rest[i], 'value', rest[i])
+            level = precedence.get(operator)
+            if level is None:
+                raise ValueError(f"Operador binario desconocido: '{operator}'")
+            
+            # Reducir los operadores pendientes que ligan más fuerte (o igual,
+            # si el nuevo operador es asociativo por la izquierda)
+            if operator in right_associative:
+                while operators and operators[-1][0] > level:
+                    self._reduce(operands, operators)
+            else:
+                while operators and operators[-1][0] >= level:
+                    self._reduce(operands, operators)
+            
+            operators.append((level, operator))
+            operands.append(rest[i + 1])
+        
+        while operators:
+            self._reduce(operands, operators)
+        
+        return operands[0]
+    
+    def _reduce(self, operands, operators):
+        """
+        Combina los dos operandos superiores con el operador superior.
+        """
+        operator = operators.pop()[1]
+        right = operands.pop()
+        left = operands[-1]
+        node = self.node_factory(operator, left, right)
+        if operator in RELATIONAL_OPERATORS:
+            node.type = 'bool'
+        if left.end_line is not None and right.end_line is not None:
+            # Extensión: del inicio del operando izquierdo al final del
+            # derecho (los nodos compartidos no tienen)
+            node.line, node.column = left.line, left.column
+            node.end_line, node.end_column = right.end_line, right.end_column
+        operands[-1] = node
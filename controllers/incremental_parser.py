@@ -0,0 +1,457 @@
+from lark import Tree
+
+from models.ast_nodes import ASTNode, ProgramNode, BlockNode, IfNode, WhileNode, RepeatNode, iter_fields, set_span
+from models.token import TokenBuffer
+from utils.tracing import get_tracer
+
+_trace = get_tracer('parser')
+
+
+class Segment:
+    """
+    Sentencia (o declaración) ya analizada y su tramo de tokens.
+    
+    Las sentencias compuestas guardan además un segmento por cada sentencia
+    de sus bloques, de modo que un cambio dentro de un bloque solo obliga a
+    analizar de nuevo la sentencia afectada.
+    """
+    __slots__ = ('start', 'end', 'line', 'signature', 'header', 'node', 'own', 'blocks')
+    
+    def __init__(self, start, end, line, signature, node):
+        """
+        Inicializa el segmento.
+        
+        Args:
+            start (int): Índice del primer token
+            end (int): Índice siguiente al último token
+            line (int): Línea del primer token
+            signature (tuple): Columna inicial y texto del tramo
+            node: Nodo tal como aparece en su contenedor (un ASTNode o el
+                Tree 'sentencia' que lo envuelve)
+        """
+        self.start = start
+        self.end = end
+        self.line = line
+        self.signature = signature
+        self.header = None  # Firma sin el contenido de los bloques
+        self.node = node
+        self.own = []       # (nodo, tipo, valor, línea y línea final relativas) fuera de los bloques
+        self.blocks = []    # (BlockNode, [Segment, ...]) por cada bloque
+
+
+class TokenIndex:
+    """
+    Vista de una secuencia de tokens preparada para dividirla en sentencias.
+    
+    Guarda en listas paralelas el tipo, la línea y las posiciones de cada
+    token; la firma de un tramo es su texto en el código fuente (junto con la
+    columna del primer token), de modo que dos tramos con la misma firma
+    producen exactamente los mismos tokens en las mismas posiciones relativas.
+    """
+    def __init__(self, code, tokens, markers):
+        """
+        Construye el índice.
+        
+        Args:
+            code (str): Código fuente de los tokens
+            tokens (sequence): Tokens (TokenBuffer o tokens con posiciones)
+            markers (dict): Texto ('{', '}', ';', 'oNo') -> tipo de token
+        
+        Raises:
+            ValueError: Si los tokens no tienen posiciones en el código
+        """
+        self.tokens = tokens
+        self.source = code
+        if isinstance(tokens, TokenBuffer):
+            names = tokens.kind_names
+            self.types = [names[kind] for kind in tokens.kinds]
+            self.lines = tokens.lines
+            self.columns = tokens.columns
+            self.starts = tokens.starts
+            self.ends = tokens.ends
+        else:
+            self.types = [token.type for token in tokens]
+            self.lines = [token.line for token in tokens]
+            self.columns = [token.column for token in tokens]
+            self.starts = [token.start_pos for token in tokens]
+            self.ends = [token.end_pos for token in tokens]
+            if None in self.starts or None in self.ends:
+                raise ValueError("los tokens no tienen posiciones en el código")
+        
+        self.open = markers['{']
+        self.close = markers['}']
+        self.end = markers[';']
+        self.other = markers['oNo']
+    
+    def __len__(self):
+        return len(self.types)
+    
+    def signature(self, start, end):
+        """
+        Firma de un tramo: columna del primer token y texto hasta el último.
+        """
+        return self.columns[start], self.source[self.starts[start]:self.ends[end - 1]]
+    
+    def header(self, start, end, blocks):
+        """
+        Firma de una sentencia compuesta sin el contenido de sus bloques.
+        
+        Los tokens hasta la apertura del primer bloque conservan su texto y
+        posición relativa; los que quedan entre bloques ('}', 'oNo', '{')
+        solo su tipo.
+        """
+        first, previous = blocks[0]
+        types = self.types
+        header = [self.signature(start, first + 1)]
+        for open_, close in blocks[1:]:
+            header.extend(types[previous:open_ + 1])
+            previous = close
+        header.extend(types[previous:end])
+        return tuple(header)
+    
+    def find_blocks(self, start, end):
+        """
+        Localiza los bloques de primer nivel de una sentencia.
+        
+        Returns:
+            list: (índice de '{', índice de su '}')
+        """
+        open_type, close_type = self.open, self.close
+        blocks = []
+        depth = 0
+        for i in range(start, end):
+            type = self.types[i]
+            if type == open_type:
+                if depth == 0:
+                    first = i
+                depth += 1
+            elif type == close_type:
+                depth -= 1
+                if depth == 0:
+                    blocks.append((first, i))
+        return blocks
+    
+    def split(self, start, end):
+        """
+        Divide un tramo de tokens en sentencias.
+        
+        Una sentencia termina en un ';' fuera de bloques o en la '}' que
+        cierra su último bloque (salvo que la siga un 'oNo').
+        
+        Returns:
+            list: Tramos (inicio, fin)
+        """
+        types = self.types
+        open_type, close_type, end_type, other_type = self.open, self.close, self.end, self.other
+        spans = []
+        first = start
+        depth = 0
+        for i in range(start, end):
+            type = types[i]
+            if type == open_type:
+                depth += 1
+            elif type == close_type:
+                depth -= 1
+                if depth == 0 and not (i + 1 < end and types[i + 1] == other_type):
+                    spans.append((first, i + 1))
+                    first = i + 1
+            elif type == end_type and depth == 0:
+                spans.append((first, i + 1))
+                first = i + 1
+        if first < end:
+            spans.append((first, end))
+        return spans
+
+
+class IncrementalParser:
+    """
+    Análisis sintáctico incremental a nivel de sentencia.
+    
+    Cada sentencia de nivel superior y cada sentencia dentro de un bloque se
+    identifica por su tramo de código (texto y columna inicial). Tras una
+    edición, las sentencias cuyo texto no cambió reutilizan su subárbol,
+    desplazado a su nueva línea; una sentencia compuesta cuya cabecera no
+    cambió conserva su nodo y solo se concilian sus bloques; el resto se
+    analiza de nuevo por separado.
+    
+    El resultado es idéntico al de un análisis completo: el lenguaje es una
+    secuencia de sentencias independientes, los nodos reutilizados recuperan
+    los atributos que tenían al construirse (el análisis semántico los
+    modifica) y, ante cualquier duda (errores de sintaxis, llaves sin pareja),
+    el controlador recurre al análisis completo. Una versión con errores no
+    descarta los segmentos, así que la siguiente versión correcta vuelve a
+    aprovecharlos.
+    """
+    def __init__(self, parser, literal_types):
+        """
+        Inicializa el analizador.
+        
+        Args:
+            parser (Lark): Parser LALR con el ASTBuilder como transformador
+            literal_types (dict): Literal de la gramática -> tipo de token
+        """
+        self.parser = parser
+        self.markers = literal_types
+        self.segments = None
+        self._moved = []  # Posiciones anteriores de los segmentos movidos
+    
+    def reset(self):
+        """
+        Descarta los segmentos del análisis anterior.
+        """
+        self.segments = None
+    
+    def build(self, ast, code, tokens):
+        """
+        Registra los segmentos de un AST obtenido con un análisis completo.
+        
+        Debe llamarse antes del análisis semántico, que modifica los nodos.
+        
+        Args:
+            ast (ProgramNode): AST recién construido
+            code (str): Código fuente analizado
+            tokens (sequence): Tokens con los que se construyó
+        """
+        self.segments = None
+        try:
+            index = TokenIndex(code, tokens, self.markers)
+            spans = index.split(0, len(index))
+            if len(spans) != len(ast.children):
+                raise ValueError("las sentencias del programa no coinciden con los tokens")
+            self.segments = [self._build_segment(node, index, start, end)
+                             for node, (start, end) in zip(ast.children, spans)]
+        except ValueError as e:
+            _trace.debug("No se pudieron registrar los segmentos: %s", e)
+    
+    def update(self, code, tokens):
+        """
+        Construye el AST de la nueva versión reutilizando los segmentos.
+        
+        Args:
+            code (str): Nueva versión del código fuente
+            tokens (sequence): Tokens de la nueva versión
+        
+        Returns:
+            ProgramNode: AST nuevo, o None si hace falta un análisis completo
+        """
+        if self.segments is None:
+            return None
+        
+        pending = []  # Bloques cuyas sentencias cambian al terminar
+        self._moved = []
+        try:
+            index = TokenIndex(code, tokens, self.markers)
+            segments = self._reconcile(self.segments, index, index.split(0, len(index)),
+                                       False, pending)
+        except Exception as e:
+            # Se devuelven los segmentos a su posición anterior para que la
+            # próxima versión pueda aprovecharlos
+            _trace.debug("Análisis incremental abandonado: %s", e)
+            for segment, start, end, line in reversed(self._moved):
+                segment.start, segment.end, segment.line = start, end, line
+            self._moved = []
+            return None
+        
+        self._moved = []
+        for block, statements in pending:
+            block.statements[:] = statements
+        self.segments = segments
+        
+        ast = ProgramNode()
+        for segment in segments:
+            ast.add_child(segment.node)
+        if segments:
+            set_span(ast, ast.children[0], ast.children[-1])
+        return ast
+    
+    def _reconcile(self, old, index, spans, nested, pending):
+        """
+        Obtiene los segmentos de un contenedor (programa o bloque) nuevo.
+        
+        Args:
+            old (list): Segmentos del contenedor en la versión anterior
+            index (TokenIndex): Tokens de la nueva versión
+            spans (list): Tramos (inicio, fin) de las sentencias nuevas
+            nested (bool): True si el contenedor es un bloque
+            pending (list): Recibe (BlockNode, sentencias) a aplicar al final
+        
+        Returns:
+            list: Segmentos en el orden de `spans`
+        
+        Raises:
+            ValueError: Si una sentencia nueva no produce un único nodo válido
+        """
+        by_signature = {}
+        for segment in reversed(old):
+            by_signature.setdefault(segment.signature, []).append(segment)
+        
+        # Primero, las sentencias cuyo texto no cambió
+        lines = index.lines
+        used = set()
+        result = []
+        for start, end in spans:
+            signature = index.signature(start, end)
+            candidates = by_signature.get(signature)
+            if candidates:
+                segment = candidates.pop()
+                used.add(id(segment))
+                self._relocate(segment, start, lines[start])
+                result.append(segment)
+            else:
+                result.append(signature)
+        
+        # Después, las sentencias compuestas con la misma cabecera y, si no,
+        # un análisis de la sentencia sola
+        by_header = {}
+        for segment in reversed(old):
+            if segment.header is not None and id(segment) not in used:
+                by_header.setdefault(segment.header, []).append(segment)
+        
+        for i, (start, end) in enumerate(spans):
+            signature = result[i]
+            if isinstance(signature, Segment):
+                continue
+            
+            line = lines[start]
+            blocks = index.find_blocks(start, end)
+            candidates = by_header.get(index.header(start, end, blocks)) if blocks else None
+            if candidates:
+                # Se conserva el nodo, pero el segmento anterior no se modifica
+                # por si el análisis incremental se abandona más adelante
+                previous = candidates.pop()
+                segment = Segment(start, end, line, signature, previous.node)
+                segment.header = previous.header
+                segment.own = previous.own
+                self._restore(segment, line)
+                tokens = index.tokens
+                for (block, children), (open_, close) in zip(previous.blocks, blocks):
+                    children = self._reconcile(children, index, index.split(open_ + 1, close),
+                                               True, pending)
+                    segment.blocks.append((block, children))
+                    pending.append((block, [child.node for child in children]))
+                    set_span(block, tokens[open_], tokens[close])
+                
+                # Los bloques pueden haber cambiado de longitud: se actualiza
+                # el final de la sentencia y se registran de nuevo sus nodos
+                statement = segment.node
+                set_span(statement.children[0] if isinstance(statement, Tree) else statement,
+                         tokens[start], tokens[end - 1])
+                segment.own = self._collect(statement, line)
+            else:
+                node = self._parse_span(index.tokens, start, end, nested)
+                segment = self._build_segment(node, index, start, end)
+            result[i] = segment
+        
+        return result
+    
+    def _parse_span(self, tokens, start, end, nested):
+        """
+        Analiza una sola sentencia.
+        
+        Raises:
+            ValueError: Si el tramo no es exactamente una sentencia válida en
+                su contexto
+        """
+        ast = self.parser.parse(tokens[i] for i in range(start, end))
+        if not isinstance(ast, ProgramNode) or len(ast.children) != 1:
+            raise ValueError("el tramo no contiene exactamente una sentencia")
+        
+        node = ast.children[0]
+        if nested and not (isinstance(node, Tree) and node.data == 'sentencia'):
+            raise ValueError("solo se admiten sentencias dentro de un bloque")
+        return node
+    
+    def _build_segment(self, node, index, start, end):
+        """
+        Crea el segmento de una sentencia recién analizada.
+        
+        Raises:
+            ValueError: Si los bloques del nodo no coinciden con los del tramo
+        """
+        line = index.lines[start]
+        segment = Segment(start, end, line, index.signature(start, end), node)
+        
+        blocks = index.find_blocks(start, end)
+        block_nodes = self._get_blocks(node)
+        if len(blocks) != len(block_nodes):
+            raise ValueError("los bloques del nodo no coinciden con los tokens")
+        
+        for block, (open_, close) in zip(block_nodes, blocks):
+            spans = index.split(open_ + 1, close)
+            if len(spans) != len(block.statements):
+                raise ValueError("las sentencias del bloque no coinciden con los tokens")
+            segment.blocks.append((block, [self._build_segment(statement, index, a, b)
+                                           for statement, (a, b) in zip(block.statements, spans)]))
+        
+        if blocks:
+            segment.header = index.header(start, end, blocks)
+        segment.own = self._collect(node, line)
+        return segment
+    
+    def _relocate(self, segment, start, line):
+        """
+        Mueve un segmento reutilizado (y sus bloques) a su nueva posición.
+        """
+        shift = start - segment.start
+        for _, children in segment.blocks:
+            for child in children:
+                self._relocate(child, child.start + shift, line + child.line - segment.line)
+        self._restore(segment, line)
+        self._moved.append((segment, segment.start, segment.end, segment.line))
+        segment.start = start
+        segment.end += shift
+        segment.line = line
+    
+    def _restore(self, segment, line):
+        """
+        Devuelve los nodos propios del segmento a su estado recién construido.
+        """
+        for node, type, value, offset, end_offset in segment.own:
+            node.type = type
+            node.value = value
+            if offset is not None:
+                node.line = line + offset
+            if end_offset is not None:
+                node.end_line = line + end_offset
+    
+    def _collect(self, node, line):
+        """
+        Reúne los nodos de una sentencia, sin entrar en las sentencias de sus bloques.
+        
+        Returns:
+            list: (nodo, tipo, valor, línea relativa o None, línea final
+                relativa o None)
+        """
+        own = []
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, ASTNode):
+                own.append((item, item.type, item.value,
+                            None if item.line is None else item.line - line,
+                            None if item.end_line is None else item.end_line - line))
+                for name, value in iter_fields(item):
+                    if name == 'statements' and isinstance(item, BlockNode):
+                        continue
+                    if isinstance(value, (ASTNode, Tree, list)):
+                        stack.append(value)
+            elif isinstance(item, Tree):
+                stack.extend(item.children)
+            elif isinstance(item, list):
+                stack.extend(item)
+        return own
+    
+    @staticmethod
+    def _get_blocks(node):
+        """
+        Obtiene los bloques de una sentencia, en orden de aparición.
+        """
+        if isinstance(node, Tree) and node.data == 'sentencia' and node.children:
+            node = node.children[0]
+        if isinstance(node, BlockNode):
+            return [node]
+        if isinstance(node, IfNode):
+            return [node.if_body] + ([node.else_body] if node.else_body is not None else [])
+        if isinstance(node, (WhileNode, RepeatNode)):
+            return [node.body]
+        return []
@@ -1,75 +1,646 @@
-from lark import Lark, Token as LarkToken
+import mmap
 import os
-from models.token import Token
+import re
+from concurrent.futures import ProcessPoolExecutor
+from lark.exceptions import UnexpectedCharacters
+from grammar.registry import get_registry
+from models.token import Token, TokenBuffer, MappedToken, TokenDelta
+from models.interner import get_interner
+from models.source_index import SourceIndex
 from models.error import LexicalError, ErrorCollection
 
+# Estado del lexer al inicio de cada línea (análisis incremental)
+LINE_NORMAL = 0      # Fuera de cualquier token (o dentro de espacios)
+LINE_IN_COMMENT = 1  # Dentro de un comentario /* */
+LINE_IN_STRING = 2   # Dentro de una cadena que ocupa varias líneas
+
+# Lexers disponibles para tokenize
+LEXER_BACKENDS = ('lark', 'dfa')
+
+# Tipo de los tokens que cubren caracteres no reconocidos (modo de recuperación)
+ERROR_TOKEN = 'ERROR'
+
+# Tamaño mínimo (en caracteres) para repartir el análisis entre procesos
+PARALLEL_MIN_SIZE = 1 << 20
+
+# Cadenas y comentarios: los únicos tokens que pueden contener un salto de
+# línea además de los espacios (mismas expresiones que en la gramática)
+OPAQUE_PATTERN = re.compile(r'//[^\n]*|/\*.*?\*/|"[^"]*"', re.S)
+
+
+def _tokenize_chunk(chunk, offset, line_offset, kind_names, backend):
+    """
+    Tokeniza un fragmento del código en un proceso del pool.
+    
+    Args:
+        chunk (str): Fragmento que empieza al inicio de una línea
+        offset (int): Posición del fragmento en el código completo
+        line_offset (int): Líneas anteriores al fragmento
+        kind_names (list): Tipos de token con sus identificadores ya asignados
+        backend (str): Lexer a usar
+        
+    Returns:
+        TokenBuffer: Tokens con posiciones del código completo (sin el
+            texto fuente), o None si el fragmento tiene errores léxicos
+    """
+    lexer = LexerController(backend=backend)
+    tokens = TokenBuffer("")
+    for name in kind_names:
+        tokens.get_kind_id(name)
+    
+    try:
+        lexer._lex_into(tokens, chunk, offset, line_offset)
+    except Exception:
+        return None
+    return tokens
+
+
 class LexerController:
     """
     Controlador para el análisis léxico.
     """
-    def __init__(self, error_collection=None):
+    def __init__(self, error_collection=None, backend='lark', interner=None):
         """
         Inicializa el controlador del analizador léxico.
         
         Args:
             error_collection (ErrorCollection, optional): Colección para almacenar errores
+            backend (str, optional): Lexer a usar en `tokenize`: 'lark' (lexer
+                básico de Lark) o 'dfa' (autómata dirigido por tabla)
+            interner (Interner, optional): Tabla de internamiento de
+                identificadores (por defecto, la compartida del proceso)
         """
+        if backend not in LEXER_BACKENDS:
+            raise ValueError(f"Lexer desconocido '{backend}'; opciones: {', '.join(LEXER_BACKENDS)}")
+        
         self.error_collection = error_collection or ErrorCollection()
-        self.tokens = []
+        self.tokens = TokenBuffer("")
+        self.backend = backend
+        self.interner = interner or get_interner()
+        
+        # Usar el lexer compartido del registro de gramática
+        self.registry = get_registry()
         
-        # Construir el analizador léxico usando Lark
-        grammar_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                    'grammar', 'language_grammar.lark')
+        # Caché por líneas para la re-tokenización incremental
+        self._lines = None        # Texto de cada línea
+        self.line_states = None   # Estado del lexer al inicio de cada línea
+        self.line_tokens = None   # Tokens (tipo, valor, columna) que empiezan en cada línea
+        self.line_dangling = None # Líneas con un '/*' sin cerrar (tokenizado como '/' y '*')
         
-        with open(grammar_path, 'r') as f:
-            grammar = f.read()
+        # Pool de procesos para tokenize_parallel (se crea al usarlo)
+        self._pool = None
+        self._pool_workers = None
         
-        # Crear el lexer en modo lexer-only
-        self.lexer = Lark(grammar, parser='lalr', lexer='basic')
+        # Último código analizado y su índice de líneas (se crea al usarlo)
+        self._source = None
+        self._source_index = None
     
-    def tokenize(self, code):
+    def tokenize(self, code, recover=False):
         """
         Realiza el análisis léxico del código fuente.
         
         Args:
             code (str): Código fuente a analizar
+            recover (bool, optional): Si es True, cada secuencia de caracteres
+                no reconocidos se registra como un error y un token ERROR_TOKEN,
+                y el análisis continúa; si es False, se detiene en el primero
             
         Returns:
-            list: Lista de tokens encontrados
+            TokenBuffer: Tokens encontrados (secuencia de vistas Token)
         """
         # Limpiar tokens y errores previos
-        self.tokens = []
+        self.tokens = TokenBuffer(code)
         self.error_collection.lexical_errors.clear()
+        self._set_source(code)
         
         try:
-            # Usar Lark para tokenizar
-            lark_tokens = self.lexer.lex(code)
-            
-            # Convertir tokens de Lark a nuestro formato
-            for lark_token in lark_tokens:
-                if isinstance(lark_token, LarkToken):
-                    # Crear un token con nuestro formato
-                    token = Token(
-                        type=lark_token.type,
-                        value=lark_token.value,
-                        line=lark_token.line,
-                        column=lark_token.column
-                    )
-                    self.tokens.append(token)
+            if recover:
+                self._lex_recovering(self.tokens, code)
+            else:
+                self._lex_into(self.tokens, code)
         
         except Exception as e:
             # Capturar errores léxicos
             error = LexicalError(str(e))
             self.error_collection.add_error(error)
         
+        # Numerar los identificadores con la tabla de internamiento
+        self.tokens.intern_identifiers(self.interner)
         return self.tokens
     
+    def _lex_into(self, tokens, code, offset=0, line_offset=0, start=0, line=1, column=1, classes=None):
+        """
+        Tokeniza el código guardando solo las posiciones de cada token.
+        
+        Args:
+            tokens (TokenBuffer): Buffer donde añadir los tokens
+            code (str): Código fuente (o un fragmento que empieza en una línea)
+            offset (int, optional): Desplazamiento a sumar a las posiciones
+            line_offset (int, optional): Líneas a sumar a los números de línea
+            start (int, optional): Posición desde la que continuar
+            line (int, optional): Línea de la posición inicial
+            column (int, optional): Columna de la posición inicial
+            classes (bytes, optional): Clases de los caracteres del código
+                para el lexer DFA (ver DFALexer.classify)
+            
+        Raises:
+            UnexpectedCharacters: Si se encuentra un carácter inválido
+        """
+        append = tokens.append
+        if self.backend == 'dfa':
+            for type, start, end, line, column in self.registry.get_dfa_lexer().scan(code, start, line, column, classes):
+                append(type, start + offset, end + offset, line + line_offset, column)
+        else:
+            for lark_token in self.registry.lex(code, start, line, column):
+                append(lark_token.type, lark_token.start_pos + offset, lark_token.end_pos + offset,
+                       lark_token.line + line_offset, lark_token.column)
+    
+    def _lex_recovering(self, tokens, code):
+        """
+        Tokeniza el código continuando tras cada carácter no reconocido.
+        
+        Los caracteres se analizan con el lexer normal; solo al encontrar un
+        error se busca la siguiente posición en la que empieza un token, se
+        registra el error y se reanuda el análisis desde ahí.
+        
+        Args:
+            tokens (TokenBuffer): Buffer donde añadir los tokens
+            code (str): Código fuente
+        """
+        search = self.registry.get_terminal_spec().compile().search
+        start, line, column = 0, 1, 1
+        
+        # Las clases de los caracteres se calculan una vez para todo el
+        # código, no en cada reanudación
+        classes = self.registry.get_dfa_lexer().classify(code) if self.backend == 'dfa' else None
+        
+        while True:
+            try:
+                self._lex_into(tokens, code, start=start, line=line, column=column, classes=classes)
+                return
+            except UnexpectedCharacters as e:
+                pos, line, column = e.pos_in_stream, e.line, e.column
+            
+            # Los saltos de línea siempre forman un token, así que la
+            # secuencia no reconocida está en una sola línea
+            m = search(code, pos + 1)
+            start = m.start() if m else len(code)
+            run = code[pos:start]
+            if len(run) == 1:
+                message = f"Carácter no reconocido '{run}'"
+            else:
+                message = f"Caracteres no reconocidos '{run}'"
+            self.error_collection.add_error(LexicalError(message, line, column))
+            tokens.append(ERROR_TOKEN, pos, start, line, column)
+            column += len(run)
+    
+    def tokenize_parallel(self, code, workers=None):
+        """
+        Realiza el análisis léxico repartiendo el código entre varios procesos.
+        
+        El código se divide en fragmentos al inicio de líneas que quedan fuera
+        de cadenas y comentarios, cada fragmento se tokeniza en un proceso y
+        los resultados se unen corrigiendo posiciones y líneas. Los códigos
+        pequeños (menos de PARALLEL_MIN_SIZE caracteres) se tokenizan en el
+        proceso actual. Si algún fragmento tiene errores, se repite el
+        análisis secuencial para reportarlos igual que `tokenize`.
+        
+        Args:
+            code (str): Código fuente a analizar
+            workers (int, optional): Número de procesos (por defecto, uno por CPU)
+            
+        Returns:
+            TokenBuffer: Tokens encontrados (secuencia de vistas Token)
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers < 2 or len(code) < PARALLEL_MIN_SIZE:
+            return self.tokenize(code)
+        
+        bounds = self._split_chunks(code, workers)
+        if len(bounds) < 3:
+            return self.tokenize(code)
+        
+        # Tipos de token con el mismo identificador en todos los fragmentos
+        kind_names = [terminal.name for terminal in self.registry.get_lexer().terminals]
+        
+        # Los cortes están al inicio de una línea: su línea sale del índice
+        self._set_source(code)
+        position = self.get_source_index().position
+        chunks, offsets, line_offsets = [], [], []
+        for start, end in zip(bounds, bounds[1:]):
+            chunks.append(code[start:end])
+            offsets.append(start)
+            line_offsets.append(position(start)[0] - 1)
+        
+        count = len(chunks)
+        results = self._get_pool(workers).map(
+            _tokenize_chunk, chunks, offsets, line_offsets,
+            [kind_names] * count, [self.backend] * count)
+        
+        self.tokens = TokenBuffer(code)
+        self.error_collection.lexical_errors.clear()
+        for name in kind_names:
+            self.tokens.get_kind_id(name)
+        
+        for chunk_tokens in results:
+            if chunk_tokens is None:
+                return self.tokenize(code)
+            self.tokens.extend(chunk_tokens)
+        
+        self.tokens.intern_identifiers(self.interner)
+        return self.tokens
+    
+    def _split_chunks(self, code, count):
+        """
+        Elige los puntos de corte para dividir el código en fragmentos.
+        
+        Cada corte está justo después de un salto de línea que no pertenece
+        a una cadena ni a un comentario /* */, así que cae dentro de los
+        espacios ignorados y no cambia los tokens.
+        
+        Args:
+            code (str): Código fuente
+            count (int): Número aproximado de fragmentos
+            
+        Returns:
+            list: Posiciones de corte, empezando en 0 y terminando en len(code)
+        """
+        step = max(len(code) // count, 1)
+        bounds = [0]
+        target = step
+        
+        for m in OPAQUE_PATTERN.finditer(code):
+            start, end = m.span()
+            while target < start:
+                newline = code.find('\n', target, start)
+                if newline < 0:
+                    break
+                bounds.append(newline + 1)
+                target = newline + 1 + step
+            target = max(target, end)
+        
+        while target < len(code):
+            newline = code.find('\n', target)
+            if newline < 0:
+                break
+            bounds.append(newline + 1)
+            target = newline + 1 + step
+        
+        if bounds[-1] < len(code):
+            bounds.append(len(code))
+        return bounds
+    
+    def _get_pool(self, workers):
+        """
+        Obtiene el pool de procesos, creándolo si hace falta.
+        
+        Args:
+            workers (int): Número de procesos
+            
+        Returns:
+            ProcessPoolExecutor: Pool reutilizable entre llamadas
+        """
+        if self._pool is None or self._pool_workers != workers:
+            self.close()
+            self._pool = ProcessPoolExecutor(max_workers=workers)
+            self._pool_workers = workers
+        return self._pool
+    
+    def close(self):
+        """
+        Libera el pool de procesos de tokenize_parallel, si existe.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+            self._pool_workers = None
+    
+    def tokenize_file(self, path):
+        """
+        Realiza el análisis léxico de un archivo sin cargarlo completo en memoria.
+        
+        El archivo se mapea en memoria y se recorre como bytes; los tokens se
+        generan uno a uno, con desplazamientos en bytes y línea/columna, y su
+        valor solo se decodifica al consultarlo. Los errores léxicos se
+        registran en la colección de errores y detienen el recorrido.
+        
+        Args:
+            path (str): Ruta del archivo fuente (UTF-8)
+            
+        Returns:
+            generator: Tokens (MappedToken) en orden
+        """
+        self.error_collection.lexical_errors.clear()
+        self._set_source(None)
+        
+        with open(path, 'rb') as f:
+            # mmap no admite archivos vacíos
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield from self._scan_bytes(data)
+    
+    def _scan_bytes(self, data):
+        """
+        Recorre un buffer de bytes generando tokens.
+        
+        Args:
+            data (bytes | mmap.mmap): Código fuente codificado en UTF-8
+            
+        Returns:
+            generator: Tokens (MappedToken) en orden
+        """
+        spec = self.registry.get_terminal_spec()
+        match = spec.compile(use_bytes=True).match
+        keywords = spec.get_keywords(use_bytes=True)
+        ignore_types = spec.ignore_types
+        newline_types = spec.newline_types
+        
+        pos = 0
+        end = len(data)
+        line = 1
+        column = 1
+        
+        while pos < end:
+            m = match(data, pos)
+            if m is None:
+                char = data[pos:pos + 4].decode('utf-8', 'replace')[:1]
+                error = LexicalError(f"Carácter no reconocido '{char}'", line, column)
+                self.error_collection.add_error(error)
+                return
+            
+            type = m.lastgroup
+            raw = m.group()
+            next_pos = m.end()
+            
+            if type not in ignore_types:
+                words = keywords.get(type)
+                token_type = words.get(raw, type) if words else type
+                yield MappedToken(token_type, raw, pos, next_pos, line, column)
+            
+            # Avanzar línea y columna (en caracteres, no en bytes)
+            newline = raw.rfind(b'\n') if type in newline_types else -1
+            if newline >= 0:
+                line += raw.count(b'\n')
+                tail = raw[newline + 1:]
+                column = (len(tail) if tail.isascii() else len(tail.decode('utf-8', 'replace'))) + 1
+            else:
+                column += len(raw) if raw.isascii() else len(raw.decode('utf-8', 'replace'))
+            
+            pos = next_pos
+    
+    def retokenize(self, code, start_line=None):
+        """
+        Re-tokeniza el código de forma incremental tras una edición.
+        
+        Solo se analiza desde la primera línea modificada (o la anterior más
+        cercana que empiece fuera de un comentario o cadena) hasta que, pasada
+        la zona editada, el estado al inicio de una línea coincide con el de
+        la versión anterior; el resto de tokens se reutiliza de la caché.
+        La primera llamada tokeniza todo el código.
+        
+        Args:
+            code (str): Código fuente completo tras la edición
+            start_line (int, optional): Primera línea modificada (desde 1),
+                si el llamador la conoce; evita comparar las líneas iniciales
+            
+        Returns:
+            TokenDelta: Tokens eliminados e insertados
+        """
+        self.error_collection.lexical_errors.clear()
+        self._set_source(code)
+        new_lines = code.split('\n')
+        old_lines = self._lines
+        
+        if old_lines is None:
+            old_lines = []
+            self.line_states = bytearray()
+            self.line_tokens = []
+            self.line_dangling = bytearray()
+            first = 0
+            new_end = len(new_lines)
+        else:
+            # Primera línea distinta
+            limit = min(len(old_lines), len(new_lines))
+            first = 0 if start_line is None else min(max(start_line - 1, 0), limit)
+            while first < limit and old_lines[first] == new_lines[first]:
+                first += 1
+            if first == len(old_lines) == len(new_lines):
+                return TokenDelta(first + 1, first + 1, first + 1, [], [])
+            
+            # Retroceder hasta una línea que empiece fuera de un token
+            first = min(first, limit - 1)
+            while first > 0 and self.line_states[first] != LINE_NORMAL:
+                first -= 1
+            
+            # Líneas finales sin cambios
+            suffix = 0
+            limit -= first
+            while suffix < limit and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+                suffix += 1
+            new_end = len(new_lines) - suffix
+            
+            # Un '*/' nuevo puede cerrar un '/*' anterior que no tenía cierre
+            dangling = self.line_dangling.find(1, 0, first)
+            if dangling >= 0 and any('*/' in line for line in new_lines[first:new_end]):
+                first = dangling
+                while first > 0 and self.line_states[first] != LINE_NORMAL:
+                    first -= 1
+        
+        line_delta = len(new_lines) - len(old_lines)
+        offset = self.get_source_index().line_start(first + 1)
+        states, line_tokens, dangling, error = self._scan_lines(code, offset, first, new_end, line_delta)
+        resync = first + len(states)
+        old_resync = resync - line_delta
+        
+        removed = [token for line in range(first, old_resync)
+                   for token in self._make_line_tokens(self.line_tokens[line], line)]
+        inserted = [token for index, entries in enumerate(line_tokens)
+                    for token in self._make_line_tokens(entries, first + index)]
+        
+        if error is not None:
+            # Sin un estado coherente, la próxima llamada re-tokeniza todo
+            self.error_collection.add_error(error)
+            self._lines = None
+        else:
+            self._lines = new_lines
+            self.line_states[first:old_resync] = bytes(states)
+            self.line_tokens[first:old_resync] = line_tokens
+            self.line_dangling[first:old_resync] = dangling
+        
+        return TokenDelta(first + 1, old_resync + 1, resync + 1, removed, inserted)
+    
+    def _scan_lines(self, code, offset, first, new_end, line_delta):
+        """
+        Tokeniza desde el inicio de una línea hasta resincronizar con la caché.
+        
+        Args:
+            code (str): Código fuente completo
+            offset (int): Posición de inicio de la línea `first`
+            first (int): Índice (desde 0) de la primera línea a analizar
+            new_end (int): Índice de la primera línea sin cambios al final
+            line_delta (int): Diferencia de número de líneas con la versión anterior
+            
+        Returns:
+            tuple: (estados por línea, tokens por línea, marcas de '/*' sin
+                cerrar por línea, LexicalError o None)
+        """
+        spec = self.registry.get_terminal_spec()
+        match = spec.compile().match
+        keywords = spec.get_keywords()
+        ignore_types = spec.ignore_types
+        old_states = self.line_states
+        
+        states = [LINE_NORMAL]
+        line_tokens = [[]]
+        dangling = bytearray(1)
+        slash_end = -1
+        slash_line = 0
+        line = first
+        line_start = offset
+        end = len(code)
+        next_line_start = code.find('\n', offset) + 1 or end + 1
+        pos = offset
+        
+        while pos < end:
+            m = match(code, pos)
+            if m is None:
+                error = LexicalError(f"Carácter no reconocido '{code[pos]}'",
+                                     line + 1, pos - line_start + 1)
+                return states, line_tokens, dangling, error
+            
+            type = m.lastgroup
+            raw = m.group()
+            next_pos = m.end()
+            token_line = len(line_tokens) - 1
+            column = pos - line_start + 1
+            
+            # Registrar el estado de cada inicio de línea que cae en este token
+            while next_line_start < next_pos:
+                line += 1
+                if next_line_start == pos:
+                    state = LINE_NORMAL
+                    token_line, column = len(line_tokens), 1
+                elif raw.isspace():
+                    state = LINE_NORMAL
+                elif type in ignore_types:
+                    state = LINE_IN_COMMENT
+                else:
+                    state = LINE_IN_STRING
+                
+                # Pasada la zona editada, el resto coincide con la versión anterior
+                old_line = line - line_delta
+                if (state == LINE_NORMAL and line >= new_end and old_line < len(old_states)
+                        and old_states[old_line] == LINE_NORMAL):
+                    return states, line_tokens, dangling, None
+                
+                states.append(state)
+                line_tokens.append([])
+                dangling.append(0)
+                line_start = next_line_start
+                next_line_start = code.find('\n', next_line_start) + 1 or end + 1
+            
+            if type not in ignore_types:
+                words = keywords.get(type)
+                if words:
+                    type = words.get(raw, type)
+                line_tokens[token_line].append((type, raw, column))
+                
+                # '/*' sin cierre: el lexer lo separa en '/' y '*'
+                if raw == '/':
+                    slash_end, slash_line = next_pos, token_line
+                elif raw == '*' and pos == slash_end:
+                    dangling[slash_line] = 1
+            
+            pos = next_pos
+        
+        # Líneas restantes (por ejemplo, la línea vacía tras un salto final)
+        while next_line_start <= end:
+            states.append(LINE_NORMAL)
+            line_tokens.append([])
+            dangling.append(0)
+            next_line_start = code.find('\n', next_line_start) + 1 or end + 1
+        
+        return states, line_tokens, dangling, None
+    
+    def _make_line_tokens(self, entries, line):
+        """
+        Materializa los tokens cacheados de una línea.
+        
+        Args:
+            entries (list): Tuplas (tipo, valor, columna) de la línea
+            line (int): Índice (desde 0) de la línea
+            
+        Returns:
+            list: Tokens de la línea
+        """
+        tokens = []
+        for type, value, column in entries:
+            newline = value.rfind('\n')
+            if newline < 0:
+                end_line, end_column = line + 1, column + len(value)
+            else:
+                end_line, end_column = line + 1 + value.count('\n'), len(value) - newline
+            tokens.append(Token(type, value, line + 1, column,
+                                end_line=end_line, end_column=end_column))
+        return tokens
+    
+    def get_line_tokens(self, line):
+        """
+        Obtiene los tokens cacheados que empiezan en una línea.
+        
+        Args:
+            line (int): Número de línea (desde 1)
+            
+        Returns:
+            list: Tokens de la línea (vacía si no hay caché)
+        """
+        if self._lines is None or not 0 < line <= len(self.line_tokens):
+            return []
+        return self._make_line_tokens(self.line_tokens[line - 1], line - 1)
+    
+    def get_cached_tokens(self):
+        """
+        Obtiene todos los tokens de la caché incremental.
+        
+        Returns:
+            list: Tokens en orden
+        """
+        if self._lines is None:
+            return []
+        return [token for line, entries in enumerate(self.line_tokens)
+                for token in self._make_line_tokens(entries, line)]
+    
+    def _set_source(self, code):
+        """
+        Registra el código que se va a analizar y descarta el índice anterior.
+        """
+        if code is not self._source:
+            self._source = code
+            self._source_index = None
+    
+    def get_source_index(self):
+        """
+        Obtiene el índice de líneas del último código analizado.
+        
+        El índice se construye una vez por versión del código y se comparte
+        con el formato de los errores y el resaltado del editor.
+        
+        Returns:
+            SourceIndex: Índice del código, o None si no se ha analizado nada
+                (o el último análisis fue de un archivo con tokenize_file)
+        """
+        if self._source_index is None and self._source is not None:
+            self._source_index = SourceIndex(self._source)
+        return self._source_index
+    
     def get_tokens(self):
         """
         Obtiene los tokens generados.
         
         Returns:
-            list: Lista de tokens
+            TokenBuffer: Tokens del último análisis
         """
         return self.tokens
     
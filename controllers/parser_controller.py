@@ -1,12 +1,143 @@
-from lark import Lark, Transformer, v_args
-import os
+from lark import Transformer, Token as LarkToken, v_args
+from functools import partial
+from lark.exceptions import UnexpectedToken
+from grammar.registry import get_registry
 from models.ast_nodes import *
+from controllers.expression_parser import ExpressionParser
+from controllers.incremental_parser import IncrementalParser
+from controllers.syntax_validator import SyntaxValidator
+from models.interner import get_interner
+from models.node_cache import NodeCache, PositionTable
+from models.span_index import SpanIndex
+from models.token import Token, TokenBuffer
 from models.error import SyntaxError, ErrorCollection
+from utils.tracing import get_tracer
+
+_trace = get_tracer('parser')
+
+# Terminal de las sentencias descartadas en el modo de recuperación
+ERROR_TERMINAL = 'ERROR_SINTACTICO'
+
+# Terminal de los bloques cuyo contenido se analiza al usarlo (lazy_blocks)
+DEFERRED_BLOCK_TERMINAL = 'BLOQUE_DIFERIDO'
 
 class ASTBuilder(Transformer):
     """
     Transformador de Lark para construir el AST a partir del árbol de análisis.
     """
+    # Nodos que comparte el modo de hash-consing (parse(hash_cons=True)).
+    # Es un atributo de la clase porque el parser autónomo solo copia la clase
+    SHARED_NODE_TYPES = (NumberNode, StringNode, VariableNode, BinaryOpNode)
+    
+    def __init__(self, interner=None):
+        """
+        Inicializa el transformador.
+        
+        Args:
+            interner (Interner, optional): Tabla de internamiento de
+                identificadores (por defecto, la compartida del proceso)
+        """
+        super().__init__()
+        self.interner = interner or get_interner()
+        self.expression_parser = ExpressionParser()
+        
+        # Modo de hash-consing (ver share_nodes); desactivado por defecto
+        self.node_cache = None
+        self.positions = None
+        self._pending = []  # Línea y columna de las hojas aún sin sentencia
+    
+    def share_nodes(self, node_cache, positions=None):
+        """
+        Activa o desactiva el modo de hash-consing.
+        
+        Con una NodeCache, los literales, las variables y las operaciones
+        binarias se obtienen de la tabla en lugar de crearse, así que las
+        expresiones estructuralmente iguales son el mismo objeto; la
+        posición de cada aparición se registra en `positions`.
+        
+        Args:
+            node_cache (NodeCache): Tabla de nodos compartidos, o None para
+                volver a crear nodos nuevos
+            positions (PositionTable, optional): Tabla donde registrar las
+                posiciones de cada aparición
+        """
+        self.node_cache = node_cache
+        self.positions = positions if node_cache is not None else None
+        self._pending = []
+        if node_cache is not None:
+            self.expression_parser = ExpressionParser(node_factory=node_cache.binary_op)
+        else:
+            self.expression_parser = ExpressionParser()
+    
+    def discard(self, value):
+        """
+        Olvida las posiciones pendientes de un valor que el parser descarta.
+        
+        La recuperación de errores quita de la pila del parser los valores de
+        la sentencia errónea; si entre ellos hay expresiones compartidas, sus
+        hojas ya no pertenecen a ninguna sentencia.
+        
+        Args:
+            value: Valor quitado de la pila del parser
+        """
+        if self.node_cache is not None and isinstance(value, self.SHARED_NODE_TYPES):
+            del self._pending[-2 * self.node_cache.leaf_count(value):]
+    
+    def _share(self, node, token):
+        """
+        Apila la posición de una aparición de una hoja compartida.
+        
+        El nodo no guarda posición ni extensión: aparece en varios sitios y
+        las posiciones de cada aparición quedan en la tabla de posiciones.
+        
+        Args:
+            node (ASTNode): Nodo compartido
+            token (Token): Token de esta aparición
+        
+        Returns:
+            ASTNode: El mismo nodo
+        """
+        self._pending += (token.line, token.column)
+        return node
+    
+    def _record(self, node, *fields):
+        """
+        Registra las posiciones de las expresiones de una sentencia.
+        
+        Las hojas se apilan al crearse, en el orden del código, así que las
+        de la última expresión de la sentencia están en la cima.
+        
+        Args:
+            node (ASTNode): Sentencia recién creada
+            *fields (str): Campos de la sentencia con expresiones, en orden
+        
+        Returns:
+            ASTNode: La misma sentencia
+        """
+        pending = self._pending
+        for field in reversed(fields):
+            count = 2 * self.node_cache.leaf_count(getattr(node, field))
+            self.positions.add(node, field, pending[-count:])
+            del pending[-count:]
+        return node
+    
+    def _intern(self, token):
+        """
+        Obtiene el número de símbolo y el nombre compartido de un identificador.
+        
+        Los tokens del LexerController ya traen el número asignado; los del
+        lexer de Lark se internan aquí.
+        
+        Args:
+            token (Token): Token IDENTIFICADOR
+        
+        Returns:
+            tuple: (número de símbolo, nombre internado)
+        """
+        symbol_id = getattr(token, 'symbol_id', None)
+        if symbol_id is None:
+            symbol_id = self.interner.intern(token.value)
+        return symbol_id, self.interner.get_name(symbol_id)
     
     @v_args(inline=True)
     def start(self, programa):
@@ -28,28 +159,32 @@ class ASTBuilder(Transformer):
             if statement:  # Ignorar None
                 programa_node.add_child(statement)
         
+        if programa_node.children:
+            set_span(programa_node, programa_node.children[0], programa_node.children[-1])
         return programa_node
     
     @v_args(inline=True)
-    def declaracion(self, tipo, identificador_lista):
+    def declaracion(self, tipo, identificador_lista, punto_coma):
         """
         Crear nodo de declaración con tipo y lista de identificadores.
         """
-        node = DeclarationNode(tipo)
+        var_type, tipo_token = tipo
+        node = DeclarationNode(var_type)
         node.add_child(identificador_lista)
-        return node
+        return set_span(node, tipo_token, punto_coma)
     
+    # Los tipos devuelven su nombre y su token (inicio de la declaración)
     @v_args(inline=True)
-    def tipo_entero(self):
-        return "ent"
+    def tipo_entero(self, token):
+        return "ent", token
     
     @v_args(inline=True)
-    def tipo_decimal(self):
-        return "dec"
+    def tipo_decimal(self, token):
+        return "dec", token
     
     @v_args(inline=True)
-    def tipo_cadena(self):
-        return "cadena"
+    def tipo_cadena(self, token):
+        return "cadena", token
     
     @v_args(inline=True)
     def identificador_lista(self, *identificadores):
@@ -64,207 +199,112 @@ class ASTBuilder(Transformer):
                 node.identifiers.append(identificador.name)
                 node.add_child(identificador)
         
+        if node.children:
+            set_span(node, node.children[0], node.children[-1])
         return node
-
-    @v_args(inline=True)
-    def expr_suma(self, left, right):
-        print(f"DEBUG - Creando SUMA explícita: {left} + {right}")
-        return BinaryOpNode("+", left, right)
-
-    @v_args(inline=True)
-    def expr_resta(self, left, right):
-        print(f"DEBUG - Creando RESTA explícita: {left} - {right}")
-        return BinaryOpNode("-", left, right)    
-        
-    @v_args(inline=True)
-    def expr_mult(self, left, right):
-        print(f"DEBUG - Creando multi explícita: {left} + {right}")
-        return BinaryOpNode("*", left, right)
-
-    @v_args(inline=True)
-    def expr_division(self, left, right):
-        print(f"DEBUG - Creando division explícita: {left} - {right}")
-        return BinaryOpNode("/", left, right)   
     
     @v_args(inline=True)
     def identificador(self, id_token):
         """
         Crear nodo de identificador.
         """
-        return IdentifierNode(id_token.value, id_token.line, id_token.column)
+        symbol_id, name = self._intern(id_token)
+        node = IdentifierNode(name, id_token.line, id_token.column, symbol_id)
+        return set_span(node, id_token, id_token)
     
     @v_args(inline=True)
-    def asignacion(self, variable, expresion):
+    def asignacion(self, variable, igual, expresion, punto_coma):
         """
         Crear nodo de asignación.
         """
-        return AssignmentNode(variable, expresion)
+        node = set_span(AssignmentNode(variable, expresion), variable, punto_coma)
+        if self.node_cache is not None:
+            self._record(node, 'identifier', 'expression')
+            # La variable es compartida: el inicio es el de esta aparición
+            _, node.line, node.column = self.positions.get(node, 'identifier')[0]
+        return node
     
     @v_args(inline=True)
-    def condicional(self, condicion, bloque_if, bloque_else=None):
+    def condicional(self, si, abre, condicion, cierra, bloque_if, o_no=None, bloque_else=None):
         """
         Crear nodo de condicional.
         """
-        return IfNode(condicion, bloque_if, bloque_else)
+        node = IfNode(condicion, bloque_if, bloque_else)
+        if self.node_cache is not None:
+            self._record(node, 'condition')
+        return set_span(node, si, bloque_else or bloque_if)
     
     @v_args(inline=True)
-    def bucle_mientras(self, condicion, bloque):
+    def bucle_mientras(self, mientras, abre, condicion, cierra, bloque):
         """
         Crear nodo de bucle mientras.
         """
-        return WhileNode(condicion, bloque)
+        node = WhileNode(condicion, bloque)
+        if self.node_cache is not None:
+            self._record(node, 'condition')
+        return set_span(node, mientras, bloque)
     
     @v_args(inline=True)
-    def bucle_repetir(self, count, bloque):
+    def bucle_repetir(self, repetir, abre, count, cierra, bloque):
         """
         Crear nodo de bucle repetir.
         """
-        return RepeatNode(count, bloque)
+        node = RepeatNode(count, bloque)
+        if self.node_cache is not None:
+            self._record(node, 'count')
+        return set_span(node, repetir, bloque)
     
     @v_args(inline=True)
-    def impresion(self, expr):
+    def impresion(self, sout, abre, expr, cierra, punto_coma):
         """
         Crear nodo de impresión.
         """
-        return PrintNode(expr)
+        node = PrintNode(expr)
+        if self.node_cache is not None:
+            self._record(node, 'expression')
+        return set_span(node, sout, punto_coma)
     
     @v_args(inline=True)
-    def entrada(self, variable):
+    def entrada(self, scan, abre, variable, cierra, punto_coma):
         """
         Crear nodo de entrada.
         """
-        return InputNode(variable)
+        node = InputNode(variable)
+        if self.node_cache is not None:
+            self._record(node, 'variable')
+        return set_span(node, scan, punto_coma)
     
     @v_args(inline=True)
-    def bloque(self, *statements):
+    def bloque(self, abre, *statements):
         """
         Crear nodo de bloque.
         """
+        # El último elemento es la '}'
         node = BlockNode()
-        for statement in statements:
+        for statement in statements[:-1]:
             if statement:  # Ignorar None
                 node.add_statement(statement)
-        return node
+        return set_span(node, abre, statements[-1])
     
     @v_args(inline=True)
-    def expr_logica(self, expr, *args):
+    def bloque_diferido(self, block_token):
         """
-        Crear nodo de expresión lógica.
-        """
-        if not args:
-            return expr
-        
-        result = expr
-        for i in range(0, len(args), 2):
-            if i+1 < len(args):
-                operator = args[i].value if hasattr(args[i], 'value') else args[i]
-                right_expr = args[i+1]
-                result = BinaryOpNode(operator, result, right_expr)
-        
-        return result
-    
-    @v_args(inline=True)
-    def expr_relacional(self, expr, *args):
-        print(f"DEBUG expr_relacional: expr={expr}, args={args}")
+        Crear nodo de bloque cuyas instrucciones se construyen al usarlas.
         
-        if not args:
-            return expr
-        
-        # Caso especial para cuando tenemos dos operandos sin operador explícito
-        if len(args) == 1 and hasattr(args[0], 'name'):
-            # Estamos ante un caso como 'x > y' donde falta el operador
-            print(f"Caso especial: creando BinaryOpNode para comparación de {expr.name if hasattr(expr, 'name') else expr} > {args[0].name if hasattr(args[0], 'name') else args[0]}")
-            # Asumimos '>' como operador por defecto (ajusta según sea necesario)
-            result = BinaryOpNode('>', expr, args[0])
-            # Establecer el tipo explícitamente como bool
-            result.type = 'bool'
-            return result
-        
-        # Código original para el caso normal
-        result = expr
-        for i in range(0, len(args), 2):
-            if i+1 < len(args):
-                operator = args[i]
-                if hasattr(operator, 'value'):
-                    operator = operator.value
-                right_expr = args[i+1]
-                print(f"Creando BinaryOpNode: {result} {operator} {right_expr}")
-                result = BinaryOpNode(operator, result, right_expr)
-                # Establecer tipo bool para operadores relacionales
-                if operator in ('==', '!=', '>', '<', '>=', '<='):
-                    result.type = 'bool'
-        
-        return result
-    
-    @v_args(inline=True)
-    def expr_aritmetica(self, term, *args):
-        """
-        Crear nodo de expresión aritmética.
+        El token abarca el bloque completo, de la '{' a la '}'.
         """
-        if not args:
-            return term
-        
-        result = term
-        for i in range(0, len(args), 2):
-            if i+1 < len(args):
-                operator = args[i].value if hasattr(args[i], 'value') else args[i]
-                right_term = args[i+1]
-                result = BinaryOpNode(operator, result, right_term)
-        
-        return result
+        return set_span(BlockNode(loader=block_token.value), block_token, block_token)
     
     @v_args(inline=True)
-    def termino(self, factor, *args):
+    def sentencia_erronea(self, error_token):
         """
-        Crear nodo de término.
-        """
-        if not args:
-            return factor
-        
-        result = factor
-        for i in range(0, len(args), 2):
-            if i+1 < len(args):
-                operator = args[i].value if hasattr(args[i], 'value') else args[i]
-                right_factor = args[i+1]
-                result = BinaryOpNode(operator, result, right_factor)
+        Crear nodo de error para una sentencia descartada.
         
-        return result
-
-    @v_args(inline=True)
-    def op_igual(self, left, right):
-        node = BinaryOpNode("==", left, right)
-        node.type = "bool"
-        return node
-
-    @v_args(inline=True)
-    def op_distinto(self, left, right):
-        node = BinaryOpNode("!=", left, right)
-        node.type = "bool"
-        return node
-
-    @v_args(inline=True)
-    def op_mayor(self, left, right):
-        node = BinaryOpNode(">", left, right)
-        node.type = "bool"
-        return node
-
-    @v_args(inline=True)
-    def op_menor(self, left, right):
-        node = BinaryOpNode("<", left, right)
-        node.type = "bool"
-        return node
-
-    @v_args(inline=True)
-    def op_mayor_igual(self, left, right):
-        node = BinaryOpNode(">=", left, right)
-        node.type = "bool"
-        return node
-
-    @v_args(inline=True)
-    def op_menor_igual(self, left, right):
-        node = BinaryOpNode("<=", left, right)
-        node.type = "bool"
-        return node
+        El token abarca los tokens omitidos de la sentencia.
+        """
+        node = ErrorNode(error_token.value, error_token.line, error_token.column)
+        return set_span(node, error_token, error_token)
+    
     @v_args(inline=True)
     def factor(self, value):
         """
@@ -272,180 +312,39 @@ class ASTBuilder(Transformer):
         """
         return value
     
-    @v_args(inline=True)
-    def operador_logico(self, op):
-        """
-        Extraer operador lógico.
-        """
-        return op.value if hasattr(op, 'value') else str(op)
-    
-    @v_args(inline=True)
-    def operador_relacional(self, op):
-        """
-        Extraer operador relacional.
-        """
-        return op.value if hasattr(op, 'value') else str(op)
-    
-# Este fragmento es para el ASTBuilder en parser_controller.py
-
-    @v_args(inline=True)
-    def operador_suma(self, op):
-        """
-        Extraer operador de suma o resta.
-        """
-        if op is None:
-            return "+"  # Valor por defecto
-        
-        # Obtener el valor real del operador
-        if hasattr(op, 'value'):
-            result = op.value
-        else:
-            result = str(op)
-        
-        print(f"DEBUG - Operador extraído: '{result}' - Tipo: {type(op)}")
-        return result
-    
-    
-    @v_args(inline=True)
-    def operador_mult(self, op=None):
-        """
-        Extraer operador de multiplicación o división.
-        """
-        print(f"DEBUG - Procesando operador_mult: {op}")
-        
-        # Si no se proporciona operador, usar * por defecto
-        if op is None:
-            print(f"DEBUG - No se proporcionó operador, usando '*' por defecto")
-            return "*"
-        
-        # Si el operador es un Tree, intentar extraer su valor
-        import lark
-        if isinstance(op, lark.Tree):
-            # Comprobar si hay un Token en el Tree que podamos usar
-            if op.children and hasattr(op.children[0], 'value'):
-                operator_value = op.children[0].value
-                print(f"DEBUG - Extrayendo valor del hijo del Tree: {operator_value}")
-                return operator_value
-            else:
-                # Si no encontramos valor, usamos el data del Tree para determinar el operador
-                print(f"DEBUG - Usando data del Tree: {op.data}")
-                if op.data == 'operador_mult':
-                    return "*" 
-                elif op.data == 'expr_division' or op.data == 'operador_div' or "div" in op.data:
-                    return "/"
-        
-        # Si es un Token o tiene un atributo value
-        if hasattr(op, 'value'):
-            # Verificar explícitamente si es un operador de división
-            value = op.value
-            if value == '/':
-                print(f"DEBUG - Encontrado operador de división explícito: {value}")
-                return "/"
-            return value
-        
-        # Si es una cadena directamente
-        if isinstance(op, str):
-            # Verificar explícitamente si es un operador de división
-            if op == '/':
-                print(f"DEBUG - Encontrado operador de división como cadena: {op}")
-                return "/"
-            return op
-        
-        # Si todo falla, asumimos "*" por defecto
-        print(f"DEBUG - No se pudo extraer operador, usando '*' por defecto")
-        return "*"
-    @v_args(inline=True)
-    def expr_aritmetica(self, term, *args):
-        """
-        Crear nodo de expresión aritmética.
-        """
-        if not args:
-            return term
-        
-        result = term
-        for i in range(0, len(args), 2):
-            if i+1 < len(args):
-                # Obtener el operador real (+ o -)
-                if hasattr(args[i], 'value'):
-                    operator = args[i].value
-                else:
-                    operator = str(args[i])
-                
-                right_term = args[i+1]
-                
-                # Verificación detallada para operadores
-                print(f"DEBUG - Operador en expr_aritmetica: '{operator}' - Tipo: {type(operator)}")
-                
-                # Crear el nodo binario con el operador correcto
-                binary_node = BinaryOpNode(operator, result, right_term)
-                
-                # Verificación extra
-                if operator == '-':
-                    print(f"DEBUG - Creando operación de RESTA: {result} - {right_term}")
-                elif operator == '+':
-                    print(f"DEBUG - Creando operación de SUMA: {result} + {right_term}")
-                
-                result = binary_node
-        
-        return result
-    
-    # Implementación completa para term y operador_mult también
-    @v_args(inline=True)
-    def termino(self, factor, *args):
-        """
-        Crear nodo de término.
-        """
-        if not args:
-            return factor
-        
-        result = factor
-        for i in range(0, len(args), 2):
-            if i+1 < len(args):
-                # Obtener el operador real (* o /)
-                if hasattr(args[i], 'value'):
-                    operator = args[i].value
-                else:
-                    operator = str(args[i])
-                
-                right_factor = args[i+1]
-                
-                # Verificación detallada
-                print(f"DEBUG - Operador en termino: '{operator}' - Tipo: {type(operator)}")
-                
-                # Crear nodo con el operador correcto
-                binary_node = BinaryOpNode(operator, result, right_factor)
-                
-                # Verificación extra
-                if operator == '*':
-                    print(f"DEBUG - Creando operación de MULTIPLICACIÓN: {result} * {right_factor}")
-                elif operator == '/':
-                    print(f"DEBUG - Creando operación de DIVISIÓN: {result} / {right_factor}")
-                
-                result = binary_node
-        
-        return result
-
-    
     @v_args(inline=True)
     def variable(self, var_token):
         """
         Crear nodo de variable.
         """
-        return VariableNode(var_token.value, var_token.line, var_token.column)
+        symbol_id, name = self._intern(var_token)
+        if self.node_cache is not None:
+            node = self.node_cache.variable(name, symbol_id)
+            return self._share(node, var_token)
+        node = VariableNode(name, var_token.line, var_token.column, symbol_id)
+        return set_span(node, var_token, var_token)
     
     @v_args(inline=True)
     def entero(self, num_token):
         """
         Crear nodo de número entero.
         """
-        return NumberNode(int(num_token.value), num_token.line, num_token.column)
+        if self.node_cache is not None:
+            node = self.node_cache.number(int(num_token.value))
+            return self._share(node, num_token)
+        node = NumberNode(int(num_token.value), num_token.line, num_token.column)
+        return set_span(node, num_token, num_token)
     
     @v_args(inline=True)
     def decimal(self, num_token):
         """
         Crear nodo de número decimal.
         """
-        return NumberNode(float(num_token.value), num_token.line, num_token.column)
+        if self.node_cache is not None:
+            node = self.node_cache.number(float(num_token.value))
+            return self._share(node, num_token)
+        node = NumberNode(float(num_token.value), num_token.line, num_token.column)
+        return set_span(node, num_token, num_token)
     
     @v_args(inline=True)
     def string(self, str_token):
@@ -454,67 +353,160 @@ class ASTBuilder(Transformer):
         """
         # Eliminar comillas
         value = str_token.value[1:-1]
-        return StringNode(value, str_token.line, str_token.column)
+        if self.node_cache is not None:
+            node = self.node_cache.string(value)
+            return self._share(node, str_token)
+        node = StringNode(value, str_token.line, str_token.column)
+        return set_span(node, str_token, str_token)
     
     @v_args(inline=True)
-    def expresion(self, expr):
+    def expresion(self, expr, *rest):
         """
-        Manejar nodo de expresión (asegura la conversión adecuada de Tree a nodos AST personalizados)
+        Crear el árbol de una expresión.
+        
+        La gramática entrega los operandos y los operadores en secuencia
+        plana; el ExpressionParser aplica la precedencia y la asociatividad.
         """
-        return expr
+        if not rest:
+            return expr
+        return self.expression_parser.build(expr, rest)
 
 
 class ParserController:
     """
     Controlador para el análisis sintáctico.
     """
-    def __init__(self, error_collection=None):
+    def __init__(self, error_collection=None, standalone=True):
         """
         Inicializa el controlador del analizador sintáctico.
         
         Args:
             error_collection (ErrorCollection, optional): Colección para almacenar errores
+            standalone (bool, optional): Si es True y el parser autónomo
+                (grammar/standalone_parser.py) está generado y al día, parse()
+                lo usa en lugar de construir o cargar el parser de Lark
         """
         self.error_collection = error_collection or ErrorCollection()
         self.ast = None
         
-        # Construir el analizador sintáctico usando Lark
-        grammar_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                    'grammar', 'language_grammar.lark')
-        
-        with open(grammar_path, 'r') as f:
-            grammar = f.read()
+        # Nodos compartidos entre los análisis con hash_cons=True (se crea al
+        # usarla y dura hasta clear_node_cache()) y posiciones de cada
+        # aparición en el último de ellos
+        self.node_cache = None
+        self.positions = None
         
         # Instanciar el transformador
         self.transformer = ASTBuilder()
         
-        # Crear el parser con la gramática
-        self.parser = Lark(grammar, parser='lalr', lexer='basic', 
-                           transformer=self.transformer)
+        # Parser compartido que consume flujos de tokens (se carga al usarlo)
+        self.registry = get_registry()
+        self._parser = None
+        
+        # Segmentos del último análisis para reparse() (se crea al usarlo)
+        self._incremental = None
+        
+        # Reconocedor sin construcción del AST para validate() (se crea al usarlo)
+        self._validator = None
+        
+        # Índice de tramos del AST actual para get_span_index() (se crea al usarlo)
+        self._span_index = None
+        
+        # Parser autónomo generado, con las mismas acciones del transformador
+        module = self.registry.get_standalone_parser() if standalone else None
+        if module is not None:
+            self.standalone = module.Parser(self.transformer)
+            self.literal_types = module.LITERAL_TYPES
+            # El parser autónomo tiene su propia clase de token inesperado
+            self._unexpected_token = (UnexpectedToken, module.UnexpectedToken)
+        else:
+            _trace.debug("Parser autónomo no disponible; se usa el parser de Lark")
+            self.standalone = None
+            self._unexpected_token = UnexpectedToken
+            # Tipo de token de cada literal de la gramática ('{' -> 'LBRACE'...)
+            self.literal_types = {terminal.pattern.value: terminal.name for terminal in self.parser.terminals
+                                  if terminal.pattern.type == 'str'}
     
-    # Modificación para el método parse en ParserController
-
-    def parse(self, code, tokens=None):
+    @property
+    def parser(self):
+        """
+        Parser LALR de Lark (análisis interactivo, recuperación de errores y
+        reanálisis incremental).
+        """
+        if self._parser is None:
+            self._parser = self.registry.get_parser(self.transformer)
+        return self._parser
+    
+    @property
+    def incremental(self):
+        """
+        Analizador incremental usado por reparse().
+        """
+        if self._incremental is None:
+            self._incremental = IncrementalParser(self.parser, self.literal_types)
+        return self._incremental
+    
+    @property
+    def validator(self):
+        """
+        Reconocedor sintáctico usado por validate().
+        """
+        if self._validator is None:
+            self._validator = SyntaxValidator(self.registry.get_tables())
+        return self._validator
+    
+    def parse(self, code, tokens=None, recover=False, lazy_blocks=False, hash_cons=False):
         """
         Realiza el análisis sintáctico del código fuente.
         
+        Si se proporcionan los tokens del LexerController, el parser los
+        consume directamente y el código no se vuelve a tokenizar.
+        
         Args:
             code (str): Código fuente a analizar
             tokens (list, optional): Lista de tokens generados por el lexer
-            
+            recover (bool, optional): Si es True, cada error de sintaxis se
+                registra (con su línea y columna), la sentencia afectada se
+                sustituye por un ErrorNode y el análisis continúa; si es
+                False, se detiene en el primero
+            lazy_blocks (bool, optional): Si es True, las instrucciones de
+                cada bloque se construyen la primera vez que se accede a
+                BlockNode.statements; el resultado es el mismo AST y los
+                mismos errores que sin esta opción
+            hash_cons (bool, optional): Si es True, los literales, las
+                variables y las operaciones estructuralmente iguales son un
+                único nodo, compartido también con los análisis anteriores
+                de este controlador (self.node_cache); la posición de cada
+                aparición queda en self.positions (PositionTable). La tabla
+                de nodos crece con cada análisis hasta que se llama a
+                clear_node_cache() (por ejemplo, al abrir otro documento)
+        
         Returns:
-            ASTNode: Nodo raíz del AST o None si hay errores
+            ASTNode: Nodo raíz del AST o None si hay errores (en el modo de
+                recuperación, el AST parcial)
         """
         # Limpiar errores previos y AST
         self.ast = None
+        self.positions = None
+        self._span_index = None
         self.error_collection.syntax_errors.clear()
         
+        if hash_cons:
+            if self.node_cache is None:
+                self.node_cache = NodeCache()
+            self.positions = PositionTable()
+            builder = self._get_builder(recover)
+            builder.share_nodes(self.node_cache, self.positions)
+        
         try:
             # Usar tokens del lexer si están disponibles
-            if tokens:
-                self.ast = self.parser.parse(code, tokens=tokens)
+            if tokens is None:
+                tokens = self.registry.lex(code)
+            if recover:
+                self.ast = self._parse_recovering(tokens)
+            elif lazy_blocks:
+                self.ast = self._parse_lazy(tokens)
             else:
-                self.ast = self.parser.parse(code)
+                self.ast = self._parse_tokens(tokens)
             
             # Verificar que tenemos un AST válido
             if not isinstance(self.ast, ASTNode):
@@ -524,14 +516,399 @@ class ParserController:
                 return None
             
             return self.ast
-            
+        
+        except self._unexpected_token as e:
+            # Mismo formato que en el modo de recuperación y en validate(),
+            # sin los terminales internos de la gramática; el de Lark también
+            # calcula los terminales que aceptaría realmente (accepts)
+            error = self._make_error(e.token, getattr(e, 'accepts', None) or e.expected)
+            self.error_collection.add_error(error)
+            return None
+        
         except Exception as e:
             # Capturar errores sintácticos
             error_msg = f"Error de sintaxis: {str(e)}"
             error = SyntaxError(error_msg)
             self.error_collection.add_error(error)
             return None
-
+        
+        finally:
+            if hash_cons:
+                builder.share_nodes(None)
+    
+    def _get_builder(self, recover=False):
+        """
+        Obtiene el ASTBuilder que construirá el AST del análisis.
+        
+        El parser de Lark se comparte entre controladores (uno por clase de
+        transformador) y usa el ASTBuilder con el que se creó, que no tiene
+        por qué ser self.transformer.
+        
+        Args:
+            recover (bool, optional): True si el análisis usa el modo de
+                recuperación (siempre con el parser de Lark)
+        
+        Returns:
+            ASTBuilder: Transformador del parser que se usará
+        """
+        if self.standalone is not None and not recover:
+            return self.transformer
+        return self.parser.options.transformer
+    
+    def _parse_tokens(self, tokens):
+        """
+        Analiza una secuencia de tokens con el parser autónomo o con el de Lark.
+        
+        Args:
+            tokens (iterable): Tokens a analizar
+        
+        Returns:
+            ProgramNode: Raíz del AST
+        """
+        if self.standalone is not None:
+            return self.standalone.parse(tokens)
+        return self.parser.parse(tokens)
+    
+    def _parse_lazy(self, tokens):
+        """
+        Analiza los tokens dejando pendiente el contenido de los bloques.
+        
+        Primero se valida toda la secuencia sin construir nodos, de modo que
+        construir un bloque más tarde no puede fallar; si no es válida, se
+        analiza completa para informar del mismo error que parse(). Después
+        cada bloque de nivel superior llega al parser como un único token
+        DEFERRED_BLOCK_TERMINAL y produce un BlockNode perezoso.
+        
+        Args:
+            tokens (iterable): Tokens a analizar
+        
+        Returns:
+            ProgramNode: Raíz del AST
+        """
+        if not hasattr(tokens, '__getitem__'):
+            tokens = list(tokens)
+        if self.validator.check(tokens) is not None:
+            return self._parse_tokens(tokens)
+        
+        matches = self._match_blocks(tokens)
+        return self._parse_tokens(self._defer_blocks(tokens, matches, 0, len(tokens),
+                                                     self.positions, self.node_cache))
+    
+    def _match_blocks(self, tokens):
+        """
+        Empareja las llaves de una secuencia de tokens equilibrada.
+        
+        Args:
+            tokens (sequence): Tokens ya validados
+        
+        Returns:
+            dict: Índice de cada '{' -> índice de su '}'
+        """
+        open_type = self.literal_types['{']
+        close_type = self.literal_types['}']
+        if isinstance(tokens, TokenBuffer):
+            kinds = tokens.kinds
+            open_type = tokens.kind_ids.get(open_type)
+            close_type = tokens.kind_ids.get(close_type)
+        else:
+            kinds = [token.type for token in tokens]
+        
+        matches = {}
+        opened = []
+        for i, kind in enumerate(kinds):
+            if kind == open_type:
+                opened.append(i)
+            elif kind == close_type:
+                matches[opened.pop()] = i
+        return matches
+    
+    def _defer_blocks(self, tokens, matches, start, end, positions=None, node_cache=None):
+        """
+        Entrega los tokens de un tramo sustituyendo cada bloque por un token.
+        
+        Args:
+            tokens (sequence): Tokens ya validados
+            matches (dict): Llaves emparejadas (ver _match_blocks)
+            start (int): Primer token del tramo
+            end (int): Fin (exclusivo) del tramo
+            positions (PositionTable, optional): Posiciones del análisis con
+                hash_cons=True al que pertenecen los bloques
+            node_cache (NodeCache, optional): Tabla de nodos compartidos de
+                ese análisis
+        
+        Returns:
+            iterator: Tokens del tramo; los bloques de primer nivel son tokens
+                DEFERRED_BLOCK_TERMINAL cuyo valor construye sus instrucciones
+        """
+        i = start
+        while i < end:
+            close = matches.get(i)
+            token = tokens[i]
+            if close is None:
+                yield token
+                i += 1
+                continue
+            
+            loader = partial(self._load_block, tokens, matches, i + 1, close, positions, node_cache)
+            last = tokens[close]
+            yield Token(DEFERRED_BLOCK_TERMINAL, loader, token.line, token.column,
+                        getattr(token, 'start_pos', None), getattr(last, 'end_pos', None),
+                        last.end_line, last.end_column)
+            i = close + 1
+    
+    def _load_block(self, tokens, matches, start, end, positions=None, node_cache=None):
+        """
+        Construye las instrucciones de un bloque perezoso.
+        
+        Los bloques anidados vuelven a quedar pendientes.
+        
+        Args:
+            tokens (sequence): Tokens ya validados
+            matches (dict): Llaves emparejadas (ver _match_blocks)
+            start (int): Primer token tras la '{'
+            end (int): Índice de la '}'
+            positions (PositionTable, optional): Posiciones del análisis con
+                hash_cons=True que dejó pendiente el bloque
+            node_cache (NodeCache, optional): Tabla de nodos compartidos de
+                ese análisis (aunque después se haya analizado otro código o
+                llamado a clear_node_cache())
+        
+        Returns:
+            list: Instrucciones del bloque
+        """
+        if positions is None:
+            program = self._parse_tokens(self._defer_blocks(tokens, matches, start, end))
+            return program.children
+        
+        # Los nodos del bloque se comparten con los del análisis que lo dejó
+        # pendiente, aunque el bloque se construya más tarde
+        builder = self._get_builder()
+        builder.share_nodes(node_cache, positions)
+        try:
+            program = self._parse_tokens(self._defer_blocks(tokens, matches, start, end, positions, node_cache))
+        finally:
+            builder.share_nodes(None)
+        return program.children
+    
+    def _parse_recovering(self, tokens):
+        """
+        Analiza los tokens registrando todos los errores de sintaxis.
+        
+        Ante un token inesperado se descartan estados del parser hasta uno en
+        el que pueda empezar una sentencia, se coloca allí una sentencia
+        errónea (ErrorNode) y se omiten los tokens hasta el siguiente ';' o
+        hasta la '}' del bloque que contiene el error.
+        
+        Args:
+            tokens (sequence): Tokens a analizar
+        
+        Returns:
+            ProgramNode: AST con un ErrorNode por cada sentencia descartada
+        
+        Raises:
+            UnexpectedToken: Si el error no admite recuperación
+        """
+        if not hasattr(tokens, '__getitem__'):
+            tokens = list(tokens)
+        count = len(tokens)
+        
+        interactive = self.parser.parse_interactive()
+        builder = self._get_builder(recover=True)
+        state = interactive.parser_state
+        states = state.parse_conf.states
+        
+        i = 0
+        last_error = -1  # Índice del token del último error registrado
+        floor = 0        # Altura de la pila donde se colocó la última sentencia errónea
+        while True:
+            try:
+                if i < count:
+                    interactive.feed_token(tokens[i])
+                    i += 1
+                    continue
+                return interactive.feed_eof(tokens[count - 1] if count else None)
+            
+            except UnexpectedToken as e:
+                token = e.token
+                repeated = i == last_error
+                last_error = i
+                if repeated and token.type != '$END':
+                    # La sentencia errónea ya está colocada y el token sigue sin
+                    # encajar (por ejemplo, una '}' sin bloque abierto): se omite
+                    i += 1
+                    continue
+                
+                if not repeated:
+                    error = self._make_error(e.token, e.expected)
+                    self.error_collection.add_error(error)
+                    _trace.debug("Recuperación tras: %s", error)
+                    message = error.message
+                    limit = len(state.state_stack) + 1
+                else:
+                    # Fin de archivo dentro de un bloque: se descarta también
+                    # la sentencia que lo contiene
+                    limit = floor
+                
+                stack = state.state_stack
+                while len(stack) > 1 and (len(stack) >= limit or ERROR_TERMINAL not in states[stack[-1]]):
+                    stack.pop()
+                    builder.discard(state.value_stack.pop())
+                if ERROR_TERMINAL not in states[stack[-1]]:
+                    raise
+                
+                floor = len(stack)
+                # El token de error abarca hasta el último token omitido
+                end = self._skip_statement(tokens, i)
+                last = tokens[end - 1] if end > i else token
+                interactive.feed_token(LarkToken(ERROR_TERMINAL, message, getattr(token, 'start_pos', None),
+                                                 token.line, token.column,
+                                                 getattr(last, 'end_line', None), getattr(last, 'end_column', None),
+                                                 getattr(last, 'end_pos', None)))
+                i = end
+    
+    def _skip_statement(self, tokens, i):
+        """
+        Omite los tokens de una sentencia errónea.
+        
+        Args:
+            tokens (sequence): Tokens a analizar
+            i (int): Índice del token que produjo el error
+        
+        Returns:
+            int: Índice del primer token tras el ';' que cierra la sentencia,
+                tras la '}' que cierra un bloque abierto dentro de ella, o de
+                la '}' del bloque que la contiene
+        """
+        open_type = self.literal_types['{']
+        close_type = self.literal_types['}']
+        end_type = self.literal_types[';']
+        other_type = self.literal_types['oNo']
+        count = len(tokens)
+        depth = 0
+        while i < count:
+            token_type = tokens[i].type
+            if token_type == open_type:
+                depth += 1
+            elif token_type == close_type:
+                if depth == 0:
+                    return i
+                depth -= 1
+                if depth == 0 and not (i + 1 < count and tokens[i + 1].type == other_type):
+                    return i + 1
+            elif token_type == end_type and depth == 0:
+                return i + 1
+            i += 1
+        return i
+    
+    def _make_error(self, token, expected):
+        """
+        Crea el SyntaxError de un token inesperado.
+        
+        Args:
+            token (Token): Token inesperado (de tipo '$END' al final del código)
+            expected (set): Terminales que se esperaban
+        
+        Returns:
+            SyntaxError: Error con la línea y la columna del token
+        """
+        names = {name: value for value, name in self.literal_types.items()}
+        expected = sorted(f"'{names[name]}'" if name in names else name
+                          for name in expected if name not in (ERROR_TERMINAL, DEFERRED_BLOCK_TERMINAL))
+        
+        if token.type == '$END':
+            message = "Fin de archivo inesperado"
+        else:
+            message = f"Token inesperado '{token.value}'"
+        if expected:
+            message += f"; se esperaba: {', '.join(expected)}"
+        return SyntaxError(message, token.line, token.column)
+    
+    def validate(self, code, tokens=None):
+        """
+        Comprueba si el código es sintácticamente correcto sin construir el AST.
+        
+        Recorre el autómata LALR con una pila de estados, sin ejecutar el
+        ASTBuilder ni crear nodos; el AST del controlador no se modifica.
+        
+        Args:
+            code (str): Código fuente a analizar
+            tokens (sequence, optional): Tokens generados por el lexer
+        
+        Returns:
+            list: Errores de sintaxis (vacía si el código es válido); también
+                se registran en la colección de errores
+        """
+        self.error_collection.syntax_errors.clear()
+        
+        try:
+            if tokens is None:
+                tokens = list(self.registry.lex(code))
+            failure = self.validator.check(tokens)
+        except Exception as e:
+            error = SyntaxError(f"Error de sintaxis: {str(e)}")
+            self.error_collection.add_error(error)
+            return [error]
+        
+        if failure is None:
+            return []
+        
+        index, expected = failure
+        if index < len(tokens):
+            token = tokens[index]
+        elif len(tokens):
+            last = tokens[len(tokens) - 1]
+            token = Token('$END', '', last.line, last.column)
+        else:
+            token = Token('$END', '', 1, 1)
+        error = self._make_error(token, expected)
+        self.error_collection.add_error(error)
+        return [error]
+    
+    def reparse(self, code, tokens=None):
+        """
+        Realiza el análisis sintáctico reutilizando el resultado del anterior.
+        
+        Solo se analizan de nuevo las sentencias (de nivel superior o dentro
+        de un bloque) cuyos tokens cambiaron; el AST resultante es idéntico al
+        de parse(). La primera llamada, o cualquier caso que el análisis
+        incremental no pueda resolver, realiza un análisis completo.
+        
+        Args:
+            code (str): Código fuente a analizar
+            tokens (sequence, optional): Tokens generados por el lexer
+        
+        Returns:
+            ASTNode: Nodo raíz del AST o None si hay errores
+        """
+        if tokens is None:
+            try:
+                tokens = list(self.registry.lex(code))
+            except Exception:
+                return self.parse(code)
+        
+        ast = self.incremental.update(code, tokens)
+        if ast is None:
+            ast = self.parse(code, tokens)
+            if ast is not None:
+                self.incremental.build(ast, code, tokens)
+            return ast
+        
+        self.error_collection.syntax_errors.clear()
+        self.ast = ast
+        self._span_index = None
+        return ast
+    
+    def clear_node_cache(self):
+        """
+        Olvida los nodos compartidos de los análisis con hash_cons=True.
+        
+        El siguiente análisis con hash_cons=True empieza con una tabla
+        nueva, así que no comparte nodos con los ASTs anteriores, que siguen
+        siendo válidos. Conviene llamarlo al cambiar de documento para que la
+        tabla no conserve los nodos de todos los programas analizados.
+        """
+        self.node_cache = None
+    
     def get_ast(self):
         """
         Obtiene el AST generado.
@@ -541,6 +918,18 @@ class ParserController:
         """
         return self.ast
     
+    def get_span_index(self):
+        """
+        Obtiene el índice de tramos del AST actual, para buscar los nodos
+        que hay en una posición del código.
+        
+        Returns:
+            SpanIndex: Índice del AST, o None si no hay AST
+        """
+        if self._span_index is None and self.ast is not None:
+            self._span_index = SpanIndex(self.ast)
+        return self._span_index
+    
     def has_errors(self):
         """
         Comprueba si se produjeron errores durante el análisis sintáctico.
@@ -1,106 +1,189 @@
+from types import GeneratorType
+
 from models.symbol_table import SymbolTable
 from models.ast_nodes import *
 from models.error import SemanticError, TypeError, UndeclaredError, RedeclarationError, ErrorCollection
+from controllers.expression_parser import RELATIONAL_OPERATORS
+from utils.tracing import get_tracer
+
+_trace = get_tracer('semantic')
+
+# Tipos de resultado de un método visit_* que indican hijos por visitar
+_CHILD_ITERATORS = frozenset([GeneratorType, type(iter([])), type(iter(()))])
+
+# Marca de fin de un iterador de hijos
+_DONE = object()
+
+
+class _DispatchTable(dict):
+    """
+    Tabla clase de nodo -> método visit_* de una clase de visitor.
+    
+    Cada entrada se resuelve la primera vez que se visita un nodo de esa
+    clase, con las mismas reglas que ASTNode.accept: el método
+    visit_<NombreDeClase> (heredado o no) o, si no existe, generic_visit.
+    """
+    def __init__(self, visitor_class):
+        super().__init__()
+        self.visitor_class = visitor_class
+    
+    def __missing__(self, node_class):
+        if hasattr(node_class, 'accept'):
+            method = getattr(self.visitor_class, f'visit_{node_class.__name__}', None)
+            if method is None:
+                method = self.visitor_class.generic_visit
+        else:
+            method = self.visitor_class._visit_without_accept
+        self[node_class] = method
+        return method
+
 
 class ASTVisitor:
     """
     Clase base para implementar el patrón Visitor para recorrer el AST.
+    
+    Cada clase de visitor tiene su propia tabla de despacho (_dispatch), de
+    modo que visitar un nodo es una búsqueda en un diccionario por su clase
+    en lugar de componer el nombre del método y buscarlo con getattr.
+    
+    Los métodos visit_* de los nodos que pueden anidarse sin límite (bloques,
+    estructuras de control, operaciones binarias) son generadores: en lugar
+    de llamar a self.visit(hijo) hacen `yield hijo`, y visit() los ejecuta
+    con una pila explícita, de modo que la profundidad del AST no está
+    limitada por el límite de recursión de Python. Un método también puede
+    devolver directamente un iterador de hijos (iter(lista)). Estas visitas
+    no tienen resultado (visit() devuelve None): el padre lee lo que necesita
+    de los atributos de sus hijos (type, value). Los demás métodos siguen
+    siendo funciones normales, no pasan por la pila y devuelven su resultado.
     """
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._dispatch = _DispatchTable(cls)
+    
     def visit(self, node):
         """
         Visita un nodo del AST.
         
         Args:
             node (ASTNode): Nodo a visitar
-            
+        
         Returns:
             varies: El resultado de visitar el nodo
         """
-        if hasattr(node, 'accept'):
-            return node.accept(self)
-        else:
-            print(f"Warning: Node {type(node).__name__} does not have 'accept' method")
-            return self.generic_visit(node)
-    def generic_visit(self, node):
+        dispatch = self._dispatch
+        result = dispatch[type(node)](self, node)
+        if type(result) not in _CHILD_ITERATORS:
+            return result
+        
+        # Pila de iteradores de hijos pendientes
+        stack = [result]
+        while stack:
+            child = next(stack[-1], _DONE)
+            if child is _DONE:
+                stack.pop()
+                continue
+            result = dispatch[type(child)](self, child)
+            if type(result) in _CHILD_ITERATORS:
+                stack.append(result)
+        return None
+    
+    def _visit_without_accept(self, node):
         """
-        Método genérico para visitar un nodo.
+        Visita un objeto que no es un nodo del AST (p. ej. un Tree de Lark).
         """
-        import lark
+        _trace.warning("Node %s does not have 'accept' method", type(node).__name__)
+        return self.generic_visit(node)
+    
+    def generic_visit(self, node):
+        """
+        Método genérico para visitar un nodo: visita sus hijos en orden.
         
-        # Verificar si es un objeto Tree de Lark
-        if isinstance(node, lark.Tree):
-            print(f"ATENCIÓN: Se encontró un nodo Tree de Lark no convertido: tipo='{node.data}'")
+        Returns:
+            iterator: Hijos del nodo, que visit() visita con su pila
+        """
+        if isinstance(node, ASTNode):
+            return iter_children(node)
+        
+        # Árbol de Lark (o del parser autónomo) no convertido. Un nodo
+        # envoltorio (como 'sentencia') se resuelve directamente con el método
+        # de su único hijo: si este tiene hijos, devuelve su iterador sin
+        # recorrerlo, así que la recursión no se acumula
+        children = node.children
+        if len(children) == 1:
+            child = children[0]
+            return self._dispatch[type(child)](self, child)
+        
+        data = getattr(node, 'data', None)
+        _trace.debug("ATENCIÓN: Se encontró un nodo Tree de Lark no convertido: tipo='%s'", data)
+        
+        # Intentar convertir expresiones relacionales
+        if data == 'expr_relacional' and len(children) >= 2:
+            left = children[0]
+            if len(children) >= 3:
+                operator = children[1].value if hasattr(children[1], 'value') else str(children[1])
+                right = children[2]
+            else:
+                # Asumir operador '>' si no encontramos uno explícito
+                operator = '>'
+                right = children[1]
             
-            # Intentar convertir expresiones relacionales
-            if node.data == 'expr_relacional' and len(node.children) >= 2:
-                left = node.children[0]
-                if len(node.children) >= 3:
-                    operator = node.children[1].value if hasattr(node.children[1], 'value') else str(node.children[1])
-                    right = node.children[2]
-                else:
-                    # Asumir operador '>' si no encontramos uno explícito
-                    operator = '>'
-                    right = node.children[1]
-                
-                print(f"Convirtiendo Tree a BinaryOpNode: {left} {operator} {right}")
-                converted_node = BinaryOpNode(operator, left, right)
-                converted_node.type = 'bool'
-                
-                # Visitar el nodo convertido
-                return self.visit(converted_node)
+            _trace.debug("Convirtiendo Tree a BinaryOpNode: %s %s %s", left, operator, right)
+            converted_node = BinaryOpNode(operator, left, right)
+            converted_node.type = 'bool'
             
-            # Procesar hijos normalmente
-            for child in node.children:
-                self.visit(child)
-                
-            return None
+            # Visitar el nodo convertido
+            return iter((converted_node,))
         
-        # Manejo regular para nodos AST
-        if hasattr(node, 'children'):
-            for child in node.children:
-                self.visit(child)
-        return None
+        # Procesar hijos normalmente
+        return iter(children)
+
+
+ASTVisitor._dispatch = _DispatchTable(ASTVisitor)
 
 
 class SemanticVisitor(ASTVisitor):
     """
     Visitor para realizar el análisis semántico.
     """
-    def __init__(self, symbol_table=None, error_collection=None):
+    def __init__(self, symbol_table=None, error_collection=None, positions=None):
         """
         Inicializa el visitor semántico.
         
         Args:
             symbol_table (SymbolTable, optional): Tabla de símbolos
             error_collection (ErrorCollection, optional): Colección para almacenar errores
+            positions (PositionTable, optional): Posiciones de cada aparición
+                de las expresiones, si el AST se construyó con
+                parse(hash_cons=True)
         """
         # Forzar la creación de una nueva tabla de símbolos para cada visitor
         self.symbol_table = symbol_table or SymbolTable()
         self.error_collection = error_collection or ErrorCollection()
         
         # Variables internas para seguimiento - usado para depuración
-        self._declared_variables = []
+        self._declared_variables = set()
+        
+        # Hojas (hoja, línea, columna) de la aparición de la expresión que se
+        # está visitando y número de hojas ya visitadas (ver _begin_expression)
+        self.positions = positions
+        self._occurrence = ()
+        self._leaf = 0
     
     def visit_ProgramNode(self, node):
         """
         Visita el nodo raíz del programa.
         """
-        print("Visitando ProgramNode")
-        print(f"  Número de hijos: {len(node.children)}")
+        _trace.debug("Visitando ProgramNode")
+        _trace.debug("  Número de hijos: %s", len(node.children))
         
         # Limpiar cualquier estado residual
         self._declared_variables.clear()
         
         # Visitar todos los hijos en orden
         for i, child in enumerate(node.children):
-            print(f"  Visitando hijo {i} ({type(child).__name__})")
+            _trace.debug("  Visitando hijo %s (%s)", i, type(child).__name__)
             self.visit(child)
         
-        # Imprimir la tabla de símbolos para depuración
-        print("\nTabla de símbolos después del análisis:")
-        for symbol in self.symbol_table.get_all_symbols():
-            print(f"  - {symbol.name}: tipo={symbol.type}, valor={symbol.value}")
-        
         # Verificar si hay errores semánticos
         return not any(isinstance(e, SemanticError) for e in self.error_collection.get_all_errors())
     
@@ -108,8 +191,8 @@ class SemanticVisitor(ASTVisitor):
         """
         Visita un nodo de declaración.
         """
-        print(f"Visitando DeclarationNode con tipo: {node.var_type}")
-        print(f"  Número de hijos: {len(node.children)}")
+        _trace.debug("Visitando DeclarationNode con tipo: %s", node.var_type)
+        _trace.debug("  Número de hijos: %s", len(node.children))
         
         var_type = node.var_type
         
@@ -144,13 +227,12 @@ class SemanticVisitor(ASTVisitor):
                                 name=id_node.name,
                                 type=var_type,
                                 line=id_node.line,
-                                column=id_node.column
+                                column=id_node.column,
+                                symbol_id=id_node.symbol_id
                             )
                             
                             # Registrar como declarada en este análisis
-                            self._declared_variables.append(id_node.name)
-                            
-                            print(f"  Declarada variable: {id_node.name} (tipo: {var_type})")
+                            self._declared_variables.add(id_node.name)
         
         # Continuar visitando los hijos
         for child in node.children:
@@ -160,32 +242,32 @@ class SemanticVisitor(ASTVisitor):
         """
         Visita un nodo de lista de identificadores.
         """
-        print(f"Visitando IdentifierListNode")
-        print(f"  Tipo heredado: {node.type}")
+        _trace.debug("Visitando IdentifierListNode")
+        _trace.debug("  Tipo heredado: %s", node.type)
         
         # El procesamiento ya se hizo en visit_DeclarationNode
         # Solo para depuración
         if hasattr(node, 'identifiers'):
-            print(f"  Identificadores en la lista: {node.identifiers}")
+            _trace.debug("  Identificadores en la lista: %s", node.identifiers)
     
     def visit_AssignmentNode(self, node):
         """
         Visita un nodo de asignación.
         """
-        print(f"Visitando AssignmentNode: {node.identifier.name if hasattr(node.identifier, 'name') else '?'}")
+        _trace.debug("Visitando AssignmentNode: %s", node.identifier.name if hasattr(node.identifier, 'name') else '?')
         
         # Primero visitar la expresión para evaluar su tipo y valor
-        self.visit(node.expression)
+        self.visit(self._begin_expression(node, 'expression'))
         
         # Luego visitar el identificador
-        self.visit(node.identifier)
+        identifier = self._begin_expression(node, 'identifier')
+        self.visit(identifier)
         
         # Verificar si la variable está declarada
-        identifier = node.identifier
-        symbol = self.symbol_table.lookup(identifier.name)
+        symbol = self._lookup(identifier)
         
         if not symbol:
-            error = UndeclaredError(identifier.name, identifier.line, identifier.column)
+            error = UndeclaredError(identifier.name, *self._position(identifier, 0))
             self.error_collection.add_error(error)
             return False
         
@@ -214,452 +296,43 @@ class SemanticVisitor(ASTVisitor):
         # Actualizar el valor en la tabla de símbolos
         if hasattr(expression, 'value'):
             expression_value = expression.value
-            print(f"  Asignando valor {expression_value} a variable {identifier.name}")
+            _trace.debug("  Asignando valor %s a variable %s", expression_value, identifier.name)
             
             # Actualizar el símbolo en la tabla
             updated = self.symbol_table.update(identifier.name, value=expression_value)
             
             if updated:
-                print(f"  ✓ Actualización exitosa para {identifier.name}: valor={expression_value}")
+                _trace.debug("  ✓ Actualización exitosa para %s: valor=%s", identifier.name, expression_value)
             else:
-                print(f"  ✗ Fallo al actualizar {identifier.name}")
+                _trace.debug("  ✗ Fallo al actualizar %s", identifier.name)
         else:
-            print(f"  La expresión no tiene valor para {identifier.name}")
-        
-        return True
-    
-    def visit_BinaryOpNode(self, node):
-        """
-        Visita un nodo de operación binaria y calcula su valor si es posible.
-        """
-        print(f"Visitando BinaryOpNode con operador: {node.operator}")
-        
-        # Visitar operandos para obtener sus tipos y valores
-        self.visit(node.left)
-        self.visit(node.right)
-        
-        left_type = node.left.type
-        right_type = node.right.type
-        
-        # Obtener valores si están disponibles
-        left_value = getattr(node.left, 'value', None)
-        right_value = getattr(node.right, 'value', None)
-        
-        print(f"  Operación binaria: {left_value} {node.operator} {right_value}")
-        
-        # Intentar calcular el valor si ambos operandos tienen valores
-        if left_value is not None and right_value is not None:
-            try:
-                if node.operator == '+':
-                    node.value = left_value + right_value
-                    print(f"  Resultado de la suma: {node.value}")
-                elif node.operator == '-':
-                    node.value = left_value - right_value
-                    print(f"  Resultado de la resta: {node.value}")
-                elif node.operator == '*':
-                    node.value = left_value * right_value
-                    print(f"  Resultado de la multiplicación: {node.value}")
-                elif node.operator == '/':
-                    # Evitar división por cero
-                    if right_value != 0:
-                        node.value = left_value / right_value
-                        # Mantener el tipo entero si ambos operandos son enteros
-                        if left_type == 'ent' and right_type == 'ent' and node.value == int(node.value):
-                            node.value = int(node.value)
-                        print(f"  Resultado de la división: {node.value}")
-                elif node.operator == '==':
-                    node.value = left_value == right_value
-                    print(f"  Resultado de la comparación igual: {node.value}")
-                elif node.operator == '!=':
-                    node.value = left_value != right_value
-                    print(f"  Resultado de la comparación distinto: {node.value}")
-                elif node.operator == '>':
-                    node.value = left_value > right_value
-                    print(f"  Resultado de la comparación mayor: {node.value}")
-                elif node.operator == '<':
-                    node.value = left_value < right_value
-                    print(f"  Resultado de la comparación menor: {node.value}")
-                elif node.operator == '>=':
-                    node.value = left_value >= right_value
-                    print(f"  Resultado de la comparación mayor igual: {node.value}")
-                elif node.operator == '<=':
-                    node.value = left_value <= right_value
-                    print(f"  Resultado de la comparación menor igual: {node.value}")
-                elif node.operator == '&&':
-                    node.value = left_value and right_value
-                    print(f"  Resultado del AND lógico: {node.value}")
-                elif node.operator == '||':
-                    node.value = left_value or right_value
-                    print(f"  Resultado del OR lógico: {node.value}")
-            except Exception as e:
-                print(f"  ✗ Error al calcular valor para operación {node.operator}: {e}")
-                node.value = None
-        else:
-            print(f"  No se puede calcular valor: left_value={left_value}, right_value={right_value}")
-        
-        # Verificar que ambos operandos tienen tipo válido
-        if left_type is None or right_type is None:
-            node.type = None
-            return False
-        
-        # Operadores aritméticos
-        if node.operator in ('+', '-', '*', '/'):
-            if left_type == 'ent' and right_type == 'ent':
-                node.type = 'ent'
-            elif left_type in ('ent', 'dec') and right_type in ('ent', 'dec'):
-                node.type = 'dec'
-            elif node.operator == '+' and left_type == 'cadena' and right_type == 'cadena':
-                node.type = 'cadena'  # Concatenación
-            else:
-                error = TypeError(
-                    expected="tipos numéricos compatibles",
-                    found=f"{left_type} y {right_type}",
-                    message=f"Operador '{node.operator}' no puede aplicarse a tipos '{left_type}' y '{right_type}'",
-                    line=node.line,
-                    column=node.column
-                )
-                self.error_collection.add_error(error)
-                node.type = None
-                return False
-        
-        # Operadores relacionales
-        elif node.operator in ('==', '!=', '>', '<', '>=', '<='):
-            if (left_type in ('ent', 'dec') and right_type in ('ent', 'dec')) or \
-               (left_type == right_type):
-                node.type = 'bool'
-            else:
-                error = TypeError(
-                    expected="tipos compatibles",
-                    found=f"{left_type} y {right_type}",
-                    message=f"Operador '{node.operator}' no puede aplicarse a tipos '{left_type}' y '{right_type}'",
-                    line=node.line,
-                    column=node.column
-                )
-                self.error_collection.add_error(error)
-                node.type = None
-                return False
-        
-        # Operadores lógicos
-        elif node.operator in ('&&', '||'):
-            if left_type == 'bool' and right_type == 'bool':
-                node.type = 'bool'
-            else:
-                error = TypeError(
-                    expected="bool",
-                    found=f"{left_type} y {right_type}",
-                    message=f"Operador '{node.operator}' requiere operandos booleanos",
-                    line=node.line,
-                    column=node.column
-                )
-                self.error_collection.add_error(error)
-                node.type = None
-                return False
-        
-        print(f"  Tipo resultante de la operación binaria: {node.type}")
-        
-        return True
-    
-    def visit_IfNode(self, node):
-        """
-        Visita un nodo de condición if.
-        """
-        print(f"Visitando IfNode")
-        
-        # Visitar la condición
-        self.visit(node.condition)
-        
-        condition_type = node.condition.type
-        
-        # Verificar que la condición sea booleana
-        if condition_type != 'bool' and condition_type is not None:
-            error = TypeError(
-                expected="bool",
-                found=condition_type,
-                message="La condición del 'si' debe ser booleana",
-                line=node.condition.line,
-                column=node.condition.column
-            )
-            self.error_collection.add_error(error)
-            return False
-        
-        # Visitar los bloques con nuevos ámbitos
-        self.symbol_table.enter_scope()
-        self.visit(node.if_body)
-        self.symbol_table.exit_scope()
-        
-        if node.else_body:
-            self.symbol_table.enter_scope()
-            self.visit(node.else_body)
-            self.symbol_table.exit_scope()
-        
-        return True
-    
-    def visit_WhileNode(self, node):
-        """
-        Visita un nodo de bucle while.
-        """
-        print(f"Visitando WhileNode")
-        
-        # Visitar la condición
-        self.visit(node.condition)
-        
-        condition_type = node.condition.type
-        
-        # Verificar que la condición sea booleana
-        if condition_type != 'bool' and condition_type is not None:
-            error = TypeError(
-                expected="bool",
-                found=condition_type,
-                message="La condición del 'mientras' debe ser booleana",
-                line=node.condition.line,
-                column=node.condition.column
-            )
-            self.error_collection.add_error(error)
-            return False
-        
-        # Visitar el bloque con nuevo ámbito
-        self.symbol_table.enter_scope()
-        self.visit(node.body)
-        self.symbol_table.exit_scope()
-        
-        return True
-    
-    def visit_RepeatNode(self, node):
-        """
-        Visita un nodo de bucle repeat.
-        """
-        print(f"Visitando RepeatNode")
-        
-        # Visitar la expresión de conteo
-        self.visit(node.count)
-        
-        count_type = node.count.type
-        
-        # Verificar que el contador sea entero
-        if count_type != 'ent' and count_type is not None:
-            error = TypeError(
-                expected="ent",
-                found=count_type,
-                message="El número de repeticiones debe ser entero",
-                line=node.count.line,
-                column=node.count.column
-            )
-            self.error_collection.add_error(error)
-            return False
-        
-        # Visitar el bloque con nuevo ámbito
-        self.symbol_table.enter_scope()
-        self.visit(node.body)
-        self.symbol_table.exit_scope()
-        
-        return True
-    
-    def visit_PrintNode(self, node):
-        """
-        Visita un nodo de impresión.
-        """
-        print(f"Visitando PrintNode")
-        
-        # Visitar la expresión a imprimir
-        self.visit(node.expression)
-        
-        return True
-    
-    def visit_InputNode(self, node):
-        """
-        Visita un nodo de entrada.
-        """
-        print(f"Visitando InputNode")
-        
-        var_name = node.variable.name
-        symbol = self.symbol_table.lookup(var_name)
-        
-        if not symbol:
-            error = UndeclaredError(var_name, node.variable.line, node.variable.column)
-            self.error_collection.add_error(error)
-            return False
-        
-        # Propagar el tipo
-        node.variable.type = symbol.type
-        return True
-    
-    def visit_BlockNode(self, node):
-        """
-        Visita un nodo de bloque.
-        """
-        print(f"Visitando BlockNode con {len(node.statements)} instrucciones")
-        
-        # Visitar todas las instrucciones del bloque
-        for statement in node.statements:
-            self.visit(statement)
+            _trace.debug("  La expresión no tiene valor para %s", identifier.name)
         
         return True
     
-    def visit_NumberNode(self, node):
-        """
-        Visita un nodo de número.
-        """
-        # El tipo ya está establecido durante la construcción del AST
-        print(f"Visitando NumberNode: {node.value} de tipo {node.type}")
-        return True
-    
-    def visit_StringNode(self, node):
-        """
-        Visita un nodo de cadena.
-        """
-        # El tipo ya está establecido durante la construcción del AST
-        print(f"Visitando StringNode: {node.value} de tipo {node.type}")
-        return True
-    
-    def visit_VariableNode(self, node):
-        """
-        Visita un nodo de variable.
-        """
-        print(f"Visitando VariableNode: {node.name}")
-        
-        # Buscar la variable en la tabla de símbolos
-        symbol = self.symbol_table.lookup(node.name)
-        
-        if not symbol:
-            error = UndeclaredError(node.name, node.line, node.column)
-            self.error_collection.add_error(error)
-            return False
-        else:
-            # Propagar el tipo y valor
-            node.type = symbol.type
-            node.value = symbol.value
-            print(f"  Asignado tipo {node.type} y valor {node.value} a variable {node.name}")
-            return True
-    
-    def are_types_compatible(self, target_type, source_type):
-        """
-        Verifica si dos tipos son compatibles para asignación.
-        """
-        if target_type is None or source_type is None:
-            return False
-        
-        # Mismo tipo
-        if target_type == source_type:
-            return True
-        
-        # Conversiones permitidas
-        if target_type == 'dec' and source_type == 'ent':
-            return True
-        
-        return False
-    """
-    Visitor para realizar el análisis semántico.
-    """
-    def __init__(self, symbol_table=None, error_collection=None):
-        """
-        Inicializa el visitor semántico.
-        
-        Args:
-            symbol_table (SymbolTable, optional): Tabla de símbolos
-            error_collection (ErrorCollection, optional): Colección para almacenar errores
-        """
-        # Forzar la creación de una nueva tabla de símbolos para cada visitor
-        self.symbol_table = symbol_table or SymbolTable()
-        self.error_collection = error_collection or ErrorCollection()
-        
-        # Variables internas para seguimiento - usado para depuración
-        self._declared_variables = []
-    
-    def visit_ProgramNode(self, node):
-        """
-        Visita el nodo raíz del programa.
-        """
-        print("Visitando ProgramNode")
-        print(f"  Número de hijos: {len(node.children)}")
-        
-        # Limpiar cualquier estado residual
-        self._declared_variables.clear()
-        
-        # Visitar todos los hijos en orden
-        for i, child in enumerate(node.children):
-            print(f"  Visitando hijo {i} ({type(child).__name__})")
-            self.visit(child)
-        
-        # Verificar si hay errores semánticos
-        return not any(isinstance(e, SemanticError) for e in self.error_collection.get_all_errors())
-    
-    def visit_DeclarationNode(self, node):
-        """
-        Visita un nodo de declaración.
-        """
-        print(f"Visitando DeclarationNode con tipo: {node.var_type}")
-        print(f"  Número de hijos: {len(node.children)}")
-        
-        var_type = node.var_type
-        
-        # Verificar que el nodo tenga hijos
-        if not node.children:
-            return False
-        
-        # Iterar sobre los hijos (lista de identificadores)
-        for child in node.children:
-            # Verificar que sea un IdentifierListNode
-            if hasattr(child, 'identifiers') and child.identifiers:
-                # Propagar el tipo a la lista de identificadores
-                child.type = var_type
-                
-                # Procesar cada identificador en la lista
-                for id_node in child.children:
-                    if hasattr(id_node, 'name'):
-                        # Comprobar si la variable ya está declarada en este análisis
-                        if id_node.name in self._declared_variables:
-                            error = RedeclarationError(
-                                id_node.name, 
-                                line=id_node.line,
-                                column=id_node.column
-                            )
-                            self.error_collection.add_error(error)
-                        else:
-                            # Propagar el tipo al nodo de identificador
-                            id_node.type = var_type
-                            
-                            # Insertar en la tabla de símbolos
-                            self.symbol_table.insert(
-                                name=id_node.name,
-                                type=var_type,
-                                line=id_node.line,
-                                column=id_node.column
-                            )
-                            
-                            # Registrar como declarada en este análisis
-                            self._declared_variables.append(id_node.name)
-        
-        # Continuar visitando los hijos
-        for child in node.children:
-            self.visit(child)
-    
-    def visit_IdentifierListNode(self, node):
-        """
-        Visita un nodo de lista de identificadores.
-        """
-        print(f"Visitando IdentifierListNode")
-        print(f"  Tipo heredado: {node.type}")
-        
-        # El procesamiento ya se hizo en visit_DeclarationNode
-        # Solo para depuración
-        if hasattr(node, 'identifiers'):
-            print(f"  Identificadores en la lista: {node.identifiers}")
-    
     def visit_BinaryOpNode(self, node):
         """
         Visita un nodo de operación binaria y calcula su valor si es posible.
         """
-        print(f"Visitando BinaryOpNode con operador: '{node.operator}' (tipo: {type(node.operator)})")
+        _trace.debug("Visitando BinaryOpNode con operador: '%s' (tipo: %s)", node.operator, type(node.operator))
         
         # Verificar si el operador es una cadena
         if not isinstance(node.operator, str):
-            print(f"ADVERTENCIA: Operador no es una cadena: {type(node.operator)}")
+            _trace.warning("Operador no es una cadena: %s", type(node.operator))
             node.operator = str(node.operator)
-            print(f"Convertido a: '{node.operator}'")
+            _trace.debug("Convertido a: '%s'", node.operator)
+        
+        # El tipo y el valor se calculan de nuevo en cada visita: con
+        # parse(hash_cons=True) el nodo puede aparecer en varias sentencias y
+        # en análisis anteriores. Se parte de los que asigna el parser
+        node.type = 'bool' if node.operator in RELATIONAL_OPERATORS else None
+        node.value = None
         
         # Visitar operandos para obtener sus tipos y valores
-        self.visit(node.left)
-        self.visit(node.right)
+        first_leaf = self._leaf
+        yield node.left
+        yield node.right
+        line, column = self._position(node, first_leaf)
         
         left_type = node.left.type
         right_type = node.right.type
@@ -668,7 +341,7 @@ class SemanticVisitor(ASTVisitor):
         left_value = getattr(node.left, 'value', None)
         right_value = getattr(node.right, 'value', None)
         
-        print(f"  Operación binaria: {left_value} '{node.operator}' {right_value}")
+        _trace.debug("  Operación binaria: %s '%s' %s", left_value, node.operator, right_value)
         
         # Intentar calcular el valor si ambos operandos tienen valores
         if left_value is not None and right_value is not None:
@@ -676,19 +349,19 @@ class SemanticVisitor(ASTVisitor):
                 # Operadores aritméticos básicos
                 if node.operator == '+':
                     node.value = left_value + right_value
-                    print(f"  Suma calculada: {left_value} + {right_value} = {node.value}")
+                    _trace.debug("  Suma calculada: %s + %s = %s", left_value, right_value, node.value)
                 elif node.operator == '-':
                     # Verificación adicional para la resta
                     node.value = left_value - right_value
-                    print(f"  Resta calculada: {left_value} - {right_value} = {node.value}")
+                    _trace.debug("  Resta calculada: %s - %s = %s", left_value, right_value, node.value)
                     # Verificación extra para confirmar
                     real_result = left_value - right_value
                     if node.value != real_result:
-                        print(f"  ERROR: El valor calculado ({node.value}) no coincide con la resta real ({real_result})")
+                        _trace.warning("El valor calculado (%s) no coincide con la resta real (%s)", node.value, real_result)
                         node.value = real_result  # Forzar el valor correcto
                 elif node.operator == '*':
                     node.value = left_value * right_value
-                    print(f"  Multiplicación calculada: {left_value} * {right_value} = {node.value}")
+                    _trace.debug("  Multiplicación calculada: %s * %s = %s", left_value, right_value, node.value)
                 elif node.operator == '/':
                     # Evitar división por cero
                     if right_value != 0:
@@ -696,7 +369,7 @@ class SemanticVisitor(ASTVisitor):
                         # Mantener el tipo entero si ambos operandos son enteros
                         if left_type == 'ent' and right_type == 'ent' and node.value == int(node.value):
                             node.value = int(node.value)
-                        print(f"  División calculada: {left_value} / {right_value} = {node.value}")
+                        _trace.debug("  División calculada: %s / %s = %s", left_value, right_value, node.value)
                 # Operadores relacionales
                 elif node.operator == '==':
                     node.value = left_value == right_value
@@ -716,15 +389,15 @@ class SemanticVisitor(ASTVisitor):
                 elif node.operator == '||':
                     node.value = left_value or right_value
                 else:
-                    print(f"  Operador no reconocido: '{node.operator}'")
+                    _trace.debug("  Operador no reconocido: '%s'", node.operator)
             except Exception as e:
-                print(f"  Error al calcular valor para operación '{node.operator}': {e}")
+                _trace.debug("  Error al calcular valor para operación '%s': %s", node.operator, e)
                 node.value = None
             # Resto del código igual que antes...
             # Verificar que ambos operandos tienen tipo válido
             if left_type is None or right_type is None:
                 node.type = None
-                return False
+                return
             
             # Operadores aritméticos
             if node.operator in ('+', '-', '*', '/'):
@@ -739,12 +412,12 @@ class SemanticVisitor(ASTVisitor):
                         expected="tipos numéricos compatibles",
                         found=f"{left_type} y {right_type}",
                         message=f"Operador '{node.operator}' no puede aplicarse a tipos '{left_type}' y '{right_type}'",
-                        line=node.line,
-                        column=node.column
+                        line=line,
+                        column=column
                     )
                     self.error_collection.add_error(error)
                     node.type = None
-                    return False
+                    return
             
             # Operadores relacionales
             elif node.operator in ('==', '!=', '>', '<', '>=', '<='):
@@ -756,12 +429,12 @@ class SemanticVisitor(ASTVisitor):
                         expected="tipos compatibles",
                         found=f"{left_type} y {right_type}",
                         message=f"Operador '{node.operator}' no puede aplicarse a tipos '{left_type}' y '{right_type}'",
-                        line=node.line,
-                        column=node.column
+                        line=line,
+                        column=column
                     )
                     self.error_collection.add_error(error)
                     node.type = None
-                    return False
+                    return
             
             # Operadores lógicos
             elif node.operator in ('&&', '||'):
@@ -772,123 +445,126 @@ class SemanticVisitor(ASTVisitor):
                         expected="bool",
                         found=f"{left_type} y {right_type}",
                         message=f"Operador '{node.operator}' requiere operandos booleanos",
-                        line=node.line,
-                        column=node.column
+                        line=line,
+                        column=column
                     )
                     self.error_collection.add_error(error)
                     node.type = None
-                    return False
+                    return
             
-            return True
+            return
     
     def visit_IfNode(self, node):
         """
         Visita un nodo de condición if.
         """
-        print(f"Visitando IfNode")
-        print(f"DEBUG IfNode: condition={type(node.condition).__name__}")
-    
+        _trace.debug("Visitando IfNode")
+        _trace.debug("IfNode: condition=%s", type(node.condition).__name__)
+        
         # Si la condición es un VariableNode sin operación, intentar convertirlo
         if isinstance(node.condition, VariableNode) and hasattr(node, 'if_body'):
-            print(f"¡ADVERTENCIA! La condición del if es sólo una variable: {node.condition.name}")
+            _trace.warning("La condición del if es sólo una variable: %s", node.condition.name)
         
         # Visitar la condición
-        self.visit(node.condition)
+        yield self._begin_expression(node, 'condition')
         
         condition_type = node.condition.type
         
         # Verificar que la condición sea booleana
         if condition_type != 'bool' and condition_type is not None:
+            line, column = self._position(node.condition, 0)
             error = TypeError(
                 expected="bool",
                 found=condition_type,
                 message="La condición del 'si' debe ser booleana",
-                line=node.condition.line,
-                column=node.condition.column
+                line=line,
+                column=column
             )
             self.error_collection.add_error(error)
-            return False
+            return
         
         # Visitar los bloques con nuevos ámbitos
         self.symbol_table.enter_scope()
-        self.visit(node.if_body)
+        yield node.if_body
         self.symbol_table.exit_scope()
         
         if node.else_body:
             self.symbol_table.enter_scope()
-            self.visit(node.else_body)
+            yield node.else_body
             self.symbol_table.exit_scope()
         
-        return True
+        return
     
     def visit_WhileNode(self, node):
         """
         Visita un nodo de bucle while.
         """
-        print(f"Visitando WhileNode")
+        _trace.debug("Visitando WhileNode")
         
         # Visitar la condición
-        self.visit(node.condition)
+        yield self._begin_expression(node, 'condition')
         
         condition_type = node.condition.type
         
         # Verificar que la condición sea booleana
         if condition_type != 'bool' and condition_type is not None:
+            line, column = self._position(node.condition, 0)
             error = TypeError(
                 expected="bool",
                 found=condition_type,
                 message="La condición del 'mientras' debe ser booleana",
-                line=node.condition.line,
-                column=node.condition.column
+                line=line,
+                column=column
             )
             self.error_collection.add_error(error)
-            return False
+            return
         
         # Visitar el bloque con nuevo ámbito
         self.symbol_table.enter_scope()
-        self.visit(node.body)
+        yield node.body
         self.symbol_table.exit_scope()
         
-        return True
+        return
     
     def visit_RepeatNode(self, node):
         """
         Visita un nodo de bucle repeat.
         """
-        print(f"Visitando RepeatNode")
+        _trace.debug("Visitando RepeatNode")
         
         # Visitar la expresión de conteo
-        self.visit(node.count)
+        yield self._begin_expression(node, 'count')
         
         count_type = node.count.type
         
         # Verificar que el contador sea entero
         if count_type != 'ent' and count_type is not None:
+            line, column = self._position(node.count, 0)
             error = TypeError(
                 expected="ent",
                 found=count_type,
                 message="El número de repeticiones debe ser entero",
-                line=node.count.line,
-                column=node.count.column
+                line=line,
+                column=column
             )
             self.error_collection.add_error(error)
-            return False
+            return
         
         # Visitar el bloque con nuevo ámbito
         self.symbol_table.enter_scope()
-        self.visit(node.body)
+        yield node.body
         self.symbol_table.exit_scope()
         
-        return True
+        return
     
     def visit_PrintNode(self, node):
         """
         Visita un nodo de impresión.
         """
-        print(f"Visitando PrintNode")
+        _trace.debug("Visitando PrintNode")
         
         # Visitar la expresión a imprimir
-        self.visit(node.expression)
+        self.visit(self._begin_expression(node, 'expression'))
         
         return True
     
@@ -896,13 +572,13 @@ class SemanticVisitor(ASTVisitor):
         """
         Visita un nodo de entrada.
         """
-        print(f"Visitando InputNode")
+        _trace.debug("Visitando InputNode")
         
-        var_name = node.variable.name
-        symbol = self.symbol_table.lookup(var_name)
+        variable = self._begin_expression(node, 'variable')
+        symbol = self._lookup(variable)
         
         if not symbol:
-            error = UndeclaredError(var_name, node.variable.line, node.variable.column)
+            error = UndeclaredError(variable.name, *self._position(variable, 0))
             self.error_collection.add_error(error)
             return False
         
@@ -914,20 +590,18 @@ class SemanticVisitor(ASTVisitor):
         """
         Visita un nodo de bloque.
         """
-        print(f"Visitando BlockNode con {len(node.statements)} instrucciones")
+        _trace.debug("Visitando BlockNode con %s instrucciones", len(node.statements))
         
         # Visitar todas las instrucciones del bloque
-        for statement in node.statements:
-            self.visit(statement)
-        
-        return True
+        return iter(node.statements)
     
     def visit_NumberNode(self, node):
         """
         Visita un nodo de número.
         """
         # El tipo ya está establecido durante la construcción del AST
-        print(f"Visitando NumberNode: {node.value} de tipo {node.type}")
+        self._next_leaf()
+        _trace.debug("Visitando NumberNode: %s de tipo %s", node.value, node.type)
         return True
     
     def visit_StringNode(self, node):
@@ -935,29 +609,45 @@ class SemanticVisitor(ASTVisitor):
         Visita un nodo de cadena.
         """
         # El tipo ya está establecido durante la construcción del AST
-        print(f"Visitando StringNode: {node.value} de tipo {node.type}")
+        self._next_leaf()
+        _trace.debug("Visitando StringNode: %s de tipo %s", node.value, node.type)
         return True
     
     def visit_VariableNode(self, node):
         """
         Visita un nodo de variable.
         """
-        print(f"Visitando VariableNode: {node.name}")
+        _trace.debug("Visitando VariableNode: %s", node.name)
+        
+        leaf = self._next_leaf()
+        
+        # Sin atributos de otra aparición del nodo (parse(hash_cons=True))
+        node.type = None
+        node.value = None
         
         # Buscar la variable en la tabla de símbolos
-        symbol = self.symbol_table.lookup(node.name)
+        symbol = self._lookup(node)
         
         if not symbol:
-            error = UndeclaredError(node.name, node.line, node.column)
+            error = UndeclaredError(node.name, *self._position(node, leaf))
             self.error_collection.add_error(error)
             return False
         else:
             # Propagar el tipo y valor
             node.type = symbol.type
             node.value = symbol.value
-            print(f"  Asignado tipo {node.type} a variable {node.name}")
+            _trace.debug("  Asignado tipo %s a variable %s", node.type, node.name)
             return True
     
+    def visit_ErrorNode(self, node):
+        """
+        Visita una instrucción descartada por el parser en modo recuperación.
+        
+        El error sintáctico ya está registrado; no se analiza nada más.
+        """
+        _trace.debug("Omitiendo ErrorNode en línea %s", node.line)
+        return True
+    
     def are_types_compatible(self, target_type, source_type):
         """
         Verifica si dos tipos son compatibles para asignación.
@@ -974,6 +664,72 @@ class SemanticVisitor(ASTVisitor):
             return True
         
         return False
+    
+    def _begin_expression(self, node, field):
+        """
+        Prepara las posiciones de la expresión de un campo de una sentencia.
+        
+        Con parse(hash_cons=True) los nodos de una expresión se comparten
+        entre todas sus apariciones y no guardan posición: la de cada hoja
+        de esta aparición se toma de la PositionTable, en el mismo orden en
+        que se visitan (de izquierda a derecha).
+        
+        Args:
+            node (ASTNode): Sentencia
+            field (str): Campo de la sentencia con la expresión
+        
+        Returns:
+            ASTNode: La expresión
+        """
+        if self.positions is not None:
+            self._occurrence = self.positions.get(node, field)
+        self._leaf = 0
+        return getattr(node, field)
+    
+    def _next_leaf(self):
+        """
+        Cuenta la visita de una hoja de la expresión actual.
+        
+        Returns:
+            int: Índice de la hoja en la aparición
+        """
+        leaf = self._leaf
+        self._leaf += 1
+        return leaf
+    
+    def _position(self, node, leaf):
+        """
+        Obtiene la línea y la columna de un nodo de la expresión actual.
+        
+        Args:
+            node (ASTNode): Nodo de la expresión
+            leaf (int): Índice en la aparición de la primera hoja del nodo
+        
+        Returns:
+            tuple: (línea, columna)
+        """
+        if leaf < len(self._occurrence):
+            _, line, column = self._occurrence[leaf]
+            return line, column
+        return node.line, node.column
+    
+    def _lookup(self, node):
+        """
+        Busca en la tabla de símbolos la variable de un nodo.
+        
+        Usa el número de símbolo asignado al construir el AST y, si el nodo
+        no lo tiene, su nombre.
+        
+        Args:
+            node (IdentifierNode | VariableNode): Nodo con la variable
+        
+        Returns:
+            Symbol: El símbolo encontrado o None si no existe
+        """
+        symbol_id = getattr(node, 'symbol_id', None)
+        if symbol_id is None:
+            return self.symbol_table.lookup(node.name)
+        return self.symbol_table.lookup_id(symbol_id)
 
 class SemanticController:
     """
@@ -990,32 +746,63 @@ class SemanticController:
         self.symbol_table = SymbolTable()
         self.visitor = None  # Lo crearemos nuevo en cada análisis
     
-    def analyze(self, ast):
+    def analyze(self, ast, positions=None):
         """
         Realiza el análisis semántico del AST.
+        
+        Args:
+            ast: Nodo raíz del AST
+            positions (PositionTable, optional): Posiciones de las
+                expresiones compartidas (ParserController.positions); hace
+                falta si el AST se construyó con parse(hash_cons=True), para
+                que cada error indique la aparición en la que se produce
         """
         if ast is None:
-            print("Error: AST es None")
+            _trace.warning("AST es None")
             return False
         
-        print(f"Iniciando análisis semántico. Tipo de AST: {type(ast).__name__}")
+        _trace.debug("Iniciando análisis semántico. Tipo de AST: %s", type(ast).__name__)
         
         # Limpiar errores semánticos
         self.error_collection.semantic_errors.clear()
         
         # Crear una nueva tabla de símbolos y un nuevo visitor cada vez
         self.symbol_table = SymbolTable()
-        self.visitor = SemanticVisitor(self.symbol_table, self.error_collection)
+        self.visitor = SemanticVisitor(self.symbol_table, self.error_collection, positions)
         
         # Ejecutar el análisis semántico
         result = self.visitor.visit(ast)
         
         # Para depuración
-        print(f"Análisis semántico completado. Resultado: {result}")
-        print(f"Símbolos encontrados: {len(self.symbol_table.get_all_symbols())}")
-        for symbol in self.symbol_table.get_all_symbols():
-            print(f"  - {symbol.name} ({symbol.type})")
+        _trace.debug("Análisis semántico completado. Resultado: %s", result)
+        if _trace.enabled:
+            symbols = self.symbol_table.get_all_symbols()
+            _trace.debug("Símbolos encontrados: %s", len(symbols))
+            for symbol in symbols:
+                _trace.debug("  - %s (%s)", symbol.name, symbol.type)
+        
+        return result
+    
+    def analyze_revision(self, revision):
+        """
+        Realiza el análisis semántico de una revisión de un AST persistente.
+        
+        Los nodos vuelven primero a sus atributos iniciales, porque los
+        compartidos pueden conservar los de otra revisión; tras el análisis,
+        sus atributos y los errores semánticos quedan registrados en la
+        revisión, sin afectar a las demás. La tabla de símbolos es la del
+        último análisis, como con analyze().
+        
+        Args:
+            revision (ASTRevision): Revisión a analizar
         
+        Returns:
+            bool: True si no hay errores semánticos
+        """
+        revision.reset()
+        result = self.analyze(revision.root)
+        revision.snapshot()
+        revision.semantic_errors = list(self.error_collection.semantic_errors)
         return result
     
     def get_symbol_table(self):
@@ -0,0 +1,74 @@
+from operator import attrgetter
+
+from models.token import TokenBuffer
+
+_get_type = attrgetter('type')
+
+
+class SyntaxValidator:
+    """
+    Reconocedor sintáctico que recorre el autómata LALR sin construir el AST.
+    
+    Solo mantiene la pila de estados: los tokens no se apilan y las
+    reducciones no crean nodos, así que la memoria usada depende de la
+    profundidad de anidamiento y no del número de tokens. Con un TokenBuffer
+    los tipos se leen directamente de sus arreglos, sin crear una vista por
+    token.
+    """
+    def __init__(self, tables):
+        """
+        Inicializa el reconocedor.
+        
+        Args:
+            tables (LALRTables): Tablas LALR compactas de la gramática
+        """
+        self.tables = tables
+    
+    def check(self, tokens):
+        """
+        Comprueba si una secuencia de tokens pertenece al lenguaje.
+        
+        Args:
+            tokens (iterable): Tokens (TokenBuffer o tokens con atributo type)
+        
+        Returns:
+            tuple: None si la secuencia es válida; si no, (índice del token
+                inesperado, o el número de tokens si el error es el fin de
+                archivo, terminales esperados)
+        """
+        tables = self.tables
+        states = tables.states
+        rules = tables.rules
+        
+        if isinstance(tokens, TokenBuffer):
+            types = map(tokens.kind_names.__getitem__, tokens.kinds)
+        else:
+            types = map(_get_type, tokens)
+        
+        stack = [tables.start_state]
+        index = -1
+        for index, type in enumerate(types):
+            while True:
+                action = states[stack[-1]].get(type)
+                if action is None:
+                    return index, tables.get_expected(stack[-1])
+                if action >= 0:
+                    stack.append(action)
+                    break
+                origin, size = rules[~action]
+                if size:
+                    del stack[-size:]
+                stack.append(states[stack[-1]][origin])
+        
+        # Fin de archivo: reducir hasta aceptar la regla inicial
+        end_state = tables.end_state
+        while True:
+            action = states[stack[-1]].get('$END')
+            if action is None or action >= 0:
+                return index + 1, tables.get_expected(stack[-1])
+            origin, size = rules[~action]
+            if size:
+                del stack[-size:]
+            stack.append(states[stack[-1]][origin])
+            if stack[-1] == end_state:
+                return None
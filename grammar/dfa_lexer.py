@@ -0,0 +1,418 @@
+"""
+Lexer basado en un autómata finito determinista (DFA) con tabla de transiciones.
+
+El conjunto de tokens del lenguaje es pequeño y fijo, así que en lugar de
+probar una alternancia de expresiones regulares en cada posición, el código
+se recorre carácter a carácter sobre una tabla precalculada (estado x clase
+de carácter). Las palabras reservadas se reconocen como IDENTIFICADOR y se
+reetiquetan con una tabla hash perfecta.
+
+Los estados de números, identificadores, cadenas, espacios y comentarios
+están escritos a mano; los operadores y signos de puntuación se toman de los
+literales de la gramática. Se aplica la regla del token más largo, que para
+esta gramática da los mismos tokens que el lexer básico de Lark.
+"""
+
+from lark import Token as LarkToken
+from lark.exceptions import UnexpectedCharacters
+
+# Terminales de expresión regular que reconocen los estados escritos a mano
+COMENTARIO = 'COMENTARIO'
+IDENTIFICADOR = 'IDENTIFICADOR'
+ENTERO = 'ENTERO'
+DECIMAL = 'DECIMAL'
+STRING = 'STRING'
+ESPACIO = 'ESPACIO'
+REGEX_TERMINALS = frozenset((COMENTARIO, IDENTIFICADOR, ENTERO, DECIMAL, STRING, ESPACIO))
+
+# Clases de carácter fijas (el resto se asignan a los caracteres de los literales)
+CLASS_OTHER = 0
+CLASS_LETTER = 1
+CLASS_DIGIT = 2
+CLASS_DOT = 3
+CLASS_QUOTE = 4
+CLASS_NEWLINE = 5
+CLASS_SPACE = 6
+CLASS_SLASH = 7
+CLASS_STAR = 8
+
+LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_'
+DIGITS = '0123456789'
+
+# Estados: 0 es el estado muerto (sin transición) y 1 el inicial
+DEAD = 0
+START = 1
+
+
+class KeywordTable:
+    """
+    Tabla de palabras reservadas indexada con una función hash perfecta.
+    
+    La función usa el primer y el último carácter y la longitud de la palabra;
+    el multiplicador y el tamaño se eligen al construir la tabla para que no
+    haya colisiones.
+    """
+    def __init__(self, words):
+        """
+        Construye la tabla.
+        
+        Args:
+            words (dict): Palabra reservada -> tipo de token
+        
+        Raises:
+            ValueError: Si no se encuentra una función sin colisiones
+        """
+        self.multiplier, self.size = self._find_hash(words)
+        self.slots = [None] * self.size
+        for word, type in words.items():
+            self.slots[self._hash(word)] = (word, type)
+    
+    def _find_hash(self, words):
+        """
+        Busca el multiplicador y el tamaño de tabla más pequeños sin colisiones.
+        
+        Args:
+            words (dict): Palabras reservadas
+        
+        Returns:
+            tuple: (multiplicador, tamaño)
+        """
+        if not words:
+            return 1, 1
+        
+        for size in range(len(words), 8 * len(words) + 1):
+            for multiplier in range(1, 256):
+                slots = {(ord(w[0]) * multiplier + ord(w[-1]) + len(w)) % size for w in words}
+                if len(slots) == len(words):
+                    return multiplier, size
+        
+        raise ValueError("No se encontró una función hash perfecta para las palabras reservadas")
+    
+    def _hash(self, word):
+        """
+        Calcula la posición de una palabra en la tabla.
+        
+        Args:
+            word (str): Palabra no vacía
+        
+        Returns:
+            int: Índice en la tabla
+        """
+        return (ord(word[0]) * self.multiplier + ord(word[-1]) + len(word)) % self.size
+    
+    def get(self, word, default=None):
+        """
+        Obtiene el tipo de token de una palabra reservada.
+        
+        Args:
+            word (str): Identificador a consultar
+            default (str, optional): Valor si no es una palabra reservada
+        
+        Returns:
+            str: Tipo de token, o `default`
+        """
+        slot = self.slots[(ord(word[0]) * self.multiplier + ord(word[-1]) + len(word)) % self.size]
+        if slot is not None and slot[0] == word:
+            return slot[1]
+        return default
+
+
+class DFALexer:
+    """
+    Lexer dirigido por tabla que produce los mismos tokens y errores que el
+    lexer básico de Lark para la gramática del lenguaje.
+    """
+    def __init__(self, spec, lexer):
+        """
+        Construye las tablas del autómata.
+        
+        Args:
+            spec (TerminalSpec): Terminales, literales y palabras reservadas
+            lexer (BasicLexer): Lexer de Lark, usado para describir los errores
+        
+        Raises:
+            ValueError: Si la gramática define terminales que el autómata no reconoce
+        """
+        regex_terminals = {name for name, _ in spec.patterns} - set(spec.literals.values())
+        if regex_terminals != REGEX_TERMINALS:
+            raise ValueError("El lexer DFA no reconoce los terminales: %s"
+                             % ', '.join(sorted(regex_terminals ^ REGEX_TERMINALS)))
+        
+        self.lexer = lexer
+        self.keywords = KeywordTable(spec.keywords.get(IDENTIFICADOR, {}))
+        self.ignore_types = spec.ignore_types
+        self.newline_types = spec.newline_types
+        self._build_classes(spec.literals)
+        self._build_states(spec.literals)
+    
+    def _build_classes(self, literals):
+        """
+        Asigna una clase a cada carácter ASCII.
+        
+        Args:
+            literals (dict): Literal -> tipo de token
+        """
+        classes = [CLASS_OTHER] * 128
+        for char in LETTERS:
+            classes[ord(char)] = CLASS_LETTER
+        for char in DIGITS:
+            classes[ord(char)] = CLASS_DIGIT
+        classes[ord('.')] = CLASS_DOT
+        classes[ord('"')] = CLASS_QUOTE
+        classes[ord('\n')] = CLASS_NEWLINE
+        for char in ' \t\r':
+            classes[ord(char)] = CLASS_SPACE
+        classes[ord('/')] = CLASS_SLASH
+        classes[ord('*')] = CLASS_STAR
+        
+        # Una clase propia para cada carácter de operador o puntuación
+        self.class_count = CLASS_STAR + 1
+        for literal in literals:
+            for char in literal:
+                if classes[ord(char)] in (CLASS_LETTER, CLASS_DIGIT, CLASS_QUOTE,
+                                          CLASS_NEWLINE, CLASS_SPACE):
+                    raise ValueError(f"El lexer DFA no admite el literal '{literal}'")
+                if classes[ord(char)] == CLASS_OTHER:
+                    classes[ord(char)] = self.class_count
+                    self.class_count += 1
+        
+        self.char_classes = classes
+        self.class_bytes = bytes(classes + [CLASS_OTHER] * 128)
+    
+    def _add_state(self, accept=None):
+        """
+        Añade un estado sin transiciones.
+        
+        Args:
+            accept (str, optional): Tipo de token si el estado es de aceptación
+        
+        Returns:
+            int: Índice del estado
+        """
+        self.transitions.append([DEAD] * self.class_count)
+        self.accept.append(accept)
+        return len(self.transitions) - 1
+    
+    def _build_states(self, literals):
+        """
+        Construye la tabla de transiciones.
+        
+        Args:
+            literals (dict): Literal -> tipo de token
+        """
+        self.transitions = []
+        self.accept = []
+        self._add_state()
+        self._add_state()
+        table = self.transitions
+        
+        def loop(state, classes):
+            for cls in classes:
+                table[state][cls] = state
+        
+        # Identificadores y palabras reservadas
+        identifier = self._add_state(IDENTIFICADOR)
+        table[START][CLASS_LETTER] = identifier
+        loop(identifier, (CLASS_LETTER, CLASS_DIGIT))
+        
+        # Enteros y decimales
+        integer = self._add_state(ENTERO)
+        integer_dot = self._add_state()
+        decimal = self._add_state(DECIMAL)
+        table[START][CLASS_DIGIT] = integer
+        loop(integer, (CLASS_DIGIT,))
+        table[integer][CLASS_DOT] = integer_dot
+        table[integer_dot][CLASS_DIGIT] = decimal
+        loop(decimal, (CLASS_DIGIT,))
+        
+        # Cadenas (pueden ocupar varias líneas)
+        string_body = self._add_state()
+        string_end = self._add_state(STRING)
+        table[START][CLASS_QUOTE] = string_body
+        loop(string_body, range(self.class_count))
+        table[string_body][CLASS_QUOTE] = string_end
+        
+        # Espacios y saltos de línea
+        space = self._add_state(ESPACIO)
+        table[START][CLASS_SPACE] = space
+        table[START][CLASS_NEWLINE] = space
+        loop(space, (CLASS_SPACE, CLASS_NEWLINE))
+        
+        # Operadores y signos de puntuación: un árbol de prefijos
+        prefixes = {}
+        for literal, type in sorted(literals.items()):
+            state = START
+            for index, char in enumerate(literal):
+                prefix = literal[:index + 1]
+                if prefix not in prefixes:
+                    prefixes[prefix] = self._add_state()
+                    table[state][self.char_classes[ord(char)]] = prefixes[prefix]
+                state = prefixes[prefix]
+            self.accept[state] = type
+        
+        # Comentarios: tras '/' sigue '/' o '*'
+        slash = prefixes.get('/')
+        if slash is None:
+            slash = self._add_state()
+            table[START][CLASS_SLASH] = slash
+        if table[slash][CLASS_SLASH] != DEAD or table[slash][CLASS_STAR] != DEAD:
+            raise ValueError("El lexer DFA no admite literales que empiecen por '//' o '/*'")
+        
+        line_comment = self._add_state(COMENTARIO)
+        table[slash][CLASS_SLASH] = line_comment
+        loop(line_comment, range(self.class_count))
+        table[line_comment][CLASS_NEWLINE] = DEAD
+        
+        # Un '/*' sin cierre no es comentario: se vuelve al último estado de aceptación
+        block_body = self._add_state()
+        block_star = self._add_state()
+        block_end = self._add_state(COMENTARIO)
+        table[slash][CLASS_STAR] = block_body
+        loop(block_body, range(self.class_count))
+        table[block_body][CLASS_STAR] = block_star
+        table[block_star][:] = table[block_body]
+        table[block_star][CLASS_SLASH] = block_end
+    
+    def classify(self, code):
+        """
+        Convierte el código en la secuencia de clases de sus caracteres.
+        
+        Quien llame a `scan` varias veces sobre el mismo código (por ejemplo,
+        para continuar tras cada error) puede calcularla una sola vez.
+        
+        Args:
+            code (str): Código fuente
+        
+        Returns:
+            bytes: Clase de cada carácter (los no ASCII son CLASS_OTHER)
+        """
+        if code.isascii():
+            return code.encode('ascii').translate(self.class_bytes)
+        classes = self.char_classes
+        return bytes(classes[ord(c)] if c < '\x80' else CLASS_OTHER for c in code)
+    
+    def scan(self, code, start=0, line=1, column=1, classes=None):
+        """
+        Recorre el código generando la posición de cada token.
+        
+        Args:
+            code (str): Código fuente
+            start (int, optional): Posición desde la que continuar
+            line (int, optional): Línea de la posición inicial
+            column (int, optional): Columna de la posición inicial
+            classes (bytes, optional): Clases de los caracteres de todo el
+                código (ver `classify`); por defecto se calculan aquí
+        
+        Returns:
+            generator: Tuplas (tipo, inicio, fin, línea, columna) de los
+                tokens no ignorados
+        
+        Raises:
+            UnexpectedCharacters: Si ningún token empieza en una posición,
+                con el mismo mensaje que el lexer de Lark
+        """
+        if classes is None:
+            classes = self.classify(code)
+        table = self.transitions
+        accept = self.accept
+        keywords = self.keywords
+        ignore_types = self.ignore_types
+        newline_types = self.newline_types
+        
+        pos = start
+        end = len(code)
+        line_start = start - column + 1
+        last_token = None
+        
+        while pos < end:
+            # Avanzar mientras haya transición, recordando la última aceptación
+            state = START
+            index = pos
+            token_end = -1
+            while index < end:
+                state = table[state][classes[index]]
+                if state == DEAD:
+                    break
+                index += 1
+                if accept[state] is not None:
+                    type = accept[state]
+                    token_end = index
+            
+            if token_end < 0:
+                raise self._error(code, pos, line, pos - line_start + 1, last_token)
+            
+            if type in ignore_types:
+                pass
+            elif type == IDENTIFICADOR:
+                type = keywords.get(code[pos:token_end], type)
+                last_token = (type, pos, token_end, line, pos - line_start + 1)
+                yield last_token
+            else:
+                last_token = (type, pos, token_end, line, pos - line_start + 1)
+                yield last_token
+            
+            if type in newline_types:
+                newline = code.rfind('\n', pos, token_end)
+                if newline >= 0:
+                    line += code.count('\n', pos, token_end)
+                    line_start = newline + 1
+            
+            pos = token_end
+    
+    def lex(self, code):
+        """
+        Tokeniza el código generando tokens de Lark, como `GrammarRegistry.lex`.
+        
+        Args:
+            code (str): Código fuente
+        
+        Returns:
+            generator: Tokens de Lark
+        
+        Raises:
+            UnexpectedCharacters: Si se encuentra un carácter inválido
+        """
+        for entry in self.scan(code):
+            yield self._make_token(code, entry)
+    
+    def _make_token(self, code, entry):
+        """
+        Construye un token de Lark a partir de una tupla de `scan`.
+        
+        Args:
+            code (str): Código fuente
+            entry (tuple): (tipo, inicio, fin, línea, columna)
+        
+        Returns:
+            Token: Token de Lark con todas sus posiciones
+        """
+        type, start, end, line, column = entry
+        value = code[start:end]
+        newline = value.rfind('\n') if type in self.newline_types else -1
+        if newline < 0:
+            end_line, end_column = line, column + len(value)
+        else:
+            end_line, end_column = line + value.count('\n'), len(value) - newline
+        return LarkToken(type, value, start, line, column, end_line, end_column, end)
+    
+    def _error(self, code, pos, line, column, last_token):
+        """
+        Construye el error de un carácter no reconocido igual que Lark.
+        
+        Args:
+            code (str): Código fuente
+            pos (int): Posición del carácter
+            line (int): Línea del carácter
+            column (int): Columna del carácter
+            last_token (tuple): Último token generado, o None
+        
+        Returns:
+            UnexpectedCharacters: Error a lanzar
+        """
+        allowed = self.lexer.scanner.allowed_types - self.lexer.ignore_types
+        if not allowed:
+            allowed = {"<END-OF-FILE>"}
+        history = last_token and [self._make_token(code, last_token)]
+        return UnexpectedCharacters(code, pos, line, column, allowed=allowed,
+                                    token_history=history,
+                                    terminals_by_name=self.lexer.terminals_by_name)
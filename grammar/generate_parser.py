@@ -0,0 +1,467 @@
+"""
+Generador del parser autónomo.
+
+Construye con Lark las tablas LALR de la gramática y escribe un módulo de
+Python (grammar/standalone_parser.py) que contiene las tablas, el autómata
+que las recorre y las acciones del ASTBuilder, de modo que analizar no
+requiere importar Lark ni construir o cargar las tablas.
+
+Uso:
+    python -m grammar.generate_parser [-o ruta_de_salida]
+
+El módulo generado guarda el hash de los archivos de los que depende
+(SOURCE_FILES); si alguno cambia, el registro de gramática deja de usarlo
+hasta que se vuelva a generar.
+"""
+
+import argparse
+import ast
+import inspect
+import os
+import pprint
+
+from grammar.registry import (get_registry, hash_sources, LALRTables, ROOT_DIR,
+                              STANDALONE_PATH, STANDALONE_SOURCES)
+
+# Encabezado del módulo generado
+HEADER = '''"""
+Parser LALR autónomo de la gramática grammar/language_grammar.lark.
+
+ARCHIVO GENERADO: no editar. Para actualizarlo, ejecutar
+    python -m grammar.generate_parser
+
+No importa Lark: contiene las tablas LALR, el autómata que las recorre y una
+copia del ASTBuilder y del ExpressionParser sin las dependencias de Lark.
+Acepta los mismos tokens que el parser de Lark (cualquier objeto con type,
+value, line y column).
+"""
+
+from models.ast_nodes import *
+from models.interner import get_interner
+from models.token import Token
+
+'''
+
+# Autómata y clases auxiliares del módulo generado
+RUNTIME = '''
+
+class Tree:
+    """
+    Nodo genérico para las reglas sin acción en el constructor (equivalente
+    al Tree de Lark).
+    """
+    def __init__(self, data, children, meta=None):
+        self.data = data
+        self.children = children
+    
+    def __repr__(self):
+        return 'Tree(%r, %r)' % (self.data, self.children)
+
+
+class UnexpectedToken(Exception):
+    """
+    Token que no encaja en ninguna acción del estado actual.
+    """
+    def __init__(self, token, expected):
+        self.token = token
+        self.expected = expected
+        self.line = getattr(token, 'line', '?')
+        self.column = getattr(token, 'column', '?')
+        super().__init__(token, expected)
+    
+    def __str__(self):
+        return ("Unexpected token %r at line %s, column %s.\\nExpected one of: \\n\\t* %s\\n"
+                % (self.token, self.line, self.column, '\\n\\t* '.join(self.expected)))
+
+
+class Parser:
+    """
+    Parser LALR dirigido por las tablas generadas.
+    """
+    def __init__(self, builder=None):
+        """
+        Inicializa el parser.
+        
+        Args:
+            builder (object, optional): Constructor del AST con un método por
+                regla (por defecto, la copia del ASTBuilder de este módulo);
+                las reglas sin método se construyen con su __default__, si lo
+                tiene, o con Tree
+        """
+        self.builder = builder or ASTBuilder()
+        default = getattr(self.builder, '__default__', None)
+        if default is None:
+            tree = Tree
+        else:
+            def tree(data, children):
+                return default(data, children, None)
+        self.actions = _make_actions(self.builder, tree)
+    
+    def parse(self, tokens):
+        """
+        Analiza una secuencia de tokens.
+        
+        Args:
+            tokens (iterable): Tokens del lexer
+        
+        Returns:
+            object: Valor de la regla inicial (el ProgramNode)
+        
+        Raises:
+            UnexpectedToken: Si un token no encaja en la gramática
+        """
+        states = STATES
+        rules = RULES
+        actions = self.actions
+        state_stack = [START_STATE]
+        value_stack = []
+        
+        token = None
+        for token in tokens:
+            type = token.type
+            while True:
+                action = states[state_stack[-1]].get(type)
+                if action is None:
+                    raise self._error(token, state_stack)
+                if action >= 0:
+                    state_stack.append(action)
+                    value_stack.append(token)
+                    break
+                
+                origin, size = rules[~action]
+                if size:
+                    values = value_stack[-size:]
+                    del state_stack[-size:]
+                    del value_stack[-size:]
+                else:
+                    values = []
+                state_stack.append(states[state_stack[-1]][origin])
+                value_stack.append(actions[~action](values))
+        
+        if token is None:
+            end = Token('$END', '', 1, 1, 0, 0)
+        else:
+            end = Token('$END', '', token.line, token.column,
+                        getattr(token, 'start_pos', None), getattr(token, 'end_pos', None))
+        while True:
+            action = states[state_stack[-1]].get('$END')
+            if action is None or action >= 0:
+                raise self._error(end, state_stack)
+            
+            origin, size = rules[~action]
+            if size:
+                values = value_stack[-size:]
+                del state_stack[-size:]
+                del value_stack[-size:]
+            else:
+                values = []
+            state_stack.append(states[state_stack[-1]][origin])
+            value_stack.append(actions[~action](values))
+            if state_stack[-1] == END_STATE:
+                return value_stack[-1]
+    
+    def _error(self, token, state_stack):
+        """
+        Crea el error de un token inesperado con los terminales aceptados.
+        """
+        expected = sorted(t for t in STATES[state_stack[-1]] if t.isupper() and _accepts(state_stack, t))
+        return UnexpectedToken(token, expected)
+
+
+def _accepts(state_stack, type):
+    """
+    Comprueba si un terminal se puede desplazar tras las reducciones que provoca.
+    """
+    stack = list(state_stack)
+    while True:
+        action = STATES[stack[-1]].get(type)
+        if action is None:
+            return False
+        if action >= 0:
+            return True
+        origin, size = RULES[~action]
+        if size:
+            del stack[-size:]
+        stack.append(STATES[stack[-1]][origin])
+        if type == '$END' and stack[-1] == END_STATE:
+            return True
+
+
+def parse(tokens):
+    """
+    Analiza una secuencia de tokens con la copia del ASTBuilder.
+    
+    Args:
+        tokens (iterable): Tokens del lexer
+    
+    Returns:
+        ProgramNode: Raíz del AST
+    """
+    return Parser().parse(tokens)
+'''
+
+
+def _copy_module_body(path):
+    """
+    Obtiene el código de un módulo sin sus importaciones.
+    
+    Args:
+        path (str): Ruta del módulo
+    
+    Returns:
+        str: Código fuente sin las líneas import
+    """
+    with open(path, 'r') as f:
+        source = f.read()
+    lines = source.splitlines(True)
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            for i in range(node.lineno - 1, node.end_lineno):
+                lines[i] = ''
+    return ''.join(lines).strip('\n') + '\n'
+
+
+def _is_inline_v_args(decorator):
+    """
+    Comprueba si un decorador es @v_args(inline=True).
+    """
+    return (isinstance(decorator, ast.Call) and getattr(decorator.func, 'id', None) == 'v_args'
+            and any(k.arg == 'inline' and getattr(k.value, 'value', None) is True
+                    for k in decorator.keywords))
+
+
+def _is_super_init(statement):
+    """
+    Comprueba si una sentencia es la llamada super().__init__().
+    """
+    return (isinstance(statement, ast.Expr) and isinstance(statement.value, ast.Call)
+            and isinstance(statement.value.func, ast.Attribute)
+            and statement.value.func.attr == '__init__'
+            and isinstance(statement.value.func.value, ast.Call)
+            and getattr(statement.value.func.value.func, 'id', None) == 'super')
+
+
+def _copy_builder(builder_class):
+    """
+    Copia el código del constructor del AST sin las dependencias de Lark.
+    
+    Se eliminan la clase base (Transformer), los decoradores @v_args y la
+    llamada a super().__init__(); el resto del código (comentarios incluidos)
+    se conserva.
+    
+    Args:
+        builder_class (type): Clase ASTBuilder
+    
+    Returns:
+        tuple: (código de la clase, conjunto de métodos que reciben los
+            hijos como argumentos)
+    
+    Raises:
+        ValueError: Si un método usa un decorador no soportado
+    """
+    path = inspect.getsourcefile(builder_class)
+    with open(path, 'r') as f:
+        source = f.read()
+    lines = source.splitlines(True)
+    
+    tree = ast.parse(source)
+    class_node = next(node for node in tree.body
+                      if isinstance(node, ast.ClassDef) and node.name == builder_class.__name__)
+    
+    inline = set()
+    for node in class_node.body:
+        if not isinstance(node, ast.FunctionDef):
+            continue
+        for decorator in node.decorator_list:
+            if not _is_inline_v_args(decorator):
+                raise ValueError(f"Decorador no soportado en {builder_class.__name__}.{node.name}")
+            inline.add(node.name)
+            for i in range(decorator.lineno - 1, decorator.end_lineno):
+                lines[i] = ''
+        for statement in node.body:
+            if _is_super_init(statement):
+                for i in range(statement.lineno - 1, statement.end_lineno):
+                    lines[i] = ''
+    
+    body_start = class_node.body[0].lineno - 1
+    header = 'class %s:\n' % class_node.name
+    code = header + ''.join(lines[body_start:class_node.end_lineno])
+    return code, inline
+
+
+def _child_items(rule, keep_all_tokens, maybe_placeholders):
+    """
+    Calcula los hijos que recibe la acción de una regla.
+    
+    Sigue las mismas reglas que el ParseTreeBuilder de Lark: se descartan los
+    tokens anónimos filtrables, se expanden en su lugar los hijos de las
+    reglas que empiezan por '_' y se insertan None en las partes opcionales
+    ausentes ([...]).
+    
+    Args:
+        rule (Rule): Regla de Lark
+        keep_all_tokens (bool): True si la regla conserva todos los tokens (!)
+        maybe_placeholders (bool): Opción de Lark del mismo nombre
+    
+    Returns:
+        list: Elementos ('value', i), ('expand', i) o ('none', None)
+    """
+    expansion = rule.expansion
+    empty_indices = rule.options.empty_indices if maybe_placeholders else None
+    if empty_indices:
+        flags = ''.join(str(int(b)) for b in empty_indices)
+        nones = [len(ones) for ones in flags.split('0')]
+    else:
+        nones = [0] * (len(expansion) + 1)
+    
+    items = []
+    for i, sym in enumerate(expansion):
+        items += [('none', None)] * nones[i]
+        if keep_all_tokens or not (sym.is_term and sym.filter_out):
+            expand = not sym.is_term and sym.name.startswith('_')
+            items.append(('expand' if expand else 'value', i))
+    items += [('none', None)] * nones[len(expansion)]
+    return items
+
+
+def _format_items(items):
+    """
+    Convierte los hijos de una regla en argumentos de una llamada.
+    """
+    args = []
+    for kind, i in items:
+        if kind == 'none':
+            args.append('None')
+        elif kind == 'expand':
+            args.append('*v[%d]' % i)
+        else:
+            args.append('v[%d]' % i)
+    return ', '.join(args)
+
+
+def _generate_action(index, rule, builder_class, inline, maybe_placeholders):
+    """
+    Genera la función que reduce una regla.
+    
+    Args:
+        index (int): Número de la regla
+        rule (Rule): Regla de Lark
+        builder_class (type): Clase del constructor del AST
+        inline (set): Métodos que reciben los hijos como argumentos
+        maybe_placeholders (bool): Opción de Lark del mismo nombre
+    
+    Returns:
+        list: Líneas de la función (sin sangría exterior)
+    """
+    options = rule.options
+    name = rule.alias or options.template_source or rule.origin.name
+    items = _child_items(rule, options.keep_all_tokens, maybe_placeholders)
+    expansion = ' '.join(sym.name for sym in rule.expansion)
+    lines = ['def reduce_%d(v):' % index,
+             ('    # %s: %s' % (rule.origin.name, expansion)).rstrip()]
+    
+    if options.expand1 and not rule.alias:
+        lines.append('    c = [%s]' % _format_items(items))
+        lines.append('    if len(c) == 1:')
+        lines.append('        return c[0]')
+        args = '*c'
+    else:
+        args = _format_items(items)
+    
+    if hasattr(builder_class, name):
+        if name in inline:
+            lines.append('    return b.%s(%s)' % (name, args))
+        else:
+            lines.append('    return b.%s([%s])' % (name, args))
+    elif not rule.origin.name.startswith('_'):
+        lines.append('    return tree(%r, [%s])' % (name, args))
+    elif args.startswith('*v[') and items[0][0] == 'expand':
+        # Regla que se expande en su padre y empieza por otra expansión
+        # (recursión por la izquierda): se reutiliza su lista en lugar de
+        # copiarla, como hace Lark
+        lines.append('    c = v[%d]' % items[0][1])
+        for kind, i in items[1:]:
+            if kind == 'expand':
+                lines.append('    c += v[%d]' % i)
+            else:
+                lines.append('    c.append(%s)' % ('None' if kind == 'none' else 'v[%d]' % i))
+        lines.append('    return c')
+    else:
+        # Regla que se expande en su padre: basta con la lista de hijos
+        lines.append('    return [%s]' % args)
+    return lines
+
+
+def generate(path=STANDALONE_PATH):
+    """
+    Genera el módulo del parser autónomo.
+    
+    Args:
+        path (str, optional): Ruta del archivo a escribir
+    
+    Returns:
+        str: Ruta del archivo escrito
+    """
+    # Importación tardía: el controlador importa el registro
+    from controllers.parser_controller import ASTBuilder
+    
+    registry = get_registry()
+    parser = registry.get_parser()
+    maybe_placeholders = parser.options.maybe_placeholders
+    tables = LALRTables.from_parser(parser)
+    rules = parser.rules
+    
+    builder_code, inline = _copy_builder(ASTBuilder)
+    literal_types = {terminal.pattern.value: terminal.name for terminal in parser.terminals
+                     if terminal.pattern.type == 'str'}
+    
+    out = [HEADER]
+    out.append('# Hash de los archivos de los que se generó este módulo\n')
+    out.append('SOURCE_FILES = %r\n' % (STANDALONE_SOURCES,))
+    out.append('SOURCE_HASH = %r\n\n' % hash_sources(STANDALONE_SOURCES))
+    out.append('# Tipo de token de cada literal de la gramática\n')
+    out.append('LITERAL_TYPES = %s\n\n' % pprint.pformat(literal_types))
+    out.append('START_STATE = %d\n' % tables.start_state)
+    out.append('END_STATE = %d\n\n' % tables.end_state)
+    out.append('# Estado -> {símbolo: acción}; n >= 0 desplaza (o salta) al estado n,\n')
+    out.append('# ~n reduce la regla n\n')
+    out.append('STATES = %s\n\n' % pprint.pformat(tables.states, width=100))
+    out.append('# Regla -> (símbolo de la izquierda, longitud de la derecha)\n')
+    out.append('RULES = %s\n\n\n' % pprint.pformat(tables.rules, width=100))
+    
+    out.append('# ---- controllers/expression_parser.py ----\n\n')
+    out.append(_copy_module_body(os.path.join(ROOT_DIR, 'controllers', 'expression_parser.py')))
+    out.append('\n\n# ---- controllers/parser_controller.py ----\n\n')
+    out.append(builder_code)
+    
+    out.append('\n\ndef _make_actions(b, tree):\n')
+    out.append('    """\n')
+    out.append('    Crea las funciones de reducción de cada regla sobre un constructor.\n')
+    out.append('    """\n')
+    for index, rule in enumerate(rules):
+        for line in _generate_action(index, rule, ASTBuilder, inline, maybe_placeholders):
+            out.append('    ' + line + '\n')
+        out.append('    \n')
+    out.append('    return [%s]\n' % ', '.join('reduce_%d' % i for i in range(len(rules))))
+    out.append(RUNTIME)
+    
+    with open(path, 'w') as f:
+        f.write(''.join(out))
+    return path
+
+
+def main():
+    """
+    Punto de entrada de la línea de comandos.
+    """
+    arg_parser = argparse.ArgumentParser(description="Genera el parser autónomo de la gramática")
+    arg_parser.add_argument('-o', '--output', default=STANDALONE_PATH,
+                            help="Archivo a generar (por defecto, %(default)s)")
+    args = arg_parser.parse_args()
+    
+    path = generate(args.output)
+    print(f"Parser generado en {path}")
+
+
+if __name__ == '__main__':
+    main()
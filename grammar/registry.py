@@ -0,0 +1,437 @@
+"""
+Registro de la gramática compartido por todos los controladores.
+
+La gramática se lee y se compila una sola vez por proceso. Las tablas LALR
+resultantes se guardan en disco (en grammar/__pycache__) con un nombre que
+incluye el hash de la gramática y la versión de Lark, de modo que un
+arranque en frío solo tiene que cargarlas en lugar de construirlas.
+"""
+
+import hashlib
+import importlib
+import os
+import re
+import sys
+from copy import copy
+
+import lark
+from lark import Lark
+from lark.lexer import Lexer, BasicLexer, LexerThread, LexerState, LineCounter, PatternStr, PatternRE
+from lark.parsers.lalr_analysis import Shift
+from lark.utils import TextSlice
+
+from grammar.dfa_lexer import DFALexer
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GRAMMAR_PATH = os.path.join(os.path.dirname(__file__), 'language_grammar.lark')
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '__pycache__')
+
+# Parser autónomo generado por `python -m grammar.generate_parser`
+STANDALONE_MODULE = 'grammar.standalone_parser'
+STANDALONE_PATH = os.path.join(os.path.dirname(__file__), 'standalone_parser.py')
+
+# Archivos (relativos a ROOT_DIR) cuyo contenido se copia en el parser autónomo
+STANDALONE_SOURCES = ('grammar/language_grammar.lark',
+                      'controllers/parser_controller.py',
+                      'controllers/expression_parser.py')
+
+
+def hash_sources(paths):
+    """
+    Calcula el hash SHA-256 conjunto de varios archivos del proyecto.
+    
+    Args:
+        paths (sequence): Rutas relativas a ROOT_DIR
+    
+    Returns:
+        str: Hash en hexadecimal, o None si falta algún archivo
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        try:
+            with open(os.path.join(ROOT_DIR, path), 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            return None
+    return digest.hexdigest()
+
+
+class TokenStreamLexer(Lexer):
+    """
+    Adaptador de Lark que entrega al parser los tokens ya generados por
+    el LexerController, evitando volver a analizar léxicamente el código.
+    """
+    def __init__(self, lexer_conf):
+        """
+        Inicializa el adaptador. No necesita compilar expresiones regulares.
+        
+        Args:
+            lexer_conf (LexerConf): Configuración léxica de Lark (no utilizada)
+        """
+        pass
+    
+    def lex(self, tokens):
+        """
+        Entrega los tokens al parser sin copiarlos.
+        
+        Los tokens propios exponen los mismos atributos que usa Lark (type,
+        value, line, column y posiciones), por lo que no hace falta
+        convertirlos.
+        
+        Args:
+            tokens (iterable): Tokens del lexer (Token propios o de Lark)
+        
+        Returns:
+            iterator: Tokens en el mismo orden
+        """
+        return iter(tokens)
+
+
+class TerminalSpec:
+    """
+    Descripción de los terminales del lenguaje, independiente de Lark.
+    
+    Reproduce las reglas del lexer básico de Lark (orden de prioridad y
+    palabras reservadas que coinciden con IDENTIFICADOR) para que otros
+    lexers produzcan exactamente los mismos tokens.
+    """
+    def __init__(self, lexer):
+        """
+        Construye la descripción a partir del lexer de Lark.
+        
+        Args:
+            lexer (BasicLexer): Lexer con los terminales ya ordenados
+        """
+        # Literales que también coinciden con un terminal de expresión regular
+        # (por ejemplo 'ent' con IDENTIFICADOR): se reconocen como ese terminal
+        # y después se reetiquetan
+        self.keywords = {}
+        embedded = set()
+        regex_terminals = [t for t in lexer.terminals if isinstance(t.pattern, PatternRE)]
+        for literal in lexer.terminals:
+            if not isinstance(literal.pattern, PatternStr):
+                continue
+            for terminal in regex_terminals:
+                if literal.priority != terminal.priority:
+                    continue
+                if re.fullmatch(terminal.pattern.to_regexp(), literal.pattern.value):
+                    self.keywords.setdefault(terminal.name, {})[literal.pattern.value] = literal.name
+                    embedded.add(literal.name)
+        
+        # Terminales en el orden en que se prueban
+        self.patterns = [(t.name, t.pattern.to_regexp())
+                         for t in lexer.terminals if t.name not in embedded]
+        self.literals = {t.pattern.value: t.name for t in lexer.terminals
+                         if isinstance(t.pattern, PatternStr) and t.name not in embedded}
+        self.ignore_types = lexer.ignore_types
+        self.newline_types = lexer.newline_types
+        self._compiled = {}
+    
+    def compile(self, use_bytes=False):
+        """
+        Compila una única expresión regular con un grupo por terminal.
+        
+        Args:
+            use_bytes (bool, optional): True para buscar sobre bytes (por
+                ejemplo, un archivo mapeado en memoria)
+        
+        Returns:
+            re.Pattern: Expresión compilada; `lastgroup` indica el terminal
+        """
+        scanner = self._compiled.get(use_bytes)
+        if scanner is None:
+            pattern = '|'.join('(?P<%s>%s)' % (name, regexp) for name, regexp in self.patterns)
+            if use_bytes:
+                pattern = pattern.encode('latin-1')
+            scanner = re.compile(pattern)
+            self._compiled[use_bytes] = scanner
+        return scanner
+    
+    def get_keywords(self, use_bytes=False):
+        """
+        Obtiene las palabras reservadas por terminal de expresión regular.
+        
+        Args:
+            use_bytes (bool, optional): True para usar literales en bytes
+        
+        Returns:
+            dict: Nombre de terminal -> {literal: tipo de token}
+        """
+        if not use_bytes:
+            return self.keywords
+        return {name: {literal.encode('latin-1'): type for literal, type in words.items()}
+                for name, words in self.keywords.items()}
+
+
+class LALRTables:
+    """
+    Tablas LALR en forma compacta, independiente de Lark.
+    
+    Cada estado es un diccionario símbolo -> acción entera: n >= 0 desplaza
+    (o, para un no terminal, salta) al estado n y ~n reduce la regla n. Cada
+    regla es (símbolo de la izquierda, longitud de la derecha).
+    """
+    def __init__(self, states, rules, start_state, end_state):
+        """
+        Inicializa las tablas.
+        
+        Args:
+            states (dict): Estado -> {símbolo: acción}
+            rules (list): Regla -> (símbolo de la izquierda, longitud)
+            start_state (int): Estado inicial
+            end_state (int): Estado que acepta la regla inicial
+        """
+        self.states = states
+        self.rules = rules
+        self.start_state = start_state
+        self.end_state = end_state
+    
+    @classmethod
+    def from_parser(cls, parser, start='start'):
+        """
+        Convierte las tablas de un parser LALR de Lark.
+        
+        Args:
+            parser (Lark): Parser LALR
+            start (str, optional): Regla inicial
+        
+        Returns:
+            LALRTables: Tablas compactas (las reglas en el orden de parser.rules)
+        """
+        parse_table = parser.parser.parser.parser.parse_table
+        rule_ids = {rule: i for i, rule in enumerate(parser.rules)}
+        
+        # Los nombres se convierten a str: Lark usa Token para los de las
+        # reglas marcadas con '!'
+        states = {}
+        for state, actions in sorted(parse_table.states.items()):
+            states[state] = {str(symbol): arg if action is Shift else ~rule_ids[arg]
+                             for symbol, (action, arg) in sorted(actions.items())}
+        rules = [(str(rule.origin.name), len(rule.expansion)) for rule in parser.rules]
+        return cls(states, rules, parse_table.start_states[start], parse_table.end_states[start])
+    
+    def get_expected(self, state):
+        """
+        Obtiene los terminales con alguna acción en un estado.
+        
+        Args:
+            state (int): Estado del autómata
+        
+        Returns:
+            set: Nombres de los terminales
+        """
+        return {symbol for symbol in self.states[state] if symbol.isupper()}
+
+
+class GrammarRegistry:
+    """
+    Compila la gramática una vez y comparte el parser y el lexer resultantes.
+    """
+    def __init__(self, grammar_path=GRAMMAR_PATH, cache_dir=CACHE_DIR):
+        """
+        Inicializa el registro.
+        
+        Args:
+            grammar_path (str, optional): Ruta del archivo .lark
+            cache_dir (str, optional): Directorio para las tablas serializadas,
+                o None para desactivar la caché en disco
+        """
+        self.grammar_path = grammar_path
+        self.cache_dir = cache_dir
+        self._source = None
+        self._hash = None
+        self._parsers = {}
+        self._lexer = None
+        self._terminal_spec = None
+        self._dfa_lexer = None
+        self._standalone = None
+        self._tables = None
+    
+    def get_source(self):
+        """
+        Obtiene el texto de la gramática, leyéndolo solo la primera vez.
+        
+        Returns:
+            str: Contenido del archivo de gramática
+        """
+        if self._source is None:
+            with open(self.grammar_path, 'r') as f:
+                self._source = f.read()
+        return self._source
+    
+    def get_hash(self):
+        """
+        Obtiene el hash SHA-256 del texto de la gramática.
+        
+        Returns:
+            str: Hash en hexadecimal
+        """
+        if self._hash is None:
+            self._hash = hashlib.sha256(self.get_source().encode('utf-8')).hexdigest()
+        return self._hash
+    
+    def get_cache_path(self):
+        """
+        Obtiene la ruta del archivo de caché para la gramática actual.
+        
+        El nombre depende del hash de la gramática y de las versiones de Lark
+        y Python, así que un cambio en cualquiera de ellos usa otro archivo.
+        
+        Returns:
+            str: Ruta del archivo, o None si la caché está desactivada
+        """
+        if self.cache_dir is None:
+            return None
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except OSError:
+            return None
+        
+        stem = os.path.splitext(os.path.basename(self.grammar_path))[0]
+        name = "%s-%s-lark%s-py%d%d.cache" % (
+            stem, self.get_hash()[:16], lark.__version__, *sys.version_info[:2])
+        return os.path.join(self.cache_dir, name)
+    
+    def get_parser(self, transformer=None):
+        """
+        Obtiene el parser LALR que consume flujos de tokens.
+        
+        Se conserva una instancia por clase de transformador; todas se cargan
+        de las mismas tablas serializadas.
+        
+        Args:
+            transformer (Transformer, optional): Transformador a aplicar
+        
+        Returns:
+            Lark: Parser compartido
+        """
+        key = type(transformer) if transformer is not None else None
+        parser = self._parsers.get(key)
+        
+        if parser is None:
+            cache_path = self.get_cache_path()
+            parser = Lark(self.get_source(), parser='lalr', lexer=TokenStreamLexer,
+                          transformer=transformer, cache=cache_path or False)
+            self._parsers[key] = parser
+        
+        return parser
+    
+    def get_standalone_parser(self):
+        """
+        Obtiene el módulo del parser autónomo, si está generado y al día.
+        
+        Solo se usa si el hash guardado en el módulo coincide con el de los
+        archivos de los que se generó; en otro caso hay que volver a
+        ejecutar `python -m grammar.generate_parser`.
+        
+        Returns:
+            module: Módulo grammar.standalone_parser, o None si no existe o
+                está desactualizado
+        """
+        if self._standalone is None:
+            try:
+                module = importlib.import_module(STANDALONE_MODULE)
+            except ImportError:
+                module = False
+            else:
+                if module.SOURCE_HASH != hash_sources(module.SOURCE_FILES):
+                    module = False
+            self._standalone = module
+        return self._standalone or None
+    
+    def get_tables(self):
+        """
+        Obtiene las tablas LALR compactas de la gramática.
+        
+        Se toman del parser autónomo si está disponible; si no, se convierten
+        las del parser de Lark.
+        
+        Returns:
+            LALRTables: Tablas compartidas
+        """
+        if self._tables is None:
+            module = self.get_standalone_parser()
+            if module is not None:
+                self._tables = LALRTables(module.STATES, module.RULES, module.START_STATE, module.END_STATE)
+            else:
+                self._tables = LALRTables.from_parser(self.get_parser())
+        return self._tables
+    
+    def get_lexer(self):
+        """
+        Obtiene el lexer construido sobre los terminales del parser compartido.
+        
+        Returns:
+            BasicLexer: Lexer de Lark
+        """
+        if self._lexer is None:
+            lexer_conf = copy(self.get_parser().lexer_conf)
+            lexer_conf.lexer_type = 'basic'
+            self._lexer = BasicLexer(lexer_conf)
+        return self._lexer
+    
+    def get_terminal_spec(self):
+        """
+        Obtiene la descripción de terminales para los lexers propios.
+        
+        Returns:
+            TerminalSpec: Terminales, palabras reservadas y tipos ignorados
+        """
+        if self._terminal_spec is None:
+            self._terminal_spec = TerminalSpec(self.get_lexer())
+        return self._terminal_spec
+    
+    def get_dfa_lexer(self):
+        """
+        Obtiene el lexer DFA construido sobre los terminales de la gramática.
+        
+        Returns:
+            DFALexer: Lexer dirigido por tabla
+        """
+        if self._dfa_lexer is None:
+            self._dfa_lexer = DFALexer(self.get_terminal_spec(), self.get_lexer())
+        return self._dfa_lexer
+    
+    def lex(self, code, start=0, line=1, column=1):
+        """
+        Tokeniza el código con el lexer compartido.
+        
+        Args:
+            code (str): Código fuente
+            start (int, optional): Posición desde la que continuar
+            line (int, optional): Línea de la posición inicial
+            column (int, optional): Columna de la posición inicial
+        
+        Returns:
+            iterator: Tokens de Lark
+        
+        Raises:
+            UnexpectedCharacters: Si se encuentra un carácter inválido
+        """
+        if start == 0:
+            return LexerThread.from_text(self.get_lexer(), code).lex(None)
+        
+        line_ctr = LineCounter('\n')
+        line_ctr.char_pos = start
+        line_ctr.line = line
+        line_ctr.column = column
+        line_ctr.line_start_pos = start - column + 1
+        state = LexerState(TextSlice(code, start, len(code)), line_ctr)
+        return LexerThread(self.get_lexer(), state).lex(None)
+
+
+_registry = None
+
+
+def get_registry():
+    """
+    Obtiene el registro de gramática del proceso.
+    
+    Returns:
+        GrammarRegistry: Registro compartido
+    """
+    global _registry
+    if _registry is None:
+        _registry = GrammarRegistry()
+    return _registry
@@ -1,10 +1,15 @@
 # Exportar clases principales
-from models.token import Token
+from models.token import Token, TokenView, TokenBuffer, MappedToken, TokenDelta
+from models.interner import Interner, get_interner
+from models.node_cache import NodeCache, PositionTable
+from models.persistent_ast import AttributeTable, ASTRevision, ASTHistory
+from models.span_index import SpanIndex
+from models.source_index import SourceIndex
 from models.symbol_table import Symbol, SymbolTable
 from models.ast_nodes import (
     ASTNode, ProgramNode, DeclarationNode, IdentifierListNode, IdentifierNode,
     AssignmentNode, BinaryOpNode, UnaryOpNode, NumberNode, StringNode, VariableNode,
-    IfNode, WhileNode, RepeatNode, PrintNode, InputNode, BlockNode
+    IfNode, WhileNode, RepeatNode, PrintNode, InputNode, BlockNode, ErrorNode
 )
 from models.error import (
     CompilerError, LexicalError, SyntaxError, SemanticError,
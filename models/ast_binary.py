@@ -0,0 +1,598 @@
+"""
+Formato binario para guardar y cargar el AST sin volver a analizar el código.
+
+Estructura del archivo (enteros sin signo en varint, little-endian):
+    
+    cabecera   MAGIC (4 bytes), VERSION (1 byte), desplazamiento de la tabla
+               de cadenas (8 bytes)
+    nodos      registro de la raíz, con sus hijos a continuación en preorden
+    cadenas    número de cadenas y, por cada una, longitud y bytes UTF-8
+
+Cada registro empieza con un byte de clase (KINDS; el bit SHARED_FLAG marca
+los nodos a los que apuntan registros REF), seguido de línea, columna, línea
+y columna finales, tipo y valor, de los atributos propios de la clase (cadenas como índices de la
+tabla), del número de elementos de cada campo lista y de los hijos. Los
+bloques guardan además el tamaño en bytes de sus instrucciones, de modo que
+el lector puede saltarlas y construirlas al primer acceso a
+BlockNode.statements.
+"""
+
+import mmap
+import os
+import struct
+from functools import partial
+
+from models.ast_nodes import (
+    ASTNode, ProgramNode, DeclarationNode, IdentifierListNode, IdentifierNode,
+    AssignmentNode, BinaryOpNode, UnaryOpNode, NumberNode, StringNode, VariableNode,
+    IfNode, WhileNode, RepeatNode, PrintNode, InputNode, BlockNode, ErrorNode
+)
+from models.interner import get_interner
+
+MAGIC = b'ASTB'
+VERSION = 2
+
+_HEADER = struct.Struct('<4sBQ')
+_BLOCK_SIZE = struct.Struct('<I')
+_FLOAT = struct.Struct('<d')
+
+# Registros que no son nodos del AST
+KIND_NONE = 0  # Hijo ausente (p. ej. un 'si' sin 'oNo')
+KIND_REF = 1   # Nodo ya escrito: desplazamiento de su registro
+KIND_TREE = 2  # Árbol genérico del parser (data y children)
+
+# Clases de nodo, por número de registro (a partir de 3)
+KINDS = (ProgramNode, DeclarationNode, IdentifierListNode, IdentifierNode,
+         AssignmentNode, BinaryOpNode, UnaryOpNode, NumberNode, StringNode, VariableNode,
+         IfNode, WhileNode, RepeatNode, PrintNode, InputNode, BlockNode, ErrorNode)
+_KIND_OF = {cls: kind for kind, cls in enumerate(KINDS, 3)}
+
+SHARED_FLAG = 0x80
+
+# Atributos propios de cada clase, además del tramo, type y value
+_ATTRIBUTES = {
+    DeclarationNode: ('var_type',),
+    IdentifierNode: ('name',),
+    BinaryOpNode: ('operator',),
+    UnaryOpNode: ('operator',),
+    VariableNode: ('name',),
+    ErrorNode: ('message',),
+}
+
+# Campos de hijos que son listas
+_LIST_FIELDS = frozenset(('children', 'statements'))
+
+# Nodos que pueden estar compartidos (parse(hash_cons=True)); solo estos se
+# escriben una vez y se referencian con REF
+_SHAREABLE = (NumberNode, StringNode, VariableNode, BinaryOpNode, UnaryOpNode)
+
+# Etiquetas de los valores (atributo value)
+_VALUE_NONE, _VALUE_INT, _VALUE_NEGATIVE, _VALUE_FLOAT, _VALUE_STR, _VALUE_TRUE, _VALUE_FALSE = range(7)
+
+# Marca de la pila del escritor: fin de las instrucciones de un bloque
+_BLOCK_END = object()
+
+
+class ASTWriter:
+    """
+    Codifica un AST en el formato binario.
+    
+    El recorrido usa una pila explícita, así que admite ASTs de cualquier
+    profundidad. Los nodos de expresión compartidos se escriben una sola vez.
+    """
+    def __init__(self):
+        """
+        Inicializa un escritor vacío.
+        """
+        self.out = bytearray()
+        self.strings = {}  # Cadena -> índice en la tabla
+    
+    def _string(self, value):
+        """
+        Obtiene el índice de una cadena en la tabla, añadiéndola si no estaba.
+        """
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+        return index
+    
+    def _varint(self, value):
+        """
+        Escribe un entero sin signo en varint.
+        """
+        out = self.out
+        while value >= 0x80:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    
+    def _optional(self, value):
+        """
+        Escribe un entero que puede ser None (0) como varint de value + 1.
+        """
+        self._varint(0 if value is None else value + 1)
+    
+    def _value(self, value):
+        """
+        Escribe el atributo value de un nodo con su etiqueta de tipo.
+        """
+        out = self.out
+        if value is None:
+            out.append(_VALUE_NONE)
+        elif value is True:
+            out.append(_VALUE_TRUE)
+        elif value is False:
+            out.append(_VALUE_FALSE)
+        elif isinstance(value, int):
+            if value >= 0:
+                out.append(_VALUE_INT)
+                self._varint(value)
+            else:
+                out.append(_VALUE_NEGATIVE)
+                self._varint(-value - 1)
+        elif isinstance(value, float):
+            out.append(_VALUE_FLOAT)
+            out += _FLOAT.pack(value)
+        elif isinstance(value, str):
+            out.append(_VALUE_STR)
+            self._varint(self._string(value))
+        else:
+            raise ValueError(f"Valor no serializable en el AST: {type(value).__name__}")
+    
+    def write(self, ast):
+        """
+        Codifica un AST completo.
+        
+        Args:
+            ast (ASTNode): Raíz del AST
+        
+        Returns:
+            bytes: Contenido del archivo
+        """
+        out = self.out
+        out += _HEADER.pack(MAGIC, VERSION, 0)
+        
+        written = {}  # id de un nodo compartible -> desplazamiento de su registro
+        stack = [ast]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                out.append(KIND_NONE)
+                continue
+            if type(node) is tuple:
+                # Fin de un bloque: completar el tamaño de sus instrucciones
+                _, patch = node
+                _BLOCK_SIZE.pack_into(out, patch, len(out) - patch - _BLOCK_SIZE.size)
+                continue
+            
+            if isinstance(node, _SHAREABLE):
+                offset = written.get(id(node))
+                if offset is not None:
+                    # Segunda aparición: marcar el registro original y apuntar a él
+                    out[offset] |= SHARED_FLAG
+                    out.append(KIND_REF)
+                    self._varint(offset)
+                    continue
+                written[id(node)] = len(out)
+            
+            kind = _KIND_OF.get(type(node))
+            if kind is None:
+                if not isinstance(node, ASTNode) and hasattr(node, 'children'):
+                    # Árbol genérico del parser (p. ej. 'sentencia')
+                    out.append(KIND_TREE)
+                    self._varint(self._string(str(node.data)))
+                    self._varint(len(node.children))
+                    stack.extend(reversed(node.children))
+                    continue
+                raise ValueError(f"Nodo no serializable en el AST: {type(node).__name__}")
+            
+            out.append(kind)
+            self._optional(node.line)
+            self._optional(node.column)
+            self._optional(node.end_line)
+            self._optional(node.end_column)
+            self._optional(None if node.type is None else self._string(node.type))
+            self._value(node.value)
+            for name in _ATTRIBUTES.get(type(node), ()):
+                self._varint(self._string(getattr(node, name)))
+            if type(node) is IdentifierListNode:
+                self._varint(len(node.identifiers))
+                for name in node.identifiers:
+                    self._varint(self._string(name))
+            
+            # Número de elementos de los campos lista y, después, los hijos
+            children = []
+            for name in node._fields:
+                value = getattr(node, name)
+                if name in _LIST_FIELDS:
+                    self._varint(len(value))
+                    children.extend(value)
+                else:
+                    children.append(value)
+            if type(node) is BlockNode:
+                stack.append((_BLOCK_END, len(out)))
+                out += _BLOCK_SIZE.pack(0)
+            children.reverse()
+            stack.extend(children)
+        
+        # Tabla de cadenas al final; su posición va en la cabecera
+        _HEADER.pack_into(out, 0, MAGIC, VERSION, len(out))
+        self._varint(len(self.strings))
+        for value in self.strings:
+            data = value.encode('utf-8')
+            self._varint(len(data))
+            out += data
+        return bytes(out)
+
+
+def dumps(ast):
+    """
+    Codifica un AST en el formato binario.
+    
+    Args:
+        ast (ASTNode): Raíz del AST
+    
+    Returns:
+        bytes: Contenido del archivo
+    """
+    return ASTWriter().write(ast)
+
+
+def dump(ast, path):
+    """
+    Guarda un AST en un archivo en el formato binario.
+    
+    Args:
+        ast (ASTNode): Raíz del AST
+        path (str): Ruta del archivo
+    """
+    data = dumps(ast)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _read_varint(data, pos):
+    """
+    Lee un entero en varint.
+    
+    Returns:
+        tuple: (valor, posición siguiente)
+    
+    Raises:
+        ValueError: Si los datos terminan antes que el número
+    """
+    result = 0
+    shift = 0
+    while True:
+        try:
+            byte = data[pos]
+        except IndexError:
+            raise ValueError("AST truncado: número incompleto") from None
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+class ASTReader:
+    """
+    Carga un AST guardado en el formato binario.
+    
+    Un archivo se mapea en memoria (mmap) en lugar de leerse completo. Con
+    lazy_blocks=True (por defecto) las instrucciones de cada bloque se
+    decodifican la primera vez que se accede a BlockNode.statements, así que
+    el lector debe seguir abierto mientras se usen esos bloques.
+    """
+    def __init__(self, source, lazy_blocks=True, interner=None, tree_class=None):
+        """
+        Abre un AST guardado.
+        
+        Args:
+            source (str | bytes): Ruta del archivo o su contenido
+            lazy_blocks (bool, optional): Si es True, los bloques se
+                decodifican al usarlos
+            interner (Interner, optional): Tabla de internamiento de la que
+                se obtienen los symbol_id (por defecto, la compartida del
+                proceso)
+            tree_class (type, optional): Clase de los árboles genéricos del
+                parser (por defecto, la del parser autónomo o la de Lark)
+        
+        Raises:
+            ValueError: Si el contenido no es un AST en este formato
+        """
+        self._file = None
+        self._mmap = None
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            self.data = bytes(source)
+        else:
+            self._file = open(source, 'rb')
+            if os.fstat(self._file.fileno()).st_size == 0:
+                self.close()
+                raise ValueError(f"Archivo de AST vacío: {source}")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.data = self._mmap
+        
+        self.lazy_blocks = lazy_blocks
+        self.interner = interner or get_interner()
+        self.tree_class = tree_class or _default_tree_class()
+        self._shared = {}  # Desplazamiento de un registro compartido -> nodo
+        
+        if len(self.data) < _HEADER.size:
+            self.close()
+            raise ValueError("No es un archivo de AST: cabecera incompleta")
+        magic, version, strings_offset = _HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("No es un archivo de AST: firma incorrecta")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"Versión de AST no admitida: {version} (se esperaba {VERSION})")
+        try:
+            self.strings = self._read_strings(strings_offset)
+        except ValueError:
+            self.close()
+            raise
+        self._symbol_ids = {}  # Índice de cadena -> symbol_id
+    
+    def _read_strings(self, pos):
+        """
+        Decodifica la tabla de cadenas.
+        
+        Args:
+            pos (int): Desplazamiento de la tabla
+        
+        Returns:
+            list: Cadenas por índice
+        
+        Raises:
+            ValueError: Si la tabla está incompleta
+        """
+        data = self.data
+        count, pos = _read_varint(data, pos)
+        strings = []
+        for _ in range(count):
+            size, pos = _read_varint(data, pos)
+            if pos + size > len(data):
+                raise ValueError("AST truncado: tabla de cadenas incompleta")
+            strings.append(data[pos:pos + size].decode('utf-8'))
+            pos += size
+        return strings
+    
+    def _symbol_id(self, index):
+        """
+        Obtiene el symbol_id de un nombre de la tabla de cadenas.
+        """
+        symbol_id = self._symbol_ids.get(index)
+        if symbol_id is None:
+            symbol_id = self._symbol_ids[index] = self.interner.intern(self.strings[index])
+        return symbol_id
+    
+    def load(self):
+        """
+        Decodifica el AST guardado.
+        
+        Returns:
+            ASTNode: Raíz del AST
+        
+        Raises:
+            ValueError: Si el archivo está truncado o dañado
+        """
+        return self._decode(_HEADER.size, 1)[0]
+    
+    def _load_statements(self, pos, count):
+        """
+        Decodifica las instrucciones de un bloque perezoso.
+        """
+        return self._decode(pos, count)
+    
+    def _decode(self, pos, count):
+        """
+        Decodifica registros consecutivos con sus hijos.
+        
+        Los hijos de cada registro lo siguen en preorden; se decodifican con
+        una pila de huecos por llenar (contenedor, clave), así que la
+        profundidad del AST no está limitada por el límite de recursión.
+        
+        Args:
+            pos (int): Desplazamiento del primer registro
+            count (int): Número de registros
+        
+        Returns:
+            list: Nodos decodificados
+        
+        Raises:
+            ValueError: Si los registros están incompletos o dañados
+        """
+        try:
+            return self._decode_records(pos, count)
+        except (IndexError, struct.error):
+            raise ValueError("AST truncado o dañado: registro incompleto") from None
+    
+    def _decode_records(self, pos, count):
+        """
+        Decodifica registros consecutivos (ver _decode), sin traducir los
+        errores de lectura.
+        """
+        data = self.data
+        strings = self.strings
+        shared = self._shared
+        lazy_blocks = self.lazy_blocks
+        
+        result = [None] * count
+        holes = [(result, i) for i in range(count - 1, -1, -1)]
+        while holes:
+            container, key = holes.pop()
+            
+            start = pos
+            kind = data[pos]
+            pos += 1
+            flags = kind & SHARED_FLAG
+            kind &= ~SHARED_FLAG
+            
+            if kind == KIND_NONE:
+                node = None
+            elif kind == KIND_REF:
+                offset, pos = _read_varint(data, pos)
+                node = shared.get(offset)
+                if node is None:
+                    # El original está en un bloque aún no decodificado
+                    node = self._decode(offset, 1)[0]
+            elif kind == KIND_TREE:
+                index, pos = _read_varint(data, pos)
+                size, pos = _read_varint(data, pos)
+                node = self.tree_class(strings[index], [None] * size)
+                holes.extend((node.children, i) for i in range(size - 1, -1, -1))
+            else:
+                cls = KINDS[kind - 3]
+                node = cls.__new__(cls)
+                
+                # Tramo y type (0 = None)
+                value, pos = _read_varint(data, pos)
+                node.line = value - 1 if value else None
+                value, pos = _read_varint(data, pos)
+                node.column = value - 1 if value else None
+                value, pos = _read_varint(data, pos)
+                node.end_line = value - 1 if value else None
+                value, pos = _read_varint(data, pos)
+                node.end_column = value - 1 if value else None
+                value, pos = _read_varint(data, pos)
+                node.type = strings[value - 1] if value else None
+                
+                tag = data[pos]
+                pos += 1
+                if tag == _VALUE_NONE:
+                    node.value = None
+                elif tag == _VALUE_INT:
+                    node.value, pos = _read_varint(data, pos)
+                elif tag == _VALUE_STR:
+                    value, pos = _read_varint(data, pos)
+                    node.value = strings[value]
+                elif tag == _VALUE_FLOAT:
+                    node.value = _FLOAT.unpack_from(data, pos)[0]
+                    pos += _FLOAT.size
+                elif tag == _VALUE_NEGATIVE:
+                    value, pos = _read_varint(data, pos)
+                    node.value = -value - 1
+                else:
+                    node.value = tag == _VALUE_TRUE
+                
+                for name in _ATTRIBUTES.get(cls, ()):
+                    value, pos = _read_varint(data, pos)
+                    setattr(node, name, strings[value])
+                if cls is IdentifierNode or cls is VariableNode:
+                    node.symbol_id = self._symbol_id(value)
+                elif cls is IdentifierListNode:
+                    size, pos = _read_varint(data, pos)
+                    identifiers = []
+                    for _ in range(size):
+                        value, pos = _read_varint(data, pos)
+                        identifiers.append(strings[value])
+                    node.identifiers = identifiers
+                
+                fields = cls._fields
+                if cls is BlockNode:
+                    size, pos = _read_varint(data, pos)
+                    length = _BLOCK_SIZE.unpack_from(data, pos)[0]
+                    pos += _BLOCK_SIZE.size
+                    if lazy_blocks:
+                        node._statements = []
+                        node._loader = partial(self._load_statements, pos, size)
+                        pos += length
+                    else:
+                        node._loader = None
+                        node._statements = statements = [None] * size
+                        holes.extend((statements, i) for i in range(size - 1, -1, -1))
+                elif fields:
+                    # Huecos de los hijos en orden inverso (la pila los saca en orden)
+                    child_holes = []
+                    for name in fields:
+                        if name in _LIST_FIELDS:
+                            size, pos = _read_varint(data, pos)
+                            items = [None] * size
+                            setattr(node, name, items)
+                            child_holes.extend((items, i) for i in range(size))
+                        else:
+                            setattr(node, name, None)
+                            child_holes.append((node, name))
+                    child_holes.reverse()
+                    holes.extend(child_holes)
+                
+                if flags:
+                    # Si el registro ya se decodificó desde un REF (estaba en
+                    # un bloque pendiente), se conserva el nodo de entonces
+                    node = shared.setdefault(start, node)
+            
+            if type(key) is str:
+                setattr(container, key, node)
+            else:
+                container[key] = node
+        return result
+    
+    def close(self):
+        """
+        Libera el archivo mapeado. Los bloques aún no decodificados dejan de
+        poder construirse.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _default_tree_class():
+    """
+    Obtiene la clase de los árboles genéricos que produce el parser.
+    """
+    try:
+        from grammar.standalone_parser import Tree
+    except ImportError:
+        from lark import Tree
+    return Tree
+
+
+def load(path, interner=None):
+    """
+    Carga por completo un AST guardado en un archivo.
+    
+    Args:
+        path (str): Ruta del archivo
+        interner (Interner, optional): Tabla de internamiento para los
+            symbol_id
+    
+    Returns:
+        ASTNode: Raíz del AST
+    
+    Raises:
+        ValueError: Si el archivo no es un AST en este formato
+    """
+    with ASTReader(path, lazy_blocks=False, interner=interner) as reader:
+        return reader.load()
+
+
+def loads(data, lazy_blocks=False, interner=None):
+    """
+    Decodifica un AST codificado con dumps().
+    
+    Args:
+        data (bytes): Contenido codificado
+        lazy_blocks (bool, optional): Si es True, los bloques se decodifican
+            al usarlos
+        interner (Interner, optional): Tabla de internamiento para los
+            symbol_id
+    
+    Returns:
+        ASTNode: Raíz del AST
+    
+    Raises:
+        ValueError: Si los datos no son un AST en este formato
+    """
+    return ASTReader(data, lazy_blocks=lazy_blocks, interner=interner).load()
@@ -4,11 +4,34 @@ basado en la gramática atributada del lenguaje personalizado.
 """
 
 class ASTNode:
-    """Clase base para todos los nodos del AST."""
-    def __init__(self, line=None, column=None):
+    """
+    Clase base para todos los nodos del AST.
+    
+    Los nodos usan __slots__ (sin __dict__ por instancia). Solo los nodos con
+    hijos genéricos (ProgramNode, DeclarationNode e IdentifierListNode) tienen
+    su propia lista `children`; el resto comparten una tupla vacía.
+    
+    El ASTBuilder asigna a cada nodo su extensión completa en el código
+    (line, column, end_line, end_column), que models.span_index usa para
+    buscar el nodo de una posición.
+    
+    Cada clase declara en `_fields` los atributos que contienen nodos hijo,
+    como `ast.AST._fields` de CPython; los recorridos genéricos usan
+    iter_fields() e iter_children() en lugar de comprobar atributo a atributo.
+    """
+    __slots__ = ('line', 'column', 'end_line', 'end_column', 'type', 'value')
+    
+    # Campos que contienen nodos hijo (un nodo o una lista de nodos), en orden
+    _fields = ()
+    children = ()
+    
+    def __init__(self, line=None, column=None, end_line=None, end_column=None):
+        # Extensión en el código: (line, column) es el primer carácter y
+        # (end_line, end_column) la posición siguiente al último
         self.line = line
         self.column = column
-        self.children = []
+        self.end_line = end_line
+        self.end_column = end_column
         # Atributos semánticos comunes
         self.type = None  # Tipo de dato resultante
         self.value = None  # Valor calculado (si es aplicable)
@@ -27,46 +50,225 @@ class ASTNode:
     
     def accept(self, visitor):
         """Método para implementar el patrón Visitor."""
-        method_name = f'visit_{type(self).__name__}'
-        visitor_method = getattr(visitor, method_name, visitor.generic_visit)
-        return visitor_method(self)
+        return visitor.visit(self)
+
+
+def iter_fields(node):
+    """
+    Recorre los campos hijo de un nodo.
+    
+    Para los objetos que no son ASTNode pero tienen `children` (los árboles
+    'sentencia' de Lark) se devuelve ese único campo.
+    
+    Args:
+        node: Nodo del AST o árbol de Lark
+    
+    Returns:
+        iterator: Pares (nombre del campo, valor); el valor es un nodo, una
+            lista de nodos o None
+    """
+    if isinstance(node, ASTNode):
+        for name in node._fields:
+            yield name, getattr(node, name)
+    else:
+        children = getattr(node, 'children', None)
+        if children:
+            yield 'children', children
+
+
+def iter_children(node):
+    """
+    Recorre los hijos directos de un nodo, en orden y sin los campos vacíos.
+    
+    Args:
+        node: Nodo del AST o árbol de Lark
+    
+    Returns:
+        iterator: Nodos hijo
+    """
+    for _, value in iter_fields(node):
+        if isinstance(value, list):
+            for child in value:
+                if child is not None:
+                    yield child
+        elif value is not None:
+            yield value
+
+
+# Valores que pueden devolver las funciones enter/leave de walk()
+SKIP = object()  # No recorrer los hijos del nodo
+STOP = object()  # Terminar el recorrido
+
+# Marca de las entradas de la pila de walk() que llaman a leave
+_LEAVE = object()
+
+
+def walk(node, enter=None, leave=None, data=None):
+    """
+    Recorre un AST en profundidad con una pila explícita, sin recursión.
+    
+    enter(nodo, dato, campo, índice) se llama antes de recorrer los hijos del
+    nodo: `dato` es lo que devolvió enter para el padre (el argumento data
+    para la raíz), `campo` es el campo del padre que contiene el nodo (None
+    en la raíz) e `índice` su posición si el campo es una lista (si no,
+    None). Lo que devuelve se pasa a los hijos, salvo SKIP (no recorrer los
+    hijos) y STOP (terminar). leave(nodo, dato) se llama después de los
+    hijos, con lo que devolvió enter; si devuelve STOP el recorrido termina.
+    
+    Args:
+        node: Nodo raíz (nodo del AST o árbol de Lark)
+        enter (callable, optional): Función previa a los hijos
+        leave (callable, optional): Función posterior a los hijos
+        data (optional): Dato que recibe enter para la raíz
+    
+    Returns:
+        bool: False si el recorrido se detuvo con STOP, True si no
+    """
+    stack = [(node, data, None, None)]
+    while stack:
+        node, data, field, index = stack.pop()
+        if field is _LEAVE:
+            if leave(node, data) is STOP:
+                return False
+            continue
+        
+        if enter is not None:
+            data = enter(node, data, field, index)
+            if data is SKIP:
+                continue
+            if data is STOP:
+                return False
+        if leave is not None:
+            stack.append((node, data, _LEAVE, None))
+        
+        # Los hijos se apilan al revés para visitarlos en orden
+        children = []
+        for name, value in iter_fields(node):
+            if isinstance(value, list):
+                children.extend((child, data, name, i) for i, child in enumerate(value)
+                                if child is not None)
+            elif value is not None:
+                children.append((value, data, name, None))
+        children.reverse()
+        stack.extend(children)
+    return True
+
+
+def set_span(node, first, last):
+    """
+    Asigna a un nodo su extensión en el código.
+    
+    Args:
+        node (ASTNode): Nodo
+        first: Primer elemento del nodo (token, nodo o árbol de Lark)
+        last: Último elemento del nodo (token, nodo o árbol de Lark)
+    
+    Returns:
+        ASTNode: El mismo nodo
+    """
+    # Los árboles (con atributo data) no tienen posición: se usa la de su
+    # primer o último hijo
+    while hasattr(first, 'data'):
+        first = first.children[0]
+    while hasattr(last, 'data'):
+        last = last.children[-1]
+    node.line = first.line
+    node.column = first.column
+    node.end_line = last.end_line
+    node.end_column = last.end_column
+    return node
+
+
+# Clase de nodo -> nombres de todos sus slots (incluidos los heredados)
+_slot_names = {}
+
+
+def copy_node(node):
+    """
+    Crea una copia superficial de un nodo.
+    
+    Los hijos se comparten con el original, pero los campos que son listas se
+    copian, así que la copia puede añadir, quitar o sustituir hijos sin
+    modificar el original. Los bloques perezosos se construyen antes de
+    copiarlos.
+    
+    Args:
+        node: Nodo del AST o árbol de Lark
+    
+    Returns:
+        Copia del nodo
+    """
+    if not isinstance(node, ASTNode):
+        return type(node)(node.data, list(node.children))
+    
+    cls = type(node)
+    names = _slot_names.get(cls)
+    if names is None:
+        names = _slot_names[cls] = tuple(name for klass in reversed(cls.__mro__)
+                                         for name in klass.__dict__.get('__slots__', ()))
+    copy = cls.__new__(cls)
+    for name in names:
+        setattr(copy, name, getattr(node, name))
+    for name in cls._fields:
+        value = getattr(node, name)
+        if isinstance(value, list):
+            setattr(copy, name, list(value))
+    return copy
 
 
 # Nodos para el programa principal
 class ProgramNode(ASTNode):
     """Representa el nodo raíz del programa."""
+    __slots__ = ('children',)
+    _fields = ('children',)
+    
     def __init__(self, line=None, column=None):
         super().__init__(line, column)
+        self.children = []  # Sentencias del programa
 
 
 # Nodos para declaraciones
 class DeclarationNode(ASTNode):
     """Representa una declaración de variable."""
+    __slots__ = ('var_type', 'children')
+    _fields = ('children',)
+    
     def __init__(self, var_type, line=None, column=None):
         super().__init__(line, column)
+        self.children = []  # Lista de identificadores
         self.var_type = var_type  # ent, dec, cadena
         self.type = var_type  # Atributo heredado para propagar el tipo
 
 
 class IdentifierListNode(ASTNode):
     """Representa una lista de identificadores en una declaración."""
+    __slots__ = ('identifiers', 'children')
+    _fields = ('children',)
+    
     def __init__(self, line=None, column=None):
         super().__init__(line, column)
+        self.children = []  # Nodos de los identificadores
         self.identifiers = []  # Lista de nombres de identificadores
         self.type = None  # Atributo heredado para recibir el tipo desde DeclarationNode
 
 
 class IdentifierNode(ASTNode):
     """Representa un identificador (variable)."""
-    def __init__(self, name, line=None, column=None):
+    __slots__ = ('name', 'symbol_id')
+    
+    def __init__(self, name, line=None, column=None, symbol_id=None):
         super().__init__(line, column)
         self.name = name
+        self.symbol_id = symbol_id  # Número del nombre en la tabla de internamiento
         self.type = None  # Se establecerá durante el análisis semántico
 
 
 # Nodos para expresiones
 class AssignmentNode(ASTNode):
     """Representa una asignación de valor a una variable."""
+    __slots__ = ('identifier', 'expression')
+    _fields = ('identifier', 'expression')
+    
     def __init__(self, identifier, expression, line=None, column=None):
         super().__init__(line, column)
         self.identifier = identifier  # IdentifierNode
@@ -75,6 +277,9 @@ class AssignmentNode(ASTNode):
 
 class BinaryOpNode(ASTNode):
     """Representa una operación binaria (suma, resta, etc.)."""
+    __slots__ = ('operator', 'left', 'right')
+    _fields = ('left', 'right')
+    
     def __init__(self, operator, left, right, line=None, column=None):
         super().__init__(line, column)
         self.operator = operator  # Tipo de operador (+, -, *, /, etc.)
@@ -84,6 +289,9 @@ class BinaryOpNode(ASTNode):
 
 class UnaryOpNode(ASTNode):
     """Representa una operación unaria (negación, etc.)."""
+    __slots__ = ('operator', 'expression')
+    _fields = ('expression',)
+    
     def __init__(self, operator, expression, line=None, column=None):
         super().__init__(line, column)
         self.operator = operator    # Tipo de operador (-, !, etc.)
@@ -92,6 +300,8 @@ class UnaryOpNode(ASTNode):
 
 class NumberNode(ASTNode):
     """Representa un número literal (entero o flotante)."""
+    __slots__ = ()
+    
     def __init__(self, value, line=None, column=None):
         super().__init__(line, column)
         self.value = value
@@ -101,6 +311,8 @@ class NumberNode(ASTNode):
 
 class StringNode(ASTNode):
     """Representa una cadena literal."""
+    __slots__ = ()
+    
     def __init__(self, value, line=None, column=None):
         super().__init__(line, column)
         self.value = value
@@ -109,9 +321,12 @@ class StringNode(ASTNode):
 
 class VariableNode(ASTNode):
     """Representa el uso de una variable."""
-    def __init__(self, name, line=None, column=None):
+    __slots__ = ('name', 'symbol_id')
+    
+    def __init__(self, name, line=None, column=None, symbol_id=None):
         super().__init__(line, column)
         self.name = name
+        self.symbol_id = symbol_id  # Número del nombre en la tabla de internamiento
         # El tipo se asignará durante el análisis semántico
         self.type = None
 
@@ -119,6 +334,9 @@ class VariableNode(ASTNode):
 # Nodos para estructuras de control
 class IfNode(ASTNode):
     """Representa una estructura condicional (si-oNo)."""
+    __slots__ = ('condition', 'if_body', 'else_body')
+    _fields = ('condition', 'if_body', 'else_body')
+    
     def __init__(self, condition, if_body, else_body=None, line=None, column=None):
         super().__init__(line, column)
         self.condition = condition  # Condición
@@ -128,6 +346,9 @@ class IfNode(ASTNode):
 
 class WhileNode(ASTNode):
     """Representa un bucle mientras."""
+    __slots__ = ('condition', 'body')
+    _fields = ('condition', 'body')
+    
     def __init__(self, condition, body, line=None, column=None):
         super().__init__(line, column)
         self.condition = condition  # Condición
@@ -136,6 +357,9 @@ class WhileNode(ASTNode):
 
 class RepeatNode(ASTNode):
     """Representa un bucle repetir."""
+    __slots__ = ('count', 'body')
+    _fields = ('count', 'body')
+    
     def __init__(self, count, body, line=None, column=None):
         super().__init__(line, column)
         self.count = count  # Número de repeticiones
@@ -145,6 +369,9 @@ class RepeatNode(ASTNode):
 # Nodos para entrada/salida
 class PrintNode(ASTNode):
     """Representa una instrucción de salida (sout)."""
+    __slots__ = ('expression',)
+    _fields = ('expression',)
+    
     def __init__(self, expression, line=None, column=None):
         super().__init__(line, column)
         self.expression = expression  # Lo que se va a imprimir
@@ -152,6 +379,9 @@ class PrintNode(ASTNode):
 
 class InputNode(ASTNode):
     """Representa una instrucción de entrada (scan)."""
+    __slots__ = ('variable',)
+    _fields = ('variable',)
+    
     def __init__(self, variable, line=None, column=None):
         super().__init__(line, column)
         self.variable = variable  # Variable donde se almacenará la entrada
@@ -159,12 +389,48 @@ class InputNode(ASTNode):
 
 # Nodos para bloques y secuencias
 class BlockNode(ASTNode):
-    """Representa un bloque de código entre llaves {}."""
-    def __init__(self, statements=None, line=None, column=None):
+    """
+    Representa un bloque de código entre llaves {}.
+    
+    Si se crea con un `loader`, las instrucciones no se construyen hasta el
+    primer acceso a `statements` (análisis perezoso de los cuerpos).
+    """
+    __slots__ = ('_statements', '_loader')
+    _fields = ('statements',)
+    
+    def __init__(self, statements=None, line=None, column=None, loader=None):
         super().__init__(line, column)
-        self.statements = statements or []  # Lista de instrucciones
+        self._statements = statements or []  # Lista de instrucciones
+        self._loader = loader  # Función que construye las instrucciones pendientes
+    
+    @property
+    def statements(self):
+        """Instrucciones del bloque (se construyen al primer acceso)."""
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            self._statements = loader()
+        return self._statements
+    
+    @statements.setter
+    def statements(self, statements):
+        self._loader = None
+        self._statements = statements
+    
+    def is_loaded(self):
+        """Indica si las instrucciones ya están construidas."""
+        return self._loader is None
     
     def add_statement(self, statement):
         """Añade una instrucción al bloque."""
         self.statements.append(statement)
-        return statement
\ No newline at end of file
+        return statement
+
+
+# Nodos para errores sintácticos
+class ErrorNode(ASTNode):
+    """Representa una sentencia descartada por un error de sintaxis."""
+    __slots__ = ('message',)
+    
+    def __init__(self, message, line=None, column=None):
+        super().__init__(line, column)
+        self.message = message  # Descripción del error
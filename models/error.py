@@ -25,6 +25,44 @@ class CompilerError:
             if self.column is not None:
                 position += f", columna {self.column}"
         return f"{self.__class__.__name__}: {self.message}{position}"
+    
+    def get_offset(self, source_index):
+        """
+        Obtiene el desplazamiento del error en el código fuente.
+        
+        Args:
+            source_index (SourceIndex): Índice de líneas del código
+        
+        Returns:
+            int: Desplazamiento, o None si el error no tiene una línea válida
+        """
+        if self.line is None or not 0 < self.line <= len(source_index):
+            return None
+        return source_index.offset(self.line, self.column or 1)
+    
+    def format(self, source_index=None):
+        """
+        Representación del error con la línea de código en la que ocurrió y
+        una marca bajo la columna.
+        
+        Args:
+            source_index (SourceIndex, optional): Índice de líneas del código;
+                sin él, equivale a str(error)
+        
+        Returns:
+            str: Texto del error
+        """
+        text = str(self)
+        if source_index is None or self.line is None or not 0 < self.line <= len(source_index):
+            return text
+        
+        line = source_index.line_text(self.line)
+        text += f"\n    {line}"
+        if self.column is not None:
+            # Se conservan los tabuladores para que la marca quede alineada
+            padding = ''.join('\t' if char == '\t' else ' ' for char in line[:self.column - 1])
+            text += f"\n    {padding}^"
+        return text
 
 
 class LexicalError(CompilerError):
@@ -0,0 +1,95 @@
+import sys
+
+class Interner:
+    """
+    Tabla de internamiento de identificadores.
+    
+    Asigna a cada nombre distinto un identificador entero denso (0, 1, 2...)
+    y guarda una única copia de cada nombre, compartida por los tokens, los
+    nodos del AST y la tabla de símbolos.
+    """
+    def __init__(self):
+        """
+        Inicializa una tabla vacía.
+        """
+        self.names = []  # Identificador -> nombre
+        self.ids = {}    # Nombre -> identificador
+    
+    def intern(self, name):
+        """
+        Obtiene el identificador de un nombre, asignándole uno nuevo si no lo tenía.
+        
+        Args:
+            name (str): Nombre del identificador
+        
+        Returns:
+            int: Identificador entero del nombre
+        """
+        symbol_id = self.ids.get(name)
+        if symbol_id is None:
+            name = sys.intern(name)
+            symbol_id = len(self.names)
+            self.ids[name] = symbol_id
+            self.names.append(name)
+        return symbol_id
+    
+    def get_id(self, name):
+        """
+        Obtiene el identificador de un nombre sin asignar uno nuevo.
+        
+        Args:
+            name (str): Nombre del identificador
+        
+        Returns:
+            int: Identificador, o None si el nombre no se ha internado
+        """
+        return self.ids.get(name)
+    
+    def get_name(self, symbol_id):
+        """
+        Obtiene el nombre (compartido) de un identificador.
+        
+        Args:
+            symbol_id (int): Identificador entero
+        
+        Returns:
+            str: Nombre internado
+        """
+        return self.names[symbol_id]
+    
+    def __len__(self):
+        return len(self.names)
+    
+    def __contains__(self, name):
+        return name in self.ids
+    
+    def __str__(self):
+        """
+        Representación en cadena de la tabla.
+        """
+        return f"Interner({len(self.names)} nombres)"
+    
+    def __repr__(self):
+        """
+        Representación oficial de la tabla.
+        """
+        return self.__str__()
+
+
+_interner = None
+
+
+def get_interner():
+    """
+    Obtiene la tabla de internamiento compartida por todo el proceso.
+    
+    El lexer, el parser y la tabla de símbolos usan la misma tabla, de modo
+    que un identificador tiene el mismo número en todas las fases.
+    
+    Returns:
+        Interner: Tabla compartida
+    """
+    global _interner
+    if _interner is None:
+        _interner = Interner()
+    return _interner
@@ -0,0 +1,200 @@
+from models.ast_nodes import BinaryOpNode, NumberNode, StringNode, VariableNode
+
+class NodeCache:
+    """
+    Tabla de hash-consing de los nodos de expresión.
+    
+    Devuelve una única instancia por cada literal, variable u operación
+    binaria estructuralmente igual, de modo que las expresiones repetidas de
+    un programa (o de análisis sucesivos) comparten sus nodos y dos
+    subárboles son iguales si y solo si son el mismo objeto (`a is b`).
+    
+    Los nodos compartidos no guardan posición (line y column son None),
+    porque aparecen en varios sitios y la tabla se conserva entre análisis:
+    la posición de cada aparición se registra aparte en una PositionTable.
+    """
+    def __init__(self):
+        """
+        Inicializa una tabla vacía.
+        """
+        self.nodes = {}        # Clave estructural -> nodo
+        self.leaf_counts = {}  # Operación -> número de hojas de su subárbol
+    
+    def number(self, value):
+        """
+        Obtiene el nodo de un número literal.
+        
+        Args:
+            value (int | float): Valor del número
+        
+        Returns:
+            NumberNode: Nodo compartido
+        """
+        # El tipo forma parte de la clave: 1 y 1.0 son literales distintos
+        key = (NumberNode, type(value), value)
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = NumberNode(value)
+        return node
+    
+    def string(self, value):
+        """
+        Obtiene el nodo de una cadena literal.
+        
+        Args:
+            value (str): Contenido de la cadena, sin comillas
+        
+        Returns:
+            StringNode: Nodo compartido
+        """
+        key = (StringNode, value)
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = StringNode(value)
+        return node
+    
+    def variable(self, name, symbol_id=None):
+        """
+        Obtiene el nodo del uso de una variable.
+        
+        Args:
+            name (str): Nombre de la variable
+            symbol_id (int, optional): Número del nombre en la tabla de
+                internamiento
+        
+        Returns:
+            VariableNode: Nodo compartido
+        """
+        key = (VariableNode, name)
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = VariableNode(name, symbol_id=symbol_id)
+        return node
+    
+    def binary_op(self, operator, left, right):
+        """
+        Obtiene el nodo de una operación binaria entre dos nodos compartidos.
+        
+        Como los operandos ya son únicos, la clave usa su identidad y no hace
+        falta recorrerlos.
+        
+        Args:
+            operator (str): Operador
+            left (ASTNode): Operando izquierdo (de esta tabla)
+            right (ASTNode): Operando derecho (de esta tabla)
+        
+        Returns:
+            BinaryOpNode: Nodo compartido
+        """
+        key = (BinaryOpNode, operator, id(left), id(right))
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = BinaryOpNode(operator, left, right)
+            self.leaf_counts[node] = self.leaf_count(left) + self.leaf_count(right)
+        return node
+    
+    def leaf_count(self, node):
+        """
+        Obtiene el número de hojas (literales y variables) de un subárbol.
+        
+        Args:
+            node (ASTNode): Nodo de esta tabla
+        
+        Returns:
+            int: Número de hojas, en el orden en que aparecen en el código
+        """
+        return self.leaf_counts.get(node, 1)
+    
+    def clear(self):
+        """
+        Vacía la tabla.
+        """
+        self.nodes.clear()
+        self.leaf_counts.clear()
+    
+    def __len__(self):
+        return len(self.nodes)
+    
+    def __str__(self):
+        """
+        Representación en cadena de la tabla.
+        """
+        return f"NodeCache({len(self.nodes)} nodos)"
+    
+    def __repr__(self):
+        """
+        Representación oficial de la tabla.
+        """
+        return self.__str__()
+
+
+def iter_leaves(node):
+    """
+    Recorre las hojas de una expresión en el orden en que aparecen en el código.
+    
+    Args:
+        node (ASTNode): Raíz de la expresión
+    
+    Yields:
+        ASTNode: Literales y variables, de izquierda a derecha
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, BinaryOpNode):
+            stack.append(node.right)
+            stack.append(node.left)
+        else:
+            yield node
+
+
+class PositionTable:
+    """
+    Posiciones de cada aparición de las expresiones compartidas.
+    
+    Una expresión compartida cuelga de un campo de un nodo que no se comparte
+    (la expresión de una asignación, la condición de un 'si'...). Para cada
+    par (nodo, campo) se guarda la línea y la columna de las hojas de esa
+    aparición, en el orden de iter_leaves(), en una tupla plana
+    (línea, columna, línea, columna...) para no crear una tupla por hoja.
+    """
+    def __init__(self):
+        """
+        Inicializa una tabla vacía.
+        """
+        self.tables = {}  # Campo -> {nodo: (línea, columna, línea, columna...)}
+    
+    def add(self, parent, field, positions):
+        """
+        Registra las posiciones de las hojas de una aparición.
+        
+        Args:
+            parent (ASTNode): Nodo que contiene la expresión
+            field (str): Campo del nodo que contiene la expresión
+            positions (sequence): Línea y columna de cada hoja, alternadas
+        """
+        table = self.tables.get(field)
+        if table is None:
+            table = self.tables[field] = {}
+        table[parent] = tuple(positions)
+    
+    def get(self, parent, field):
+        """
+        Obtiene las hojas de una aparición con su posición.
+        
+        Args:
+            parent (ASTNode): Nodo que contiene la expresión
+            field (str): Campo del nodo que contiene la expresión
+        
+        Returns:
+            list: (hoja, línea, columna) de cada hoja de la expresión, o una
+                lista vacía si la aparición no está registrada
+        """
+        positions = self.tables.get(field, {}).get(parent)
+        if positions is None:
+            return []
+        leaves = iter_leaves(getattr(parent, field))
+        return [(leaf, positions[i], positions[i + 1]) for i, leaf in zip(range(0, len(positions), 2), leaves)]
+    
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
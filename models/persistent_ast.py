@@ -0,0 +1,517 @@
+"""
+AST persistente: revisiones inmutables que comparten los subárboles sin cambios.
+
+Una edición no modifica la revisión de partida: copia solo los nodos del
+camino desde la raíz hasta el punto editado (copy_node) y comparte con ella
+el resto del árbol, así que guardar muchas revisiones cuesta los caminos
+cambiados y no una copia completa por revisión.
+
+Los atributos semánticos (type y value) de cada revisión se guardan aparte,
+en tablas persistentes (AttributeTable), porque un mismo nodo compartido
+puede tener atributos distintos en cada revisión. Los atributos de los
+nodos son solo el espacio de trabajo de la revisión activa: checkout() los
+rellena con los de una revisión y SemanticController.analyze_revision()
+registra en su tabla el resultado del análisis.
+"""
+
+from models.ast_nodes import ASTNode, SKIP, STOP, copy_node, iter_children, walk
+
+# Atributos de un nodo sin tipo ni valor (compartida por todas las entradas)
+_EMPTY = (None, None)
+
+
+def _iter_nodes(root):
+    """
+    Recorre los nodos del AST (sin los árboles de Lark) con una pila explícita.
+    """
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ASTNode):
+            yield node
+        stack.extend(iter_children(node))
+
+
+def _attributes(node):
+    """
+    Obtiene los atributos actuales de un nodo como entrada de una tabla.
+    """
+    if node.type is None and node.value is None:
+        return _EMPTY
+    return (node.type, node.value)
+
+
+def _same(a, b):
+    """
+    Compara dos entradas distinguiendo el tipo de los valores (1, 1.0 y True).
+    """
+    return a[0] == b[0] and type(a[1]) is type(b[1]) and a[1] == b[1]
+
+
+class AttributeTable:
+    """
+    Tabla persistente nodo -> (type, value).
+    
+    Cada tabla guarda solo sus propias entradas y busca las demás en la tabla
+    de la que deriva, así que derivar una tabla con k cambios cuesta k
+    entradas. Para que las búsquedas no recorran cadenas largas, al pasar de
+    MAX_DEPTH niveles las capas derivadas se fusionan en una sola sobre la
+    tabla base.
+    """
+    MAX_DEPTH = 32
+    
+    __slots__ = ('entries', 'parent', 'depth')
+    
+    def __init__(self, entries=None, parent=None):
+        """
+        Crea una tabla.
+        
+        Args:
+            entries (dict, optional): Entradas propias (nodo -> (tipo, valor))
+            parent (AttributeTable, optional): Tabla de la que deriva
+        """
+        self.entries = entries if entries is not None else {}
+        self.parent = parent
+        self.depth = 0 if parent is None else parent.depth + 1
+    
+    def get(self, node, default=None):
+        """
+        Obtiene los atributos de un nodo.
+        
+        Args:
+            node (ASTNode): Nodo
+            default (optional): Valor si el nodo no está en la tabla
+        
+        Returns:
+            tuple: (tipo, valor), o `default`
+        """
+        table = self
+        while table is not None:
+            entry = table.entries.get(node)
+            if entry is not None:
+                return entry
+            table = table.parent
+        return default
+    
+    def __contains__(self, node):
+        return self.get(node) is not None
+    
+    def derive(self, entries):
+        """
+        Crea una tabla con estas entradas sobre las de esta tabla.
+        
+        Args:
+            entries (dict): Entradas nuevas o cambiadas
+        
+        Returns:
+            AttributeTable: Tabla derivada (esta misma si no hay entradas)
+        """
+        if not entries:
+            return self
+        table = AttributeTable(entries, self)
+        if table.depth > self.MAX_DEPTH:
+            table = table._squash()
+        return table
+    
+    def _squash(self):
+        """
+        Fusiona las capas derivadas en una sola sobre la tabla base.
+        """
+        layers = []
+        table = self
+        while table.parent is not None:
+            layers.append(table.entries)
+            table = table.parent
+        merged = {}
+        for entries in reversed(layers):
+            merged.update(entries)
+        return AttributeTable(merged, table)
+    
+    def __str__(self):
+        """
+        Representación en cadena de la tabla.
+        """
+        return f"AttributeTable({len(self.entries)} entradas propias, profundidad {self.depth})"
+    
+    def __repr__(self):
+        """
+        Representación oficial de la tabla.
+        """
+        return self.__str__()
+
+
+class ASTRevision:
+    """
+    Versión inmutable de un AST.
+    
+    Los nodos de una revisión no deben modificarse: replace(), insert() y
+    delete() devuelven una revisión nueva que comparte con esta todos los
+    subárboles fuera del camino editado. Un camino es una secuencia de pasos
+    (campo, índice) desde la raíz, con índice None en los campos que no son
+    listas (el mismo par que recibe la función enter de walk()).
+    
+    `initial` guarda los atributos con los que se construyó cada nodo y
+    `attributes` los del último análisis semántico (None hasta que se
+    analiza). Los nodos nuevos se toman tal como llegan, así que deben estar
+    recién construidos (sin analizar) o proceder de una revisión de la misma
+    historia. Los AST de ParserController.reparse() no sirven: el análisis
+    incremental modifica los nodos que reutiliza.
+    """
+    __slots__ = ('root', 'parent', 'initial', 'attributes', 'semantic_errors')
+    
+    def __init__(self, root, parent=None, initial=None):
+        """
+        Crea una revisión.
+        
+        Args:
+            root (ASTNode): Raíz del AST
+            parent (ASTRevision, optional): Revisión de la que procede
+            initial (AttributeTable, optional): Atributos iniciales de los
+                nodos (por defecto, los que tienen ahora)
+        """
+        self.root = root
+        self.parent = parent
+        if initial is None:
+            entries = {}
+            _capture(root, AttributeTable(), entries)
+            initial = AttributeTable(entries)
+        self.initial = initial
+        self.attributes = None       # AttributeTable tras el análisis semántico
+        self.semantic_errors = None  # Errores semánticos del análisis
+    
+    def get(self, path):
+        """
+        Obtiene el nodo en un camino.
+        
+        Args:
+            path (sequence): Pasos (campo, índice) desde la raíz
+        
+        Returns:
+            Nodo del camino
+        """
+        node = self.root
+        for field, index in path:
+            node = _child(node, field, index)
+        return node
+    
+    def path_to(self, target):
+        """
+        Busca el camino hasta un nodo.
+        
+        Args:
+            target: Nodo buscado
+        
+        Returns:
+            tuple: Pasos (campo, índice) de su primera aparición, o None si
+                no está en la revisión
+        """
+        found = []
+        
+        def enter(node, path, field, index):
+            # Camino como lista enlazada (anterior, paso) para no copiarlo
+            # en cada nivel
+            if field is not None:
+                path = (path, (field, index))
+            if node is target:
+                found.append(path)
+                return STOP
+            return path
+        
+        walk(self.root, enter, data=None)
+        if not found:
+            return None
+        steps = []
+        path = found[0]
+        while path is not None:
+            path, step = path
+            steps.append(step)
+        steps.reverse()
+        return tuple(steps)
+    
+    def replace(self, path, node):
+        """
+        Crea una revisión con otro subárbol en un camino.
+        
+        Args:
+            path (sequence): Camino del subárbol sustituido (vacío para la raíz)
+            node: Subárbol nuevo
+        
+        Returns:
+            ASTRevision: Revisión nueva
+        """
+        if not path:
+            entries = {}
+            _capture(node, self.initial, entries)
+            return ASTRevision(node, self, self.initial.derive(entries))
+        field, index = path[-1]
+        return self._edit(path[:-1], lambda parent: _set_child(parent, field, index, node), node)
+    
+    def insert(self, path, node):
+        """
+        Crea una revisión con un nodo insertado en una lista de hijos.
+        
+        Args:
+            path (sequence): Camino cuyo último paso (campo, índice) indica la
+                lista y la posición del nuevo nodo
+            node: Nodo insertado
+        
+        Returns:
+            ASTRevision: Revisión nueva
+        
+        Raises:
+            ValueError: Si el camino no termina en una lista
+        """
+        if not path or path[-1][1] is None:
+            raise ValueError("El camino no termina en una lista de hijos")
+        field, index = path[-1]
+        return self._edit(path[:-1], lambda parent: getattr(parent, field).insert(index, node), node)
+    
+    def delete(self, path):
+        """
+        Crea una revisión sin el subárbol de un camino.
+        
+        Un elemento de una lista se quita de ella; un campo simple (como el
+        'oNo' de un IfNode) queda a None.
+        
+        Args:
+            path (sequence): Camino del subárbol eliminado
+        
+        Returns:
+            ASTRevision: Revisión nueva
+        
+        Raises:
+            ValueError: Si el camino está vacío
+        """
+        if not path:
+            raise ValueError("No se puede eliminar la raíz")
+        field, index = path[-1]
+        
+        def change(parent):
+            if index is None:
+                setattr(parent, field, None)
+            else:
+                del getattr(parent, field)[index]
+        
+        return self._edit(path[:-1], change, None)
+    
+    def _edit(self, path, change, added):
+        """
+        Copia los nodos de un camino y modifica la copia del último.
+        
+        Args:
+            path (sequence): Camino del nodo que se modifica
+            change (callable): Recibe la copia de ese nodo y la modifica
+            added: Subárbol que entra en la revisión (o None)
+        
+        Returns:
+            ASTRevision: Revisión con la raíz nueva
+        """
+        nodes = [self.root]
+        for field, index in path:
+            nodes.append(_child(nodes[-1], field, index))
+        
+        initial = self.initial
+        entries = {}
+        new = None
+        for depth in range(len(nodes) - 1, -1, -1):
+            original = nodes[depth]
+            copy = copy_node(original)
+            if isinstance(copy, ASTNode):
+                # La copia empieza con los atributos iniciales del original,
+                # no con los de la revisión activa
+                copy.type, copy.value = entries[copy] = initial.get(original, _EMPTY)
+            if new is None:
+                change(copy)
+            else:
+                field, index = path[depth]
+                _set_child(copy, field, index, new)
+            new = copy
+        
+        if added is not None:
+            _capture(added, initial, entries)
+        return ASTRevision(new, self, initial.derive(entries))
+    
+    def reset(self):
+        """
+        Devuelve los nodos de la revisión a sus atributos iniciales.
+        """
+        self._apply(self.initial)
+    
+    def checkout(self):
+        """
+        Rellena los atributos de los nodos con los de esta revisión.
+        
+        Después, los recorridos que leen node.type y node.value (la vista del
+        AST, la exportación a DOT) muestran esta revisión.
+        
+        Returns:
+            ASTNode: Raíz del AST
+        """
+        self._apply(self.attributes if self.attributes is not None else self.initial)
+        return self.root
+    
+    def _apply(self, table):
+        """
+        Escribe en los nodos los atributos de una tabla.
+        """
+        for node in _iter_nodes(self.root):
+            node.type, node.value = table.get(node, _EMPTY)
+    
+    def snapshot(self):
+        """
+        Registra los atributos actuales de los nodos como los de la revisión.
+        
+        Se llama justo después del análisis semántico de la revisión. La
+        tabla deriva de la de la revisión analizada más cercana, así que solo
+        guarda los nodos nuevos y los que cambiaron.
+        
+        Returns:
+            AttributeTable: Atributos de la revisión
+        """
+        base = self.parent
+        while base is not None and base.attributes is None:
+            base = base.parent
+        base = base.attributes if base is not None else AttributeTable()
+        
+        entries = {}
+        for node in _iter_nodes(self.root):
+            current = _attributes(node)
+            previous = base.get(node)
+            if previous is None or not _same(previous, current):
+                entries[node] = current
+        self.attributes = base.derive(entries)
+        return self.attributes
+    
+    def type_of(self, node):
+        """
+        Obtiene el tipo de un nodo en esta revisión.
+        """
+        return self._table().get(node, _EMPTY)[0]
+    
+    def value_of(self, node):
+        """
+        Obtiene el valor de un nodo en esta revisión.
+        """
+        return self._table().get(node, _EMPTY)[1]
+    
+    def _table(self):
+        return self.attributes if self.attributes is not None else self.initial
+    
+    def __str__(self):
+        """
+        Representación en cadena de la revisión.
+        """
+        state = "analizada" if self.attributes is not None else "sin analizar"
+        return f"ASTRevision({type(self.root).__name__}, {state})"
+    
+    def __repr__(self):
+        """
+        Representación oficial de la revisión.
+        """
+        return self.__str__()
+
+
+def _child(node, field, index):
+    """
+    Obtiene el hijo de un nodo en un paso (campo, índice) de un camino.
+    """
+    value = getattr(node, field)
+    return value if index is None else value[index]
+
+
+def _set_child(node, field, index, child):
+    """
+    Sustituye el hijo de un nodo en un paso (campo, índice) de un camino.
+    """
+    if index is None:
+        setattr(node, field, child)
+    else:
+        getattr(node, field)[index] = child
+
+
+def _capture(root, known, entries):
+    """
+    Añade a `entries` los atributos de los nodos de un subárbol que aún no
+    están en la tabla `known` (ni en `entries`).
+    
+    Un nodo conocido se omite junto con su subárbol, que ya se registró con él.
+    """
+    def enter(node, data, field, index):
+        if not isinstance(node, ASTNode):
+            return None
+        if node in entries or node in known:
+            return SKIP
+        entries[node] = _attributes(node)
+        return None
+    
+    walk(root, enter)
+
+
+class ASTHistory:
+    """
+    Historial de revisiones de un AST, con deshacer y rehacer.
+    """
+    def __init__(self, revision=None):
+        """
+        Inicializa el historial.
+        
+        Args:
+            revision (ASTRevision, optional): Revisión inicial
+        """
+        self.revisions = [revision] if revision is not None else []
+        self.position = len(self.revisions) - 1  # Índice de la revisión actual
+    
+    @property
+    def current(self):
+        """Revisión actual (None si el historial está vacío)."""
+        return self.revisions[self.position] if self.position >= 0 else None
+    
+    def commit(self, revision):
+        """
+        Añade una revisión tras la actual y descarta las que se habían deshecho.
+        
+        Args:
+            revision (ASTRevision): Revisión nueva
+        
+        Returns:
+            ASTRevision: La misma revisión
+        """
+        del self.revisions[self.position + 1:]
+        self.revisions.append(revision)
+        self.position += 1
+        return revision
+    
+    def can_undo(self):
+        """Indica si hay una revisión anterior."""
+        return self.position > 0
+    
+    def can_redo(self):
+        """Indica si hay una revisión deshecha que rehacer."""
+        return self.position < len(self.revisions) - 1
+    
+    def undo(self):
+        """
+        Vuelve a la revisión anterior.
+        
+        Returns:
+            ASTRevision: Revisión actual, o None si no hay anterior
+        """
+        if not self.can_undo():
+            return None
+        self.position -= 1
+        return self.current
+    
+    def redo(self):
+        """
+        Avanza a la revisión deshecha más reciente.
+        
+        Returns:
+            ASTRevision: Revisión actual, o None si no hay ninguna que rehacer
+        """
+        if not self.can_redo():
+            return None
+        self.position += 1
+        return self.current
+    
+    def __len__(self):
+        return len(self.revisions)
@@ -0,0 +1,119 @@
+"""
+Índice de líneas de un código fuente.
+
+Guarda el desplazamiento en el que empieza cada línea, así que las
+conversiones entre desplazamiento y (línea, columna) son una búsqueda
+binaria o un acceso directo, sin volver a recorrer el texto ni copiarlo.
+Se construye una vez por versión del código y lo comparten el lexer, el
+formato de los errores y el resaltado del editor.
+
+Las líneas y columnas empiezan en 1, como en los tokens; las columnas se
+cuentan en caracteres.
+"""
+
+from array import array
+from bisect import bisect_right
+
+
+class SourceIndex:
+    """
+    Inicio de cada línea de un texto.
+    """
+    __slots__ = ('text', 'line_starts')
+    
+    def __init__(self, text):
+        """
+        Construye el índice de un texto.
+        
+        Args:
+            text (str): Código fuente (se guarda una referencia, no una copia)
+        """
+        self.text = text
+        starts = array('q', [0])
+        append = starts.append
+        find = text.find
+        newline = find('\n')
+        while newline >= 0:
+            append(newline + 1)
+            newline = find('\n', newline + 1)
+        self.line_starts = starts
+    
+    def __len__(self):
+        """
+        Número de líneas (un texto vacío o terminado en salto de línea
+        cuenta también la última línea vacía).
+        """
+        return len(self.line_starts)
+    
+    def _check_line(self, line):
+        """
+        Comprueba que una línea exista.
+        """
+        if not 0 < line <= len(self.line_starts):
+            raise IndexError(f"línea fuera de rango: {line}")
+    
+    def line_start(self, line):
+        """
+        Obtiene el desplazamiento del primer carácter de una línea.
+        
+        Raises:
+            IndexError: Si la línea no existe
+        """
+        self._check_line(line)
+        return self.line_starts[line - 1]
+    
+    def line_end(self, line):
+        """
+        Obtiene el desplazamiento del final de una línea (su salto de línea,
+        o el final del texto en la última).
+        
+        Raises:
+            IndexError: Si la línea no existe
+        """
+        self._check_line(line)
+        if line < len(self.line_starts):
+            return self.line_starts[line] - 1
+        return len(self.text)
+    
+    def line_text(self, line):
+        """
+        Obtiene el texto de una línea, sin el salto de línea.
+        
+        Raises:
+            IndexError: Si la línea no existe
+        """
+        return self.text[self.line_start(line):self.line_end(line)]
+    
+    def offset(self, line, column=1):
+        """
+        Convierte una posición en desplazamiento.
+        
+        Args:
+            line (int): Línea (desde 1)
+            column (int, optional): Columna (desde 1)
+        
+        Returns:
+            int: Desplazamiento en el texto
+        
+        Raises:
+            IndexError: Si la línea no existe
+        """
+        return self.line_start(line) + column - 1
+    
+    def position(self, offset):
+        """
+        Convierte un desplazamiento en posición.
+        
+        Args:
+            offset (int): Desplazamiento (de 0 a len(text))
+        
+        Returns:
+            tuple: (línea, columna), desde 1
+        
+        Raises:
+            IndexError: Si el desplazamiento está fuera del texto
+        """
+        if not 0 <= offset <= len(self.text):
+            raise IndexError(f"desplazamiento fuera de rango: {offset}")
+        line = bisect_right(self.line_starts, offset)
+        return line, offset - self.line_starts[line - 1] + 1
@@ -0,0 +1,164 @@
+"""
+Índice de intervalos para consultar qué nodos del AST hay en una posición.
+
+Cada nodo guarda el tramo del código que ocupa (line, column, end_line y
+end_column, con el final excluido). SpanIndex reúne esos tramos en un árbol
+de intervalos centrado y estático, así que saber qué nodos contienen una
+posición (por ejemplo, el nodo bajo el cursor del editor) cuesta
+O(log n + k) en lugar de recorrer todo el AST.
+
+Las posiciones se empaquetan en un entero (línea << 32 | columna) para
+compararlas de una sola vez.
+"""
+
+from models.ast_nodes import ASTNode, walk
+
+
+def _pack(line, column):
+    """
+    Empaqueta una posición (línea, columna) en un entero ordenable.
+    """
+    return (line << 32) | column
+
+
+class SpanIndex:
+    """
+    Árbol de intervalos con los tramos de los nodos de un AST.
+    
+    El árbol es estático: se construye una vez a partir del AST y no sigue
+    sus cambios, así que tras editar el AST hay que crear un índice nuevo.
+    Con hash_cons=True las expresiones son nodos compartidos sin tramo (sus
+    posiciones están en la PositionTable del parser), así que el índice
+    llega hasta las sentencias.
+    """
+    
+    __slots__ = ('_centers', '_by_start', '_by_end', '_left', '_right', '_size')
+    
+    def __init__(self, ast):
+        """
+        Construye el índice de un AST.
+        
+        Args:
+            ast: Nodo raíz del AST (se cargan los bloques perezosos)
+        """
+        intervals = []
+        seen = set()
+        
+        def enter(node, data, field, index):
+            if isinstance(node, ASTNode) and id(node) not in seen:
+                seen.add(id(node))
+                if node.end_line is not None and node.line is not None:
+                    start = _pack(node.line, node.column or 0)
+                    end = _pack(node.end_line, node.end_column or 0)
+                    if start < end:
+                        intervals.append((start, end, len(intervals), node))
+        
+        walk(ast, enter)
+        self._size = len(intervals)
+        
+        # Cada nodo del árbol guarda un centro, los intervalos que lo
+        # contienen (por inicio creciente y por final decreciente) y los
+        # índices de sus hijos izquierdo y derecho (-1 si no hay)
+        self._centers = []
+        self._by_start = []
+        self._by_end = []
+        self._left = []
+        self._right = []
+        
+        pending = [(intervals, -1, None)] if intervals else []
+        while pending:
+            group, parent, side = pending.pop()
+            group.sort()
+            
+            # El inicio del intervalo mediano siempre está dentro de él, así
+            # que cada nodo se queda al menos con un intervalo
+            center = group[len(group) // 2][0]
+            left, here, right = [], [], []
+            for interval in group:
+                if interval[1] <= center:
+                    left.append(interval)
+                elif interval[0] > center:
+                    right.append(interval)
+                else:
+                    here.append(interval)
+            
+            position = len(self._centers)
+            self._centers.append(center)
+            self._by_start.append(here)
+            self._by_end.append(sorted(here, key=lambda interval: -interval[1]))
+            self._left.append(-1)
+            self._right.append(-1)
+            if side is not None:
+                side[parent] = position
+            
+            if left:
+                pending.append((left, position, self._left))
+            if right:
+                pending.append((right, position, self._right))
+    
+    def __len__(self):
+        """
+        Número de tramos del índice.
+        """
+        return self._size
+    
+    def _find(self, line, column):
+        """
+        Busca los intervalos que contienen una posición.
+        
+        Returns:
+            list: Tuplas (inicio, final, orden, nodo), sin orden concreto
+        """
+        point = _pack(line, column)
+        found = []
+        position = 0 if self._centers else -1
+        while position != -1:
+            center = self._centers[position]
+            if point < center:
+                # Todos acaban después del centro: basta con que empiecen antes
+                for interval in self._by_start[position]:
+                    if interval[0] > point:
+                        break
+                    found.append(interval)
+                position = self._left[position]
+            else:
+                # Todos empiezan antes del centro: basta con que acaben después
+                for interval in self._by_end[position]:
+                    if interval[1] <= point:
+                        break
+                    found.append(interval)
+                position = self._right[position]
+        return found
+    
+    def node_at(self, line, column):
+        """
+        Obtiene el nodo más interno que contiene una posición.
+        
+        Args:
+            line (int): Línea (desde 1)
+            column (int): Columna (desde 1)
+        
+        Returns:
+            ASTNode: El nodo de tramo más interno, o None si no hay ninguno
+        """
+        found = self._find(line, column)
+        if not found:
+            return None
+        # El que empieza más tarde, luego el que acaba antes y, a igualdad de
+        # tramo, el más profundo (el último en preorden)
+        return max(found, key=lambda interval: (interval[0], -interval[1], interval[2]))[3]
+    
+    def nodes_at(self, line, column):
+        """
+        Obtiene todos los nodos que contienen una posición.
+        
+        Args:
+            line (int): Línea (desde 1)
+            column (int): Columna (desde 1)
+        
+        Returns:
+            list: Nodos ordenados del más externo al más interno
+        """
+        found = self._find(line, column)
+        found.sort(key=lambda interval: (interval[0], -interval[1], interval[2]))
+        return [interval[3] for interval in found]
@@ -1,8 +1,13 @@
+from models.interner import get_interner
+from utils.tracing import get_tracer
+
+_trace = get_tracer('symbols')
+
 class Symbol:
     """
     Clase que representa un símbolo en la tabla de símbolos.
     """
-    def __init__(self, name, type=None, value=None, line=None, column=None):
+    def __init__(self, name, type=None, value=None, line=None, column=None, symbol_id=None):
         """
         Inicializa un nuevo símbolo.
         
@@ -12,8 +17,10 @@ class Symbol:
             value (any, optional): Valor asociado al símbolo
             line (int, optional): Línea donde se declaró el símbolo
             column (int, optional): Columna donde se declaró el símbolo
+            symbol_id (int, optional): Número del nombre en la tabla de internamiento
         """
         self.name = name
+        self.symbol_id = symbol_id
         self.type = type
         self.value = value
         self.line = line
@@ -29,20 +36,34 @@ class Symbol:
 class SymbolTable:
     """
     Tabla de símbolos para almacenar y gestionar variables declaradas.
+    
+    Los símbolos se indexan por su número en la tabla de internamiento: el
+    símbolo visible de cada nombre se guarda en un diccionario con ese
+    número como clave, así que una búsqueda no recorre los ámbitos. Solo
+    contiene los nombres declarados en esta tabla, no todos los que tiene
+    la tabla de internamiento (que comparte todo el proceso).
     """
-    def __init__(self):
+    def __init__(self, interner=None):
         """
         Inicializa una nueva tabla de símbolos vacía.
+        
+        Args:
+            interner (Interner, optional): Tabla de internamiento de
+                identificadores (por defecto, la compartida del proceso)
         """
+        self.interner = interner or get_interner()
         self.symbols = {}
-        self.scopes = [{}]  # Pila de ámbitos para manejar bloques anidados
+        self.scopes = [{}]  # Pila de ámbitos (número de símbolo -> Symbol)
         self.current_scope = 0
+        self.visible = {}   # Número de símbolo -> Symbol visible
+        self._shadowed = [[]]  # Por ámbito: (número, símbolo que ocultaba)
     
     def enter_scope(self):
         """
         Entra en un nuevo ámbito (por ejemplo, al entrar en un bloque).
         """
         self.scopes.append({})
+        self._shadowed.append([])
         self.current_scope += 1
     
     def exit_scope(self):
@@ -51,9 +72,15 @@ class SymbolTable:
         """
         if self.current_scope > 0:
             self.scopes.pop()
+            # Volver a hacer visibles los símbolos ocultados por este ámbito
+            for symbol_id, previous in reversed(self._shadowed.pop()):
+                if previous is None:
+                    del self.visible[symbol_id]
+                else:
+                    self.visible[symbol_id] = previous
             self.current_scope -= 1
     
-    def insert(self, name, type=None, value=None, line=None, column=None):
+    def insert(self, name, type=None, value=None, line=None, column=None, symbol_id=None):
         """
         Inserta un nuevo símbolo en la tabla de símbolos.
         
@@ -63,21 +90,29 @@ class SymbolTable:
             value (any, optional): Valor asociado al símbolo
             line (int, optional): Línea donde se declaró el símbolo
             column (int, optional): Columna donde se declaró el símbolo
+            symbol_id (int, optional): Número del nombre, si ya se conoce
             
         Returns:
             bool: True si se insertó correctamente, False si ya existía en el ámbito actual
         """
+        if symbol_id is None:
+            symbol_id = self.interner.intern(name)
+        
         # Verificar si ya existe en el ámbito actual
-        if name in self.scopes[self.current_scope]:
+        if symbol_id in self.scopes[self.current_scope]:
             return False
         
         # Crear nuevo símbolo y agregarlo al ámbito actual
-        symbol = Symbol(name, type, value, line, column)
-        self.scopes[self.current_scope][name] = symbol
+        name = self.interner.get_name(symbol_id)
+        symbol = Symbol(name, type, value, line, column, symbol_id)
+        self.scopes[self.current_scope][symbol_id] = symbol
         self.symbols[name] = symbol
         
+        self._shadowed[self.current_scope].append((symbol_id, self.visible.get(symbol_id)))
+        self.visible[symbol_id] = symbol
+        
         # Debug
-        print(f"[SymbolTable] Insertado símbolo: {name}, tipo: {type}, valor: {value}")
+        _trace.debug("Insertado símbolo: %s, tipo: %s, valor: %s", name, type, value)
         
         return True
     
@@ -91,11 +126,22 @@ class SymbolTable:
         Returns:
             Symbol: El símbolo encontrado o None si no existe
         """
-        # Buscar desde el ámbito actual hacia atrás
-        for i in range(self.current_scope, -1, -1):
-            if name in self.scopes[i]:
-                return self.scopes[i][name]
-        return None
+        symbol_id = self.interner.get_id(name)
+        if symbol_id is None:
+            return None
+        return self.lookup_id(symbol_id)
+    
+    def lookup_id(self, symbol_id):
+        """
+        Busca un símbolo por su número en la tabla de internamiento.
+        
+        Args:
+            symbol_id (int): Número del nombre del símbolo
+            
+        Returns:
+            Symbol: El símbolo visible en el ámbito actual o None si no existe
+        """
+        return self.visible.get(symbol_id)
     
     def update(self, name, **kwargs):
         """
@@ -117,7 +163,7 @@ class SymbolTable:
                     setattr(symbol, key, value)
             
             # Debug
-            print(f"[SymbolTable] Actualizado símbolo: {name}, valor anterior: {old_value}, valor nuevo: {symbol.value}")
+            _trace.debug("Actualizado símbolo: %s, valor anterior: %s, valor nuevo: %s", name, old_value, symbol.value)
             
             # Actualizar también en la lista global
             if name in self.symbols:
@@ -136,8 +182,9 @@ class SymbolTable:
             list: Lista de todos los símbolos
         """
         # Debug
-        print(f"[SymbolTable] Obteniendo todos los símbolos: {len(self.symbols)}")
-        for name, symbol in self.symbols.items():
-            print(f"[SymbolTable] - {name}: tipo={symbol.type}, valor={symbol.value}")
+        if _trace.enabled:
+            _trace.debug("Obteniendo todos los símbolos: %s", len(self.symbols))
+            for name, symbol in self.symbols.items():
+                _trace.debug("- %s: tipo=%s, valor=%s", name, symbol.type, symbol.value)
         
         return list(self.symbols.values())
\ No newline at end of file
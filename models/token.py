@@ -1,8 +1,11 @@
+from array import array
+
 class Token:
     """
     Clase que representa un token en el análisis léxico.
     """
-    def __init__(self, type, value, line, column):
+    def __init__(self, type, value, line, column, start_pos=None, end_pos=None,
+                 end_line=None, end_column=None):
         """
         Inicializa un nuevo token.
         
@@ -11,11 +14,19 @@ class Token:
             value (str): El valor léxico del token
             line (int): Número de línea donde se encontró el token
             column (int): Posición de columna donde se encontró el token
+            start_pos (int, optional): Desplazamiento inicial en el código fuente
+            end_pos (int, optional): Desplazamiento final en el código fuente
+            end_line (int, optional): Línea donde termina el token
+            end_column (int, optional): Columna donde termina el token
         """
         self.type = type
         self.value = value
         self.line = line
         self.column = column
+        self.start_pos = start_pos
+        self.end_pos = end_pos
+        self.end_line = end_line
+        self.end_column = end_column
     
     def __str__(self):
         """
@@ -27,4 +38,348 @@ class Token:
         """
         Representación oficial del token.
         """
-        return self.__str__()
\ No newline at end of file
+        return self.__str__()
+
+
+class TokenView:
+    """
+    Vista ligera de un token almacenado en un TokenBuffer.
+    
+    Expone los mismos atributos que Token, pero los lee del buffer bajo
+    demanda; el valor es una rebanada del código fuente.
+    """
+    __slots__ = ('buffer', 'index', 'type')
+    
+    def __init__(self, buffer, index):
+        """
+        Inicializa la vista.
+        
+        Args:
+            buffer (TokenBuffer): Buffer que contiene el token
+            index (int): Posición del token en el buffer
+        """
+        self.buffer = buffer
+        self.index = index
+        self.type = buffer.kind_names[buffer.kinds[index]]
+    
+    @property
+    def value(self):
+        return self.buffer.get_value(self.index)
+    
+    @property
+    def line(self):
+        return self.buffer.lines[self.index]
+    
+    @property
+    def column(self):
+        return self.buffer.columns[self.index]
+    
+    @property
+    def start_pos(self):
+        return self.buffer.starts[self.index]
+    
+    @property
+    def end_pos(self):
+        return self.buffer.ends[self.index]
+    
+    # El final se busca directamente en el código fuente, sin copiar el valor
+    @property
+    def end_line(self):
+        buffer, index = self.buffer, self.index
+        return buffer.lines[index] + buffer.source.count('\n', buffer.starts[index], buffer.ends[index])
+    
+    @property
+    def end_column(self):
+        buffer, index = self.buffer, self.index
+        start, end = buffer.starts[index], buffer.ends[index]
+        newline = buffer.source.rfind('\n', start, end)
+        if newline < 0:
+            return buffer.columns[index] + end - start
+        return end - newline
+    
+    @property
+    def symbol_id(self):
+        symbol_ids = self.buffer.symbol_ids
+        if symbol_ids is None or symbol_ids[self.index] < 0:
+            return None
+        return symbol_ids[self.index]
+    
+    def to_token(self):
+        """
+        Crea un Token independiente con los datos de la vista.
+        
+        Returns:
+            Token: Copia materializada del token
+        """
+        return Token(self.type, self.value, self.line, self.column,
+                     self.start_pos, self.end_pos, self.end_line, self.end_column)
+    
+    def __str__(self):
+        """
+        Representación en cadena del token.
+        """
+        return f"Token({self.type}, '{self.value}', line={self.line}, col={self.column})"
+    
+    def __repr__(self):
+        """
+        Representación oficial del token.
+        """
+        return self.__str__()
+
+
+class TokenBuffer:
+    """
+    Secuencia compacta de tokens almacenada como estructura de arreglos.
+    
+    Cada token ocupa una entrada en arreglos de enteros (tipo, inicio, fin,
+    línea y columna); el valor no se guarda, se obtiene como rebanada del
+    código fuente. Los arreglos son públicos para recorrerlos sin crear un
+    objeto por token.
+    """
+    def __init__(self, source):
+        """
+        Inicializa un buffer vacío.
+        
+        Args:
+            source (str): Código fuente del que provienen los tokens
+        """
+        self.source = source
+        self.kind_names = []  # Identificador numérico -> nombre del tipo
+        self.kind_ids = {}    # Nombre del tipo -> identificador numérico
+        self.kinds = array('H')
+        self.starts = array('I')
+        self.ends = array('I')
+        self.lines = array('I')
+        self.columns = array('I')
+        
+        # Identificadores internados: número de símbolo por token (-1 si no es
+        # un identificador); se rellenan con intern_identifiers
+        self.symbol_ids = None
+        self.interner = None
+    
+    def get_kind_id(self, type):
+        """
+        Obtiene (o asigna) el identificador numérico de un tipo de token.
+        
+        Args:
+            type (str): Nombre del tipo de token
+            
+        Returns:
+            int: Identificador del tipo
+        """
+        kind = self.kind_ids.get(type)
+        if kind is None:
+            kind = len(self.kind_names)
+            self.kind_ids[type] = kind
+            self.kind_names.append(type)
+        return kind
+    
+    def append(self, type, start_pos, end_pos, line, column):
+        """
+        Añade un token al final del buffer.
+        
+        Args:
+            type (str): Tipo de token
+            start_pos (int): Desplazamiento inicial en el código fuente
+            end_pos (int): Desplazamiento final en el código fuente
+            line (int): Línea del token
+            column (int): Columna del token
+        """
+        self.kinds.append(self.get_kind_id(type))
+        self.starts.append(start_pos)
+        self.ends.append(end_pos)
+        self.lines.append(line)
+        self.columns.append(column)
+    
+    def extend(self, other):
+        """
+        Añade al final todos los tokens de otro buffer.
+        
+        Las posiciones se copian tal cual, así que deben referirse ya a este
+        código fuente. Si ambos buffers asignan los mismos identificadores de
+        tipo, los arreglos se copian sin recorrerlos.
+        
+        Args:
+            other (TokenBuffer): Buffer a añadir
+        """
+        mapping = [self.get_kind_id(name) for name in other.kind_names]
+        if mapping == list(range(len(mapping))):
+            self.kinds.extend(other.kinds)
+        else:
+            self.kinds.extend(mapping[kind] for kind in other.kinds)
+        self.starts.extend(other.starts)
+        self.ends.extend(other.ends)
+        self.lines.extend(other.lines)
+        self.columns.extend(other.columns)
+        self.symbol_ids = None
+    
+    def intern_identifiers(self, interner, type='IDENTIFICADOR'):
+        """
+        Asigna a cada identificador del buffer su número en la tabla de internamiento.
+        
+        Args:
+            interner (Interner): Tabla de internamiento
+            type (str, optional): Tipo de token de los identificadores
+        """
+        self.interner = interner
+        kind = self.kind_ids.get(type)
+        if kind is None:
+            self.symbol_ids = array('i', [-1]) * len(self.kinds)
+            return
+        
+        intern = interner.intern
+        source = self.source
+        self.symbol_ids = array('i', [intern(source[start:end]) if k == kind else -1
+                                      for k, start, end in zip(self.kinds, self.starts, self.ends)])
+    
+    def get_type(self, index):
+        """
+        Obtiene el tipo del token en la posición indicada.
+        """
+        return self.kind_names[self.kinds[index]]
+    
+    def get_value(self, index):
+        """
+        Obtiene el valor del token en la posición indicada.
+        
+        Los identificadores internados devuelven el nombre compartido de la
+        tabla de internamiento en lugar de una copia nueva.
+        """
+        symbol_ids = self.symbol_ids
+        if symbol_ids is not None and symbol_ids[index] >= 0:
+            return self.interner.names[symbol_ids[index]]
+        return self.source[self.starts[index]:self.ends[index]]
+    
+    def __len__(self):
+        return len(self.kinds)
+    
+    def __getitem__(self, index):
+        """
+        Obtiene una vista del token en la posición indicada.
+        
+        Args:
+            index (int): Posición (se admiten índices negativos)
+            
+        Returns:
+            TokenView: Vista del token
+        """
+        if index < 0:
+            index += len(self.kinds)
+        if not 0 <= index < len(self.kinds):
+            raise IndexError("índice de token fuera de rango")
+        return TokenView(self, index)
+    
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield TokenView(self, index)
+    
+    def __str__(self):
+        """
+        Representación en cadena del buffer.
+        """
+        return f"TokenBuffer({len(self)} tokens)"
+    
+    def __repr__(self):
+        """
+        Representación oficial del buffer.
+        """
+        return self.__str__()
+
+
+class MappedToken:
+    """
+    Token leído de un archivo mapeado en memoria.
+    
+    Conserva los bytes del token y sus desplazamientos en bytes; el valor
+    como texto solo se decodifica cuando se solicita.
+    """
+    __slots__ = ('type', 'raw', 'start_pos', 'end_pos', 'line', 'column')
+    
+    def __init__(self, type, raw, start_pos, end_pos, line, column):
+        """
+        Inicializa el token.
+        
+        Args:
+            type (str): Tipo de token
+            raw (bytes): Bytes del token en el archivo
+            start_pos (int): Desplazamiento inicial en bytes
+            end_pos (int): Desplazamiento final en bytes
+            line (int): Línea del token
+            column (int): Columna (en caracteres) del token
+        """
+        self.type = type
+        self.raw = raw
+        self.start_pos = start_pos
+        self.end_pos = end_pos
+        self.line = line
+        self.column = column
+    
+    @property
+    def value(self):
+        return self.raw.decode('utf-8')
+    
+    @property
+    def end_line(self):
+        return self.line + self.raw.count(b'\n')
+    
+    @property
+    def end_column(self):
+        newline = self.raw.rfind(b'\n')
+        if newline < 0:
+            return self.column + len(self.value)
+        return len(self.raw[newline + 1:].decode('utf-8')) + 1
+    
+    def __str__(self):
+        """
+        Representación en cadena del token.
+        """
+        return f"Token({self.type}, '{self.value}', line={self.line}, col={self.column})"
+    
+    def __repr__(self):
+        """
+        Representación oficial del token.
+        """
+        return self.__str__()
+
+
+class TokenDelta:
+    """
+    Cambio en la lista de tokens producido por una re-tokenización incremental.
+    
+    Los tokens de las líneas [start_line, old_end_line) de la versión anterior
+    se reemplazan por los de las líneas [start_line, new_end_line) de la nueva;
+    las líneas posteriores conservan sus tokens, desplazados `line_delta` líneas.
+    """
+    def __init__(self, start_line, old_end_line, new_end_line, removed, inserted):
+        """
+        Inicializa el cambio.
+        
+        Args:
+            start_line (int): Primera línea re-tokenizada (desde 1)
+            old_end_line (int): Línea final (exclusiva) del rango anterior
+            new_end_line (int): Línea final (exclusiva) del rango nuevo
+            removed (list): Tokens eliminados de la versión anterior
+            inserted (list): Tokens nuevos
+        """
+        self.start_line = start_line
+        self.old_end_line = old_end_line
+        self.new_end_line = new_end_line
+        self.removed = removed
+        self.inserted = inserted
+    
+    @property
+    def line_delta(self):
+        return self.new_end_line - self.old_end_line
+    
+    def __str__(self):
+        """
+        Representación en cadena del cambio.
+        """
+        return (f"TokenDelta(líneas {self.start_line}-{self.old_end_line} -> "
+                f"{self.start_line}-{self.new_end_line}, -{len(self.removed)} +{len(self.inserted)})")
+    
+    def __repr__(self):
+        """
+        Representación oficial del cambio.
+        """
+        return self.__str__()
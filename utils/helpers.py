@@ -2,9 +2,11 @@
 Funciones auxiliares para el analizador.
 """
 
-import os
 import re
 
+from models.ast_nodes import walk
+from models.source_index import SourceIndex
+
 def load_grammar_file():
     """
     Carga el archivo de gramática.
@@ -12,13 +14,10 @@ def load_grammar_file():
     Returns:
         str: Contenido del archivo de gramática
     """
-    grammar_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                'grammar', 'language_grammar.lark')
-    
-    with open(grammar_path, 'r') as f:
-        return f.read()
+    from grammar.registry import get_registry
+    return get_registry().get_source()
 
-def highlight_line(text, line_number, line_color='#ffff00'):
+def highlight_line(text, line_number, line_color='#ffff00', source_index=None):
     """
     Resalta una línea específica en el texto.
     
@@ -26,22 +25,21 @@ def highlight_line(text, line_number, line_color='#ffff00'):
         text (str): Texto a procesar
         line_number (int): Número de línea a resaltar
         line_color (str, optional): Color de resaltado en formato hex
-        
+        source_index (SourceIndex, optional): Índice de líneas del texto, si
+            ya se tiene (si no, se construye)
+    
     Returns:
         str: Texto HTML con la línea resaltada
     """
-    lines = text.split('\n')
-    if line_number <= 0 or line_number > len(lines):
+    if source_index is None:
+        source_index = SourceIndex(text)
+    if line_number <= 0 or line_number > len(source_index):
         return text
     
-    result = []
-    for i, line in enumerate(lines):
-        if i + 1 == line_number:
-            result.append(f'<span style="background-color: {line_color};">{line}</span>')
-        else:
-            result.append(line)
-    
-    return '\n'.join(result)
+    # Solo se localiza la línea: el resto del texto se copia tal cual
+    start = source_index.line_start(line_number)
+    end = source_index.line_end(line_number)
+    return f'{text[:start]}<span style="background-color: {line_color};">{text[start:end]}</span>{text[end:]}'
 
 def type_check(left_type, right_type, operator):
     """
@@ -51,7 +49,7 @@ def type_check(left_type, right_type, operator):
         left_type (str): Tipo del operando izquierdo
         right_type (str): Tipo del operando derecho
         operator (str): Operador a verificar
-        
+    
     Returns:
         str: Tipo resultante si es compatible, None en caso contrario
     """
@@ -86,7 +84,7 @@ def is_valid_identifier(name):
     
     Args:
         name (str): Nombre a verificar
-        
+    
     Returns:
         bool: True si es válido, False en caso contrario
     """
@@ -100,13 +98,16 @@ def is_valid_identifier(name):
     
     return bool(re.match(pattern, name)) and name not in reserved_words
 
+# Etiqueta de las aristas de cada elemento de un campo de tipo lista
+_DOT_LIST_LABELS = {'children': 'child', 'statements': 'stmt'}
+
 def format_ast_as_dot(ast):
     """
     Convierte el AST a formato DOT para visualización con Graphviz.
     
     Args:
         ast (ASTNode): Raíz del AST
-        
+    
     Returns:
         str: Representación DOT del AST
     """
@@ -131,10 +132,7 @@ def format_ast_as_dot(ast):
         else:
             dot.append(f'  node{from_id} -> node{to_id};')
     
-    def visit_node(node, parent_id=None, edge_label=""):
-        if not node:
-            return
-        
+    def visit_node(node, parent_id, field, index):
         # Crear etiqueta del nodo
         node_type = type(node).__name__
         label = node_type
@@ -158,43 +156,16 @@ def format_ast_as_dot(ast):
         # Crear nodo
         current_id = add_node(node, label)
         
-        # Añadir conexión con el padre
+        # Añadir conexión con el padre (el campo del que cuelga el nodo)
         if parent_id is not None:
-            add_edge(parent_id, current_id, edge_label)
-        
-        # Visitar hijos
-        if hasattr(node, 'children') and node.children:
-            for i, child in enumerate(node.children):
-                visit_node(child, current_id, f"child {i+1}")
-        
-        # Visitar hijos específicos según el tipo de nodo
-        if hasattr(node, 'left') and node.left:
-            visit_node(node.left, current_id, "left")
-        
-        if hasattr(node, 'right') and node.right:
-            visit_node(node.right, current_id, "right")
-        
-        if hasattr(node, 'condition') and node.condition:
-            visit_node(node.condition, current_id, "condition")
-        
-        if hasattr(node, 'if_body') and node.if_body:
-            visit_node(node.if_body, current_id, "if_body")
-        
-        if hasattr(node, 'else_body') and node.else_body:
-            visit_node(node.else_body, current_id, "else_body")
-        
-        if hasattr(node, 'body') and node.body:
-            visit_node(node.body, current_id, "body")
-        
-        if hasattr(node, 'expression') and node.expression:
-            visit_node(node.expression, current_id, "expression")
-        
-        if hasattr(node, 'statements') and node.statements:
-            for i, stmt in enumerate(node.statements):
-                visit_node(stmt, current_id, f"stmt {i+1}")
+            if index is None:
+                add_edge(parent_id, current_id, field)
+            else:
+                add_edge(parent_id, current_id, f"{_DOT_LIST_LABELS.get(field, field)} {index+1}")
+        return current_id
     
-    # Iniciar recorrido
-    visit_node(ast)
+    # Recorrido iterativo: admite ASTs de cualquier profundidad
+    walk(ast, visit_node)
     
     dot.append("}")
     return "\n".join(dot)
\ No newline at end of file
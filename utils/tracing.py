@@ -0,0 +1,177 @@
+"""
+Trazas de depuración por subsistema.
+
+Cada módulo obtiene un trazador con `get_tracer(nombre)` y lo usa en lugar
+de `print`. Los trazadores están desactivados por defecto: una llamada con
+el trazador desactivado solo compara el nivel y regresa, y el mensaje (con
+formato al estilo `%`) únicamente se construye si se va a escribir.
+
+Los niveles se cambian con `set_trace_level` o con la variable de entorno
+COMPILER_TRACE, por ejemplo:
+
+    COMPILER_TRACE=semantic=debug,symbols=info
+    COMPILER_TRACE=all
+"""
+
+import os
+import sys
+
+# Niveles (los mismos valores que el módulo logging)
+DEBUG = 10
+INFO = 20
+WARNING = 30
+OFF = 100
+
+LEVELS = {'debug': DEBUG, 'info': INFO, 'warning': WARNING, 'off': OFF}
+
+TRACE_ENV = 'COMPILER_TRACE'
+
+
+class Tracer:
+    """
+    Trazador de un subsistema (parser, semantic, symbols...).
+    """
+    __slots__ = ('name', 'level', 'enabled', 'stream')
+    
+    def __init__(self, name, level=OFF, stream=None):
+        """
+        Inicializa el trazador.
+        
+        Args:
+            name (str): Nombre del subsistema
+            level (int, optional): Nivel mínimo a escribir
+            stream (file, optional): Destino (por defecto, la salida estándar
+                vigente al escribir)
+        """
+        self.name = name
+        self.stream = stream
+        self.set_level(level)
+    
+    def set_level(self, level):
+        """
+        Cambia el nivel mínimo de los mensajes que se escriben.
+        
+        Args:
+            level (int): DEBUG, INFO, WARNING u OFF
+        """
+        self.level = level
+        # Atajo para proteger bloques de trazas costosos: `if trace.enabled:`
+        self.enabled = level <= DEBUG
+    
+    def is_enabled(self, level):
+        """
+        Comprueba si se escriben los mensajes de un nivel.
+        
+        Args:
+            level (int): Nivel a comprobar
+            
+        Returns:
+            bool: True si el mensaje se escribiría
+        """
+        return level >= self.level
+    
+    def debug(self, message, *args):
+        """
+        Escribe un mensaje de depuración.
+        
+        Args:
+            message (str): Mensaje, con marcadores `%` si hay argumentos
+            *args: Valores para los marcadores
+        """
+        if self.enabled:
+            self._write(message, args)
+    
+    def info(self, message, *args):
+        """
+        Escribe un mensaje informativo.
+        
+        Args:
+            message (str): Mensaje, con marcadores `%` si hay argumentos
+            *args: Valores para los marcadores
+        """
+        if INFO >= self.level:
+            self._write(message, args)
+    
+    def warning(self, message, *args):
+        """
+        Escribe una advertencia.
+        
+        Args:
+            message (str): Mensaje, con marcadores `%` si hay argumentos
+            *args: Valores para los marcadores
+        """
+        if WARNING >= self.level:
+            self._write(message, args)
+    
+    def _write(self, message, args):
+        """
+        Da formato al mensaje y lo escribe.
+        """
+        if args:
+            message = message % args
+        print(f"[{self.name}] {message}", file=self.stream or sys.stdout)
+
+
+_tracers = {}
+
+
+def get_tracer(name):
+    """
+    Obtiene el trazador de un subsistema, creándolo si no existe.
+    
+    Args:
+        name (str): Nombre del subsistema
+        
+    Returns:
+        Tracer: Trazador compartido
+    """
+    tracer = _tracers.get(name)
+    if tracer is None:
+        tracer = Tracer(name, _env_levels.get(name, _env_levels.get('all', OFF)))
+        _tracers[name] = tracer
+    return tracer
+
+
+def set_trace_level(name, level):
+    """
+    Cambia el nivel de un subsistema, o de todos con el nombre 'all'.
+    
+    Args:
+        name (str): Nombre del subsistema o 'all'
+        level (int | str): Nivel (DEBUG, INFO, WARNING, OFF o su nombre)
+    """
+    if isinstance(level, str):
+        level = LEVELS[level.lower()]
+    
+    if name == 'all':
+        _env_levels.clear()
+        _env_levels['all'] = level
+        for tracer in _tracers.values():
+            tracer.set_level(level)
+    else:
+        _env_levels[name] = level
+        get_tracer(name).set_level(level)
+
+
+def parse_trace_config(value):
+    """
+    Interpreta la configuración de trazas de la variable de entorno.
+    
+    Args:
+        value (str): Lista separada por comas de `subsistema[=nivel]`; sin
+            nivel se usa 'debug'
+        
+    Returns:
+        dict: Subsistema -> nivel
+    """
+    levels = {}
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, level = item.partition('=')
+        levels[name.strip()] = LEVELS.get(level.strip().lower() or 'debug', DEBUG)
+    return levels
+
+
+_env_levels = parse_trace_config(os.environ.get(TRACE_ENV, ''))
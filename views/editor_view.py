@@ -2,6 +2,8 @@ from PyQt5.QtWidgets import QPlainTextEdit, QWidget, QTextEdit
 from PyQt5.QtGui import QFont, QColor, QTextFormat, QTextCursor, QPainter, QTextCharFormat
 from PyQt5.QtCore import Qt, QRect, QSize
 
+from models.source_index import SourceIndex
+
 class LineNumberArea(QWidget):
     """
     Widget para mostrar números de línea en el editor.
@@ -44,6 +46,10 @@ class EditorView(QPlainTextEdit):
             }
         """)
         
+        # Resaltado de los errores del último análisis (se borra al editar)
+        self.error_selections = []
+        self.textChanged.connect(self.clear_error_highlights)
+        
         # Configurar área de números de línea
         self.line_number_area = LineNumberArea(self)
         
@@ -187,11 +193,11 @@ repetir(3) {
     
     def highlightCurrentLine_(self):
         """
-        Resalta la línea actual.
+        Resalta la línea actual (y los errores, si los hay).
         """
         extraSelections = []
         
-        if not self.isReadOnly():
+        if self.highlightCurrentLine and not self.isReadOnly():
             selection = QTextEdit.ExtraSelection()
             lineColor = QColor("#323232")
             
@@ -201,4 +207,42 @@ repetir(3) {
             selection.cursor.clearSelection()
             extraSelections.append(selection)
         
-        self.setExtraSelections(extraSelections)
\ No newline at end of file
+        self.setExtraSelections(extraSelections + self.error_selections)
+    
+    def highlight_errors(self, errors, source_index=None):
+        """
+        Subraya en el código la posición de cada error, desde su columna
+        hasta el final de la línea.
+        
+        Args:
+            errors (list): Errores (CompilerError) a resaltar
+            source_index (SourceIndex, optional): Índice de líneas del texto
+                del editor (por ejemplo, el del lexer); si no, se construye
+        """
+        if source_index is None:
+            source_index = SourceIndex(self.toPlainText())
+        
+        self.error_selections = []
+        for error in errors:
+            start = error.get_offset(source_index)
+            if start is None:
+                continue
+            end = max(source_index.line_end(error.line), start + 1)
+            
+            selection = QTextEdit.ExtraSelection()
+            selection.format.setUnderlineStyle(QTextCharFormat.WaveUnderline)
+            selection.format.setUnderlineColor(QColor("#ff6b68"))
+            selection.cursor = QTextCursor(self.document())
+            selection.cursor.setPosition(min(start, len(source_index.text)))
+            selection.cursor.setPosition(min(end, len(source_index.text)), QTextCursor.KeepAnchor)
+            self.error_selections.append(selection)
+        
+        self.highlightCurrentLine_()
+    
+    def clear_error_highlights(self):
+        """
+        Quita el resaltado de los errores.
+        """
+        if self.error_selections:
+            self.error_selections = []
+            self.highlightCurrentLine_()
\ No newline at end of file
@@ -277,6 +277,20 @@ class MainWindow(QMainWindow):
         
         return False
     
+    def _show_errors(self, title, errors):
+        """
+        Muestra los errores en la salida, con la línea de código de cada
+        uno, y los resalta en el editor.
+        
+        Args:
+            title (str): Título para la sección de errores
+            errors (list): Lista de errores a mostrar
+        """
+        # Índice de líneas del código analizado, compartido con el lexer
+        source_index = self.lexer_controller.get_source_index()
+        self.output_view.show_errors(title, errors, source_index)
+        self.editor_view.highlight_errors(errors, source_index)
+    
     def _on_lexical_analysis(self):
         """
         Maneja la acción de realizar el análisis léxico.
@@ -295,8 +309,8 @@ class MainWindow(QMainWindow):
         
         # Mostrar resultados
         if self.lexer_controller.has_errors():
-            self.output_view.show_errors("Análisis Léxico", 
-                                        self.lexer_controller.error_collection.lexical_errors)
+            self._show_errors("Análisis Léxico", 
+                             self.lexer_controller.error_collection.lexical_errors)
         else:
             # Mostrar tokens en la vista de salida
             self.output_view.show_tokens(tokens)
@@ -321,17 +335,17 @@ class MainWindow(QMainWindow):
         tokens = self.lexer_controller.tokenize(code)
         
         if self.lexer_controller.has_errors():
-            self.output_view.show_errors("Análisis Léxico", 
-                                        self.lexer_controller.error_collection.lexical_errors)
+            self._show_errors("Análisis Léxico", 
+                             self.lexer_controller.error_collection.lexical_errors)
             return
         
         # Realizar análisis sintáctico
-        ast = self.parser_controller.parse(code)
+        ast = self.parser_controller.parse(code, tokens)
         
         # Mostrar resultados
         if self.parser_controller.has_errors():
-            self.output_view.show_errors("Análisis Sintáctico", 
-                                        self.parser_controller.error_collection.syntax_errors)
+            self._show_errors("Análisis Sintáctico", 
+                             self.parser_controller.error_collection.syntax_errors)
         else:
             # Mostrar AST en la vista de salida
             self.output_view.show_ast(ast)
@@ -371,17 +385,17 @@ class MainWindow(QMainWindow):
         tokens = self.lexer_controller.tokenize(code)
         
         if self.lexer_controller.has_errors():
-            self.output_view.show_errors("Análisis Léxico", 
-                                        self.lexer_controller.error_collection.lexical_errors)
+            self._show_errors("Análisis Léxico", 
+                             self.lexer_controller.error_collection.lexical_errors)
             return
         
         # Realizar análisis sintáctico
         self.output_view.append_message("2. Ejecutando análisis sintáctico...")
-        ast = self.parser_controller.parse(code)
+        ast = self.parser_controller.parse(code, tokens)
         
         if self.parser_controller.has_errors() or ast is None:
-            self.output_view.show_errors("Análisis Sintáctico", 
-                                        self.parser_controller.error_collection.syntax_errors)
+            self._show_errors("Análisis Sintáctico", 
+                             self.parser_controller.error_collection.syntax_errors)
             return
         
         # Realizar análisis semántico
@@ -390,8 +404,8 @@ class MainWindow(QMainWindow):
         
         # Mostrar resultados
         if not success or self.semantic_controller.has_errors():
-            self.output_view.show_errors("Análisis Semántico", 
-                                        self.semantic_controller.error_collection.semantic_errors)
+            self._show_errors("Análisis Semántico", 
+                             self.semantic_controller.error_collection.semantic_errors)
         else:
             # Mostrar tabla de símbolos
             self.symbol_table_view.show_symbol_table(self.semantic_controller.get_symbol_table())
@@ -433,8 +447,8 @@ class MainWindow(QMainWindow):
         tokens = self.lexer_controller.tokenize(code)
         
         if self.lexer_controller.has_errors():
-            self.output_view.show_errors("Errores Léxicos", 
-                                        self.lexer_controller.error_collection.lexical_errors)
+            self._show_errors("Errores Léxicos", 
+                             self.lexer_controller.error_collection.lexical_errors)
             return
         
         self.output_view.append_message(f"Se encontraron {len(tokens)} tokens.")
@@ -442,11 +456,11 @@ class MainWindow(QMainWindow):
         
         # 2. Análisis sintáctico
         self.output_view.append_message("=== Análisis Sintáctico ===")
-        ast = self.parser_controller.parse(code)
+        ast = self.parser_controller.parse(code, tokens)
         
         if self.parser_controller.has_errors() or ast is None:
-            self.output_view.show_errors("Errores Sintácticos", 
-                                        self.parser_controller.error_collection.syntax_errors)
+            self._show_errors("Errores Sintácticos", 
+                             self.parser_controller.error_collection.syntax_errors)
             return
         
         self.output_view.append_message("Análisis sintáctico completado con éxito.\n")
@@ -458,8 +472,8 @@ class MainWindow(QMainWindow):
         success = self.semantic_controller.analyze(ast)
         
         if not success or self.semantic_controller.has_errors():
-            self.output_view.show_errors("Errores Semánticos", 
-                                        self.semantic_controller.error_collection.semantic_errors)
+            self._show_errors("Errores Semánticos", 
+                             self.semantic_controller.error_collection.semantic_errors)
             return
         
         # Mostrar tabla de símbolos
@@ -538,7 +552,7 @@ class MainWindow(QMainWindow):
         
         # Hacer el análisis léxico y sintáctico
         tokens = self.lexer_controller.tokenize(code)
-        ast = self.parser_controller.parse(code)
+        ast = self.parser_controller.parse(code, tokens)
         
         if ast:
             # Hacer el análisis semántico con el nuevo controlador
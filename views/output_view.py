@@ -2,6 +2,8 @@ from PyQt5.QtWidgets import QTextEdit, QVBoxLayout, QWidget
 from PyQt5.QtGui import QFont, QColor, QTextCursor
 from PyQt5.QtCore import Qt
 
+from models.ast_nodes import walk
+
 class OutputView(QTextEdit):
     """
     Vista para mostrar resultados del análisis.
@@ -54,25 +56,29 @@ class OutputView(QTextEdit):
         self.insertPlainText(message + "\n")
         self.moveCursor(QTextCursor.End)
     
-    def append_error(self, error, indent=0):
+    def append_error(self, error, indent=0, source_index=None):
         """
         Añade un mensaje de error a la salida.
         
         Args:
             error (CompilerError): Error a mostrar
             indent (int, optional): Nivel de indentación
+            source_index (SourceIndex, optional): Índice de líneas del código,
+                para mostrar la línea del error
         """
         indent_str = "  " * indent
-        message = f"{indent_str}{error}"
+        message = "\n".join(indent_str + line for line in error.format(source_index).split("\n"))
         self.append_message(message, QColor("#ff6b68"))  # Rojo para errores
     
-    def show_errors(self, title, errors):
+    def show_errors(self, title, errors, source_index=None):
         """
         Muestra una lista de errores.
         
         Args:
             title (str): Título para la sección de errores
             errors (list): Lista de errores a mostrar
+            source_index (SourceIndex, optional): Índice de líneas del código,
+                para mostrar la línea de cada error
         """
         self.clear()
         self.append_message(f"=== {title} ===\n", QColor("#ffc66d"))  # Amarillo para títulos
@@ -82,7 +88,7 @@ class OutputView(QTextEdit):
             return
         
         for error in errors:
-            self.append_error(error)
+            self.append_error(error, source_index=source_index)
         
         self.append_message(f"\nSe encontraron {len(errors)} errores.")
     
@@ -138,13 +144,46 @@ class OutputView(QTextEdit):
     
     def _print_ast_node(self, node, level=0, detailed=False):
         """
-        Imprime recursivamente un nodo del AST.
+        Imprime un nodo del AST y todos sus descendientes.
+        
+        El recorrido usa walk() (pila explícita), así que admite ASTs de
+        cualquier profundidad.
         
         Args:
             node (ASTNode): Nodo a imprimir
             level (int): Nivel de indentación
             detailed (bool): True para mostrar detalles adicionales
         """
+        def enter(node, parent_level, field, index):
+            if field is None:
+                level = parent_level
+            elif field == 'children':
+                level = parent_level + 1
+            else:
+                # Cabecera con el campo del padre del que cuelga el nodo
+                if index is None:
+                    label = field.replace('_', ' ').title()
+                else:
+                    label = f"{field[:-1].title()} {index+1}"  # statements -> Statement 1
+                self.append_message(f"{'  ' * parent_level}  └─ {label}:")
+                level = parent_level + 2
+            self.append_message(self._format_ast_node(node, level, detailed))
+            return level
+        
+        walk(node, enter, data=level)
+    
+    def _format_ast_node(self, node, level, detailed):
+        """
+        Construye la línea que describe un nodo del AST.
+        
+        Args:
+            node (ASTNode): Nodo a describir
+            level (int): Nivel de indentación
+            detailed (bool): True para mostrar detalles adicionales
+        
+        Returns:
+            str: Línea del nodo
+        """
         indent = "  " * level
         node_type = type(node).__name__
         
@@ -172,43 +211,4 @@ class OutputView(QTextEdit):
         if detailed and hasattr(node, 'type') and node.type is not None:
             node_info += f" {{type: {node.type}}}"
         
-        self.append_message(node_info)
-        
-        # Imprimir hijos
-        if hasattr(node, 'children') and node.children:
-            for child in node.children:
-                self._print_ast_node(child, level + 1, detailed)
-        
-        # Imprimir hijos específicos según el tipo de nodo
-        if hasattr(node, 'left') and node.left:
-            self.append_message(f"{indent}  └─ Left:")
-            self._print_ast_node(node.left, level + 2, detailed)
-        
-        if hasattr(node, 'right') and node.right:
-            self.append_message(f"{indent}  └─ Right:")
-            self._print_ast_node(node.right, level + 2, detailed)
-        
-        if hasattr(node, 'condition') and node.condition:
-            self.append_message(f"{indent}  └─ Condition:")
-            self._print_ast_node(node.condition, level + 2, detailed)
-        
-        if hasattr(node, 'if_body') and node.if_body:
-            self.append_message(f"{indent}  └─ If Body:")
-            self._print_ast_node(node.if_body, level + 2, detailed)
-        
-        if hasattr(node, 'else_body') and node.else_body:
-            self.append_message(f"{indent}  └─ Else Body:")
-            self._print_ast_node(node.else_body, level + 2, detailed)
-        
-        if hasattr(node, 'body') and node.body:
-            self.append_message(f"{indent}  └─ Body:")
-            self._print_ast_node(node.body, level + 2, detailed)
-        
-        if hasattr(node, 'expression') and node.expression:
-            self.append_message(f"{indent}  └─ Expression:")
-            self._print_ast_node(node.expression, level + 2, detailed)
-        
-        if hasattr(node, 'statements') and node.statements:
-            for i, stmt in enumerate(node.statements):
-                self.append_message(f"{indent}  └─ Statement {i+1}:")
-                self._print_ast_node(stmt, level + 2, detailed)
\ No newline at end of file
+        return node_info
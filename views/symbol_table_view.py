@@ -2,6 +2,10 @@ from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem, QHeaderView
 from PyQt5.QtGui import QFont, QColor
 from PyQt5.QtCore import Qt
 
+from utils.tracing import get_tracer
+
+_trace = get_tracer('views')
+
 class SymbolTableView(QTableWidget):
     """
     Vista para mostrar la tabla de símbolos.
@@ -69,11 +73,12 @@ class SymbolTableView(QTableWidget):
         # Obtener todos los símbolos
         symbols = symbol_table.get_all_symbols()
         # Depuración detallada
-        print("Debugging Symbol Table:")
-        print(f"Total number of symbols: {len(symbols)}")
-        
-        for symbol in symbols:
-            print(f"Symbol - Name: {symbol.name}, Type: {symbol.type}")
+        if _trace.enabled:
+            _trace.debug("Debugging Symbol Table:")
+            _trace.debug("Total number of symbols: %s", len(symbols))
+            
+            for symbol in symbols:
+                _trace.debug("Symbol - Name: %s, Type: %s", symbol.name, symbol.type)
 
         if not symbols:
             # Mostrar mensaje si no hay símbolos